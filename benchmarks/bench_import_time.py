@@ -0,0 +1,64 @@
+"""コールドスタート（import 時間）のベンチマーク.
+
+各ターゲットを新しいインタプリタで import し、所要時間の中央値が
+予算（秒）を超えた場合は終了コード 1 を返す。CI から回帰検知に使う想定。
+
+    PYTHONPATH=. python3 benchmarks/bench_import_time.py
+"""
+
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+# (import 文, 予算秒)
+TARGETS: list[tuple[str, float]] = [
+    ("import src.core", 0.15),
+    ("import src.services", 0.15),
+    ("from src.core import analyse_word", 0.15),
+    ("from src.core import run_keyword_extraction", 3.0),
+]
+REPEAT = 5
+
+
+def _measure(statement: str) -> float:
+    """新しいプロセスで statement を実行した際の import 時間を返す."""
+    code = (
+        "import time; _t = time.perf_counter(); "
+        f"{statement}; print(time.perf_counter() - _t)"
+    )
+    env = dict(os.environ, PYTHONPATH=os.getcwd())
+    out = subprocess.run(
+        [sys.executable, "-c", code],
+        check=True,
+        capture_output=True,
+        text=True,
+        env=env,
+    )
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+def _measure_interpreter() -> float:
+    """インタプリタ自体の起動時間（比較用のベースライン）を返す."""
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", "pass"], check=True)
+    return time.perf_counter() - start
+
+
+def main() -> int:
+    print(f"interpreter startup: {_measure_interpreter():.3f}s")
+
+    failed = False
+    for statement, budget in TARGETS:
+        samples = [_measure(statement) for _ in range(REPEAT)]
+        median = statistics.median(samples)
+        status = "OK" if median <= budget else "OVER BUDGET"
+        failed = failed or median > budget
+        print(f"{statement:<48} {median:.3f}s (budget {budget:.2f}s) {status}")
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
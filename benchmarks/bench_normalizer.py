@@ -0,0 +1,59 @@
+"""テキスト正規化のコストを形態素解析と比較するベンチマーク.
+
+正規化の所要時間が MeCab による形態素解析（名詞抽出込み）に対して
+どの程度の割合かを表示する。
+
+    PYTHONPATH=. python3 benchmarks/bench_normalizer.py
+"""
+
+import statistics
+import time
+from collections.abc import Callable
+
+import MeCab
+
+from src.core.normalizer import normalize_text
+from src.core.word_analyser import analyse_word
+
+REPEAT = 5
+# 表記揺れ・URL・絵文字を毎行含む（最悪ケース寄り）
+DIRTY_SAMPLE = (
+    "今日はＡＩの勉強会に参加した😀 ｶﾀｶﾅ表記の資料も多かった。"
+    "詳細は https://example.com/report を参照。\n"
+    "夕方は友人と　カフェで話せて良かった✨ 明日もがんばろう！\n"
+)
+# 日記本文として一般的な、揺れの少ない文章
+CLEAN_SAMPLE = (
+    "今日はAIの勉強会に参加した。カタカナ表記の資料も多かった。\n"
+    "夕方は友人とカフェで話せて良かった。明日もがんばろう。\n"
+)
+
+
+def _median_ms(func: Callable[[], object]) -> float:
+    samples: list[float] = []
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000
+
+
+def main() -> None:
+    tagger = MeCab.Tagger("")
+    for label, sample in (("clean", CLEAN_SAMPLE), ("dirty", DIRTY_SAMPLE)):
+        for n_lines in (100, 1_000, 10_000):
+            _report(label, sample * n_lines, tagger)
+
+
+def _report(label: str, text: str, tagger: MeCab.Tagger) -> None:
+    normalize_ms = _median_ms(lambda: normalize_text(text))
+    analyse_ms = _median_ms(lambda: analyse_word(text, tagger, set()))
+    print(
+        f"{label}  {len(text):>9,} chars  normalize {normalize_ms:8.2f} ms  "
+        f"analyse {analyse_ms:9.2f} ms  "
+        f"overhead {normalize_ms / analyse_ms:6.1%}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""Notion クエリ応答のサイズと解析時間のベンチマーク（1ページあたり）.
+
+ローカルの FakeNotionServer に対して、全プロパティを受け取る旧方式と、
+`filter_properties` で必要なプロパティだけを受け取る新方式を比較する。
+応答1ページあたりのバイト数と、JSON の解析 + エントリ変換にかかる時間を測る。
+あわせて notion-client 経由で1か月分を取得する時間も測る。
+
+    PYTHONPATH=. python3 benchmarks/bench_notion_payload.py
+"""
+
+import json
+import os
+import statistics
+import time
+
+import httpx
+
+from benchmarks.loadtest.fakes import FakeNotionServer
+from src.services.notion_handler import (
+    NOTION_BASE_URL_ENV,
+    build_month_filter,
+    create_notion_client,
+    iter_good_things_entries,
+    page_to_entry,
+    projected_property_ids,
+)
+
+DATABASE_ID = "bench-db"
+MONTH = "2025-07"
+PAGES_PER_MONTH = 100
+REPEAT = 20
+
+
+def _query(server: FakeNotionServer, property_ids: list[str] | None) -> bytes:
+    params = [("filter_properties", p) for p in property_ids or []]
+    response = httpx.post(
+        f"{server.url}/v1/databases/{DATABASE_ID}/query",
+        params=params,
+        json={"filter": build_month_filter(MONTH), "page_size": 100},
+    )
+    response.raise_for_status()
+    return response.content
+
+
+def _bench_payload(
+    label: str, server: FakeNotionServer, property_ids: list[str] | None
+) -> None:
+    payload = _query(server, property_ids)
+    times: list[float] = []
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        pages = json.loads(payload)["results"]
+        for page in pages:
+            page_to_entry(page)
+        times.append(time.perf_counter() - start)
+    n_pages = len(json.loads(payload)["results"])
+    print(
+        f"{label:<12} {len(payload) / n_pages:8.0f} bytes/page  "
+        f"parse {statistics.median(times) / n_pages * 1e6:7.1f} µs/page"
+    )
+
+
+def _bench_fetch(label: str, server: FakeNotionServer, project: bool) -> None:
+    import src.services.notion_handler as handler
+
+    original = handler.projected_property_ids
+    if not project:
+        handler.projected_property_ids = lambda client, database_id: None
+    try:
+        times: list[float] = []
+        sent_before = server.bytes_sent
+        for _ in range(REPEAT):
+            start = time.perf_counter()
+            entries = list(iter_good_things_entries("token", DATABASE_ID, MONTH))
+            times.append(time.perf_counter() - start)
+        sent = (server.bytes_sent - sent_before) / REPEAT
+    finally:
+        handler.projected_property_ids = original
+    print(
+        f"{label:<12} fetch {statistics.median(times) * 1000:7.2f} ms/month  "
+        f"{sent / 1024:7.1f} KiB/month  ({len(entries)} pages)"
+    )
+
+
+def main() -> None:
+    with FakeNotionServer(pages_per_month=PAGES_PER_MONTH) as server:
+        os.environ[NOTION_BASE_URL_ENV] = server.url
+        client = create_notion_client("token")
+        property_ids = projected_property_ids(client, DATABASE_ID)
+        print(f"pages: {PAGES_PER_MONTH}  filter_properties: {property_ids}")
+
+        _bench_payload("all props", server, None)
+        _bench_payload("projected", server, property_ids)
+        _bench_fetch("all props", server, project=False)
+        _bench_fetch("projected", server, project=True)
+
+
+if __name__ == "__main__":
+    main()
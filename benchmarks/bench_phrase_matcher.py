@@ -0,0 +1,148 @@
+"""ユーザー辞書の適用方法（USER_DICT_MODE）のベンチマーク.
+
+compiled: 辞書エントリから mecab-dict-index で辞書をビルドし、Tagger を作り直す。
+matcher: 辞書エントリから Aho-Corasick のオートマトンを作り、解析の前に登録語を
+         切り出す（Tagger はシステム辞書のものを使い回す）。
+
+辞書を編集してから解析に反映されるまでの時間（辞書の準備 + Tagger の生成）と、
+本文の解析時間、登録語を数えられた回数を比較する。mecab-dict-index や
+システム辞書のソースが無い環境では、compiled のビルドは計測しない。
+
+    PYTHONPATH=. python3 benchmarks/bench_phrase_matcher.py
+"""
+
+import os
+import random
+import shutil
+import statistics
+import subprocess
+import tempfile
+import time
+from collections import Counter
+from collections.abc import Callable
+
+import MeCab
+
+import src.core.csv_to_dic as csv_to_dic
+from src.core.csv_to_dic import build_user_dic_from_entries, iter_dic_entries
+from src.core.keyword_extraction import SYSTEM_DIC_DIR
+from src.core.normalizer import normalize_text
+from src.core.phrase_matcher import PhraseMatcher
+from src.core.word_analyser import extract_nouns, extract_nouns_with_phrases
+
+N_ENTRIES = 2_000
+N_TEXTS = 1_000
+REPEAT = 5
+TAGGER_ARGS = "-r /etc/mecabrc -d /var/lib/mecab/dic/ipadic-utf8"
+
+_FILLERS = [
+    "今日は友人と{}の話をした。",
+    "朝から{}について調べて、午後は散歩した。",
+    "{}がうまくいって嬉しかった。",
+    "家族で夕食を食べながら{}を見た。",
+]
+
+
+def _make_entries(n: int) -> list[tuple[str, str, str, str]]:
+    return [
+        (f"推し活用語{i}", "名詞", f"オシカツヨウゴ{i}", f"オシカツヨウゴ{i}")
+        for i in range(n)
+    ]
+
+
+def _make_texts(entries: list[tuple[str, str, str, str]]) -> list[str]:
+    rng = random.Random(0)
+    return [
+        normalize_text(
+            "".join(
+                rng.choice(_FILLERS).format(rng.choice(entries)[0]) for _ in range(3)
+            )
+        )
+        for _ in range(N_TEXTS)
+    ]
+
+
+def _median_ms(func: Callable[[], object]) -> float:
+    times: list[float] = []
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times) * 1000
+
+
+def _prepare_compiled(entries: list[tuple[str, str, str, str]]) -> str | None:
+    """キャッシュを使わずに辞書をビルドする（ビルドできない環境では None）."""
+    cache_dir = tempfile.mkdtemp()
+    original = csv_to_dic.USER_DIC_CACHE_DIR
+    csv_to_dic.USER_DIC_CACHE_DIR = cache_dir
+    try:
+        return build_user_dic_from_entries(entries, dic_dir=SYSTEM_DIC_DIR)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    finally:
+        csv_to_dic.USER_DIC_CACHE_DIR = original
+
+
+def main() -> None:
+    entries = _make_entries(N_ENTRIES)
+    texts = _make_texts(entries)
+    print(f"entries: {N_ENTRIES}  texts: {N_TEXTS}")
+
+    # --- 辞書の編集から反映までの時間 ---
+    matcher_ms = _median_ms(
+        lambda: PhraseMatcher.from_dic_entries(iter_dic_entries(entries))
+    )
+    matcher = PhraseMatcher.from_dic_entries(iter_dic_entries(entries))
+    print(f"matcher   prepare {matcher_ms:9.2f} ms  (Tagger の作り直しなし)")
+
+    start = time.perf_counter()
+    dic_path = _prepare_compiled(entries)
+    build_ms = (time.perf_counter() - start) * 1000
+    if dic_path is None:
+        print("compiled  prepare   skipped   (mecab-dict-index / 辞書ソースが無い)")
+        compiled_tagger = None
+    else:
+        start = time.perf_counter()
+        compiled_tagger = MeCab.Tagger(f"{TAGGER_ARGS} -u {dic_path}")
+        tagger_ms = (time.perf_counter() - start) * 1000
+        print(
+            f"compiled  prepare {build_ms + tagger_ms:9.2f} ms  "
+            f"(ビルド {build_ms:.2f} ms + Tagger 生成 {tagger_ms:.2f} ms)"
+        )
+        shutil.rmtree(os.path.dirname(os.path.dirname(dic_path)), ignore_errors=True)
+
+    # --- 解析時間と登録語の出現回数 ---
+    system_tagger = MeCab.Tagger(TAGGER_ARGS)
+    terms = {word for word, *_ in entries}
+
+    def run_matcher() -> Counter[str]:
+        return Counter(
+            word
+            for text in texts
+            for word in extract_nouns_with_phrases(text, system_tagger, set(), matcher)
+        )
+
+    def run_tagger(tagger: MeCab.Tagger) -> Counter[str]:
+        return Counter(
+            word for text in texts for word in extract_nouns(text, tagger, set())
+        )
+
+    rows: list[tuple[str, Callable[[], Counter[str]]]] = [
+        ("system", lambda: run_tagger(system_tagger)),
+        ("matcher", run_matcher),
+    ]
+    if compiled_tagger is not None:
+        rows.append(("compiled", lambda: run_tagger(compiled_tagger)))
+    for label, func in rows:
+        elapsed = _median_ms(func)
+        counts = func()
+        hits = sum(n for word, n in counts.items() if word in terms)
+        print(
+            f"{label:<9} analyse {elapsed:9.2f} ms  "
+            f"({elapsed / N_TEXTS * 1000:6.1f} µs/text)  登録語の出現 {hits}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""形態素列の保存・再生（KE_TOKEN_STORE）のベンチマーク.
+
+同じ文章を、ストップワード・品詞の指定を変えながら何度も集計し直す場面を想定し、
+毎回 MeCab で解析する場合と、保存した形態素列を再生する場合を比較する。
+初回（解析して保存）と2回目以降（読み込んで再生）を分けて計測し、
+再生の結果が解析と一致することも確かめる。
+
+    PYTHONPATH=. python3 benchmarks/bench_token_store.py
+"""
+
+import os
+import random
+import statistics
+import tempfile
+import time
+from collections.abc import Callable
+
+import MeCab
+
+from src.core.normalizer import normalize_text
+from src.core.pos_filter import compile_pos_filter
+from src.core.stop_rules import compile_stop_rules
+from src.core.token_store import TokenStore, dictionary_version
+from src.core.word_analyser import extract_nouns
+
+N_TEXTS = 3_000
+REPEAT = 5
+TAGGER_ARGS = "-r /etc/mecabrc -d /var/lib/mecab/dic/ipadic-utf8"
+
+_SENTENCES = [
+    "今日は友人と新しいカフェで珈琲を飲んだ。",
+    "朝から資料を作って、午後は公園を散歩した。",
+    "家族で夕食を食べながら映画を見た。",
+    "2025年の目標について考えた時間がよかった。",
+    "ChatGPTに聞いてみたら、すぐに答えが返ってきた!",
+    "同僚がお土産にお菓子をくれたので、みんなで分けた。",
+]
+
+# 集計し直すときの設定（ストップワード, 数える品詞）
+SETTINGS = [
+    (frozenset[str](), "名詞"),
+    (frozenset({"今日", "時間", "@数字", "@1文字"}), "名詞"),
+    (frozenset({"原形:飲む", "品詞:名詞-非自立"}), "名詞,!名詞-代名詞"),
+]
+
+
+def _make_texts() -> list[str]:
+    rng = random.Random(0)
+    return [
+        normalize_text("".join(rng.choice(_SENTENCES) for _ in range(3))) + f"（{i}）"
+        for i in range(N_TEXTS)
+    ]
+
+
+def _median_ms(func: Callable[[], object]) -> float:
+    times: list[float] = []
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times) * 1000
+
+
+def main() -> None:
+    texts = _make_texts()
+    tagger = MeCab.Tagger(TAGGER_ARGS)
+    version = dictionary_version(tagger, None)
+    print(f"texts: {N_TEXTS}")
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, "tokens.db")
+        start = time.perf_counter()
+        TokenStore(path).load_or_tokenize(texts, tagger, dict_version=version)
+        first_ms = (time.perf_counter() - start) * 1000
+        size_kb = (
+            sum(os.path.getsize(p) for p in (path, f"{path}-wal") if os.path.exists(p))
+            / 1024
+        )
+        print(f"初回（解析して保存） {first_ms:9.2f} ms  ({size_kb:.0f} KB)")
+
+        store = TokenStore(path)
+        load_ms = _median_ms(
+            lambda: store.load_or_tokenize(texts, tagger, dict_version=version)
+        )
+        print(f"2回目（読み込みのみ） {load_ms:9.2f} ms")
+        streams = store.load_or_tokenize(texts, tagger, dict_version=version)
+
+        for stop_words, spec in SETTINGS:
+            rules = compile_stop_rules(stop_words)
+            pos_filter = compile_pos_filter(spec)
+            expected = [extract_nouns(t, tagger, rules, pos_filter) for t in texts]
+            assert store.replay(streams, rules, pos_filter) == expected
+
+            mecab_ms = _median_ms(
+                lambda: [extract_nouns(t, tagger, rules, pos_filter) for t in texts]
+            )
+            replay_ms = _median_ms(lambda: store.replay(streams, rules, pos_filter))
+            print(
+                f"--- {spec} / {sorted(stop_words)}\n"
+                f"MeCab で解析   {mecab_ms:9.2f} ms\n"
+                f"再生           {replay_ms:9.2f} ms  "
+                f"(読み込み込み {load_ms + replay_ms:.2f} ms, "
+                f"x{mecab_ms / (load_ms + replay_ms):.2f})"
+            )
+
+
+if __name__ == "__main__":
+    main()
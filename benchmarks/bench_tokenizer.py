@@ -0,0 +1,101 @@
+"""形態素解析の内側のループ（名詞の取り出し）のベンチマーク.
+
+split: 以前の実装。ノードごとに素性の文字列を分割して品詞を見る。
+node: ノードの posid で判定する（posid ごとの判定は覚えておく、現在の実装）。
+
+同じ文章を解析して取り出した語が一致することを確かめたうえで、
+トークン/秒（MeCab が切り出した形態素の数 / 解析時間）を比較する。
+
+    PYTHONPATH=. python3 benchmarks/bench_tokenizer.py
+"""
+
+import random
+import statistics
+import time
+from collections.abc import Callable
+
+import MeCab
+
+from src.core.normalizer import normalize_text
+from src.core.pos_filter import compile_pos_filter
+from src.core.stop_rules import StopRules, compile_stop_rules
+from src.core.word_analyser import extract_nouns
+
+N_TEXTS = 3_000
+REPEAT = 5
+TAGGER_ARGS = "-r /etc/mecabrc -d /var/lib/mecab/dic/ipadic-utf8"
+
+_SENTENCES = [
+    "今日は友人と新しいカフェで珈琲を飲んだ。",
+    "朝から資料を作って、午後は公園を散歩した。",
+    "家族で夕食を食べながら映画を見た。",
+    "2025年の目標について考えた時間がよかった。",
+    "ChatGPTに聞いてみたら、すぐに答えが返ってきた!",
+    "同僚がお土産にお菓子をくれたので、みんなで分けた。",
+]
+
+
+def _make_texts() -> list[str]:
+    rng = random.Random(0)
+    return [
+        normalize_text("".join(rng.choice(_SENTENCES) for _ in range(3)))
+        for _ in range(N_TEXTS)
+    ]
+
+
+def _extract_split(text: str, tagger: MeCab.Tagger, rules: StopRules) -> list[str]:
+    """以前の実装（素性を毎回分割して品詞を見る）."""
+    node = tagger.parseToNode(text)
+    noun_list: list[str] = []
+    while node:
+        features = node.feature.split(",")
+        if features[0] == "名詞":
+            surface = node.surface
+            if surface != "" and not (rules and rules.is_stopped(surface, features)):
+                noun_list.append(surface)
+        node = node.next
+    return noun_list
+
+
+def _median_s(func: Callable[[], object]) -> float:
+    times: list[float] = []
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def main() -> None:
+    texts = _make_texts()
+    node_tagger = MeCab.Tagger(TAGGER_ARGS)
+    n_tokens = sum(len(node_tagger.parse(text).splitlines()) - 1 for text in texts)
+    print(f"texts: {N_TEXTS}  tokens: {n_tokens}")
+
+    for label, stop_words in [
+        ("ストップワードなし", frozenset[str]()),
+        ("表層形・文字種", frozenset({"今日", "時間", "@数字", "@1文字"})),
+        ("原形・品詞", frozenset({"原形:飲む", "品詞:名詞-非自立"})),
+    ]:
+        rules = compile_stop_rules(stop_words)
+        pos_filter = compile_pos_filter()
+        rows: list[tuple[str, Callable[[str], list[str]]]] = [
+            ("split", lambda text: _extract_split(text, node_tagger, rules)),
+            ("node", lambda text: extract_nouns(text, node_tagger, rules, pos_filter)),
+        ]
+        expected = [rows[0][1](text) for text in texts]
+        print(f"--- {label}")
+        baseline: float | None = None
+        for name, extract in rows:
+            assert [extract(text) for text in texts] == expected, name
+            elapsed = _median_s(lambda: [extract(text) for text in texts])
+            baseline = baseline or elapsed
+            print(
+                f"{name:<6} {elapsed * 1000:8.2f} ms  "
+                f"{n_tokens / elapsed / 1000:8.1f} k tokens/s  "
+                f"(x{baseline / elapsed:.2f})"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""ユーザー辞書ソースCSV生成のベンチマーク（10k エントリ）.
+
+旧方式（全行を1つの文字列に連結 → ハッシュ → ファイルに書き出し → 読み直して
+再度書き出し）と、ジェネレータで検証しながらハッシュを取りつつ一度だけ書き出す
+新方式を比較する。旧方式は変更前の実装をこのファイルにそのまま写してある
+（現在の `_csv_to_dic` は新方式の書き出しを使うため比較にならない）。
+mecab-dict-index の実行時間はどちらも1回分で同じなので計測に含めない。
+
+    PYTHONPATH=. python3 benchmarks/bench_user_dic.py
+"""
+
+import csv
+import hashlib
+import os
+import statistics
+import tempfile
+import time
+import tracemalloc
+from collections.abc import Callable
+
+from src.core.csv_to_dic import _HashingWriter, write_mecab_csv
+
+N_ENTRIES = 10_000
+REPEAT = 5
+DIC_DIR = "/var/lib/mecab/dic/ipadic-utf8"
+
+
+def _make_entries(n: int) -> list[tuple[str, str, str, str]]:
+    return [
+        (f"専門用語{i}", "名詞", f"センモンヨウゴ{i}", f"センモンヨウゴ{i}")
+        for i in range(n)
+    ]
+
+
+def _legacy(entries: list[tuple[str, str, str, str]], workdir: str) -> None:
+    # 変更前の load_user_dic_path → build_user_dic_from_csv_data → _csv_to_dic
+    csv_data = "\n".join([f"{w},{p},{r},{pr}" for w, p, r, pr in entries])
+    hashlib.sha256(f"{DIC_DIR}\n{csv_data}".encode("utf-8")).hexdigest()
+    input_csv_path = os.path.join(workdir, "user_entry.csv")
+    with open(input_csv_path, "w", encoding="utf-8") as f:
+        f.write(csv_data)
+    with open(input_csv_path, "r", encoding="utf-8") as infile:
+        csvreader = csv.reader(infile)
+        with open(os.path.join(workdir, "user.csv"), "w", encoding="utf-8") as out:
+            for row in csvreader:
+                word, part_of_speech, reading, pronunciation = row
+                dic_line = (
+                    f"{word},0,0,0,{part_of_speech},*,{part_of_speech},*,*,*,"
+                    f"{reading},{pronunciation},{pronunciation}\n"
+                )
+                out.write(dic_line)
+
+
+def _streaming(entries: list[tuple[str, str, str, str]], workdir: str) -> None:
+    # build_user_dic_from_entries と同じ書き出し（ハッシュを取りながら一度だけ）
+    digest = hashlib.sha256(f"{DIC_DIR}\n".encode("utf-8"))
+    with open(os.path.join(workdir, "user.csv"), "w", encoding="utf-8") as f:
+        write_mecab_csv(entries, _HashingWriter(f, digest))
+    digest.hexdigest()
+
+
+def _bench(
+    label: str,
+    func: Callable[[list[tuple[str, str, str, str]], str], None],
+    entries: list[tuple[str, str, str, str]],
+) -> None:
+    # 時間は tracemalloc を止めて計測する（割り当ての追跡で遅くなるため）
+    times: list[float] = []
+    for _ in range(REPEAT):
+        with tempfile.TemporaryDirectory() as workdir:
+            start = time.perf_counter()
+            func(entries, workdir)
+            times.append(time.perf_counter() - start)
+    with tempfile.TemporaryDirectory() as workdir:
+        tracemalloc.start()
+        func(entries, workdir)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    print(
+        f"{label:<10} median {statistics.median(times) * 1000:8.2f} ms  "
+        f"peak alloc {peak / 1024:8.1f} KiB"
+    )
+
+
+def main() -> None:
+    entries = _make_entries(N_ENTRIES)
+    print(f"entries: {N_ENTRIES}")
+    _bench("legacy", _legacy, entries)
+    _bench("streaming", _streaming, entries)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,361 @@
+"""1レプリカあたりの同時ユーザー数を見積もるための負荷試験ドライバー.
+
+ローカルに Notion / Supabase の代替サーバー（fakes.py）を立ち上げ、N 人の
+ユーザーを並行に動かす。各ユーザーは `run_keyword_extraction` を実行したあと、
+履歴ページ（月別キーワード・キーワード推移・直近の解析結果）と同じ問い合わせを
+行う。これを指定回数繰り返し、スループット・段階ごとの p50/p95/p99・
+メモリ増加量を表示する。段階ごとの処理時間は KELogger の集計を使う。
+
+    PYTHONPATH=. python3 benchmarks/loadtest/driver.py --users 8 --iterations 5 \\
+        --notion-latency-ms 150 --supabase-latency-ms 30 --error-rate 0.01
+
+作業ディレクトリは一時ディレクトリに切り替えるので、output/ は汚れない。
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+import unicodedata
+from collections import Counter
+from collections.abc import Callable
+from dataclasses import dataclass, field
+
+from benchmarks.loadtest.fakes import FakeNotionServer, FakeSupabaseServer, FaultConfig
+from src.logs.logger import (
+    KELogger,
+    MemoryRecord,
+    current_rss_bytes,
+    peak_rss_bytes,
+)
+
+DATABASE_ID = "loadtest-db"
+# supabase-py は JWT 形式のキーしか受け付けない
+FAKE_SUPABASE_KEY = "loadtest.fake.key"
+STOP_WORDS = ["こと", "もの", "よう"]
+PERCENTILES = (50, 95, 99)
+SCRIPT_RUN_CONTEXT_LOGGER = "streamlit.runtime.scriptrunner_utils.script_run_context"
+
+
+@dataclass
+class RunStats:
+    """ドライバー側で計測する、ユーザー操作単位の結果."""
+
+    durations: dict[str, list[float]] = field(default_factory=dict)
+    errors: Counter[str] = field(default_factory=Counter)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def record(self, label: str, elapsed: float) -> None:
+        with self._lock:
+            self.durations.setdefault(label, []).append(elapsed)
+
+    def fail(self, label: str, error: Exception) -> None:
+        with self._lock:
+            self.errors[f"{label}: {type(error).__name__}"] += 1
+
+
+def _current_rss_mb() -> float:
+    return current_rss_bytes() / 1024**2
+
+
+def _peak_rss_mb() -> float:
+    return peak_rss_bytes() / 1024**2
+
+
+def percentile(values: list[float], q: float) -> float:
+    """最近接順位法によるパーセンタイル."""
+    ordered = sorted(values)
+    rank = max(int(-(-q * len(ordered) // 100)), 1)
+    return ordered[rank - 1]
+
+
+def _ljust(text: str, width: int) -> str:
+    """全角文字を2桁として左寄せする."""
+    columns = sum(2 if unicodedata.east_asian_width(c) in "WF" else 1 for c in text)
+    return text + " " * max(width - columns, 0)
+
+
+def _timed(stats: RunStats, label: str, func: Callable[[], object]) -> bool:
+    start = time.perf_counter()
+    try:
+        func()
+    except Exception as e:
+        stats.fail(label, e)
+        return False
+    stats.record(label, time.perf_counter() - start)
+    return True
+
+
+def _browse_history(user_id: str, target_month: str) -> list[tuple[str, Callable]]:
+    """履歴ページと同じ問い合わせを返す."""
+    from src.services.supabase_client import get_supabase_client
+
+    supabase = get_supabase_client()
+    return [
+        (
+            "閲覧: 月別キーワード",
+            supabase.table("monthly_keywords")
+            .select("id, target_month, word, count, ranker")
+            .eq("user_id", user_id)
+            .order("target_month", desc=True)
+            .order("count", desc=True)
+            .execute,
+        ),
+        (
+            "閲覧: キーワード推移",
+            supabase.table("keyword_trends")
+            .select("target_month, word, count, delta, moving_avg, growth_score")
+            .eq("user_id", user_id)
+            .eq("target_month", target_month)
+            .order("growth_score", desc=True)
+            .execute,
+        ),
+        (
+            "閲覧: 直近の解析結果",
+            supabase.table("analysis_result")
+            .select("word, count, updated_at")
+            .eq("user_id", user_id)
+            .order("updated_at", desc=True)
+            .limit(5)
+            .execute,
+        ),
+    ]
+
+
+def _user_session(
+    user_id: str,
+    months: list[str],
+    iterations: int,
+    stats: RunStats,
+    barrier: threading.Barrier,
+) -> None:
+    from src.core.keyword_extraction import run_keyword_extraction
+
+    barrier.wait()
+    for i in range(iterations):
+        month = months[i % len(months)]
+        _timed(
+            stats,
+            "抽出（全体）",
+            lambda: run_keyword_extraction(month, user_id=user_id),
+        )
+        for label, query in _browse_history(user_id, month):
+            _timed(stats, label, query)
+
+
+def run_load_test(args: argparse.Namespace) -> dict[str, object]:
+    """代替サーバーを立ち上げて負荷をかけ、結果を辞書で返す."""
+    notion = FakeNotionServer(
+        FaultConfig(
+            args.notion_latency_ms, args.jitter_ms, args.error_rate, seed=args.seed
+        ),
+        pages_per_month=args.pages_per_month,
+    )
+    supabase = FakeSupabaseServer(
+        FaultConfig(
+            args.supabase_latency_ms, args.jitter_ms, args.error_rate, seed=args.seed
+        )
+    )
+    user_ids = [f"loadtest-user-{i:03d}" for i in range(args.users)]
+    for user_id in user_ids:
+        supabase.seed(
+            "stop_words", [{"user_id": user_id, "word": w} for w in STOP_WORDS]
+        )
+
+    os.environ.update(
+        {
+            "RENDER": "true",  # 画像出力を省き、Supabase モードで動かす
+            "NOTION_TOKEN": "loadtest",
+            "DATABASE_ID": DATABASE_ID,
+            "NOTION_BASE_URL": notion.url,
+            "NOTION_CACHE": "true" if args.notion_cache else "false",
+            "KE_MEMORY_PROFILE": "true" if args.memory_profile else "false",
+            "KE_MEMORY_TOP_SITES": str(args.memory_top_sites),
+            "SUPABASE_URL": supabase.url,
+            "SUPABASE_KEY": FAKE_SUPABASE_KEY,
+        }
+    )
+
+    # スレッドから st.* を呼ぶたびに出る ScriptRunContext の警告を抑える
+    # （ログレベルは設定の読み込み時に戻されるため、ロガー自体を無効にする）
+    logging.getLogger(SCRIPT_RUN_CONTEXT_LOGGER).disabled = True
+
+    KELogger.setup(level=logging.WARNING)
+    logging.getLogger("keyword_logger").disabled = not args.verbose
+    KELogger.reset_metrics()
+
+    stats = RunStats()
+    barrier = threading.Barrier(args.users + 1)
+    threads = [
+        threading.Thread(
+            target=_user_session,
+            args=(user_id, args.months, args.iterations, stats, barrier),
+            name=user_id,
+        )
+        for user_id in user_ids
+    ]
+
+    with notion, supabase:
+        # import や Tagger 生成などの初回コストを計測から外すため、1回だけ先に実行する
+        from src.core.keyword_extraction import run_keyword_extraction
+
+        run_keyword_extraction(args.months[0], user_id="loadtest-warmup")
+        KELogger.reset_metrics()
+        rss_before = _current_rss_mb()
+
+        for thread in threads:
+            thread.start()
+        barrier.wait()
+        started = time.perf_counter()
+        for thread in threads:
+            thread.join()
+        wall = time.perf_counter() - started
+
+        rss_after = _current_rss_mb()
+        requests = {"notion": notion.request_count, "supabase": supabase.request_count}
+
+    stages = {**KELogger.get_metrics(), **stats.durations}
+    completed = len(stats.durations.get("抽出（全体）", []))
+    return {
+        "users": args.users,
+        "iterations": args.iterations,
+        "wall_seconds": round(wall, 3),
+        "extractions_completed": completed,
+        "extractions_per_second": round(completed / wall, 3) if wall else 0.0,
+        "errors": dict(stats.errors),
+        "requests": requests,
+        "memory_mb": {
+            "rss_before": round(rss_before, 1),
+            "rss_after": round(rss_after, 1),
+            "rss_growth": round(rss_after - rss_before, 1),
+            "peak": round(_peak_rss_mb(), 1),
+        },
+        "stages": {
+            label: {
+                "count": len(values),
+                **{
+                    f"p{q}_ms": round(percentile(values, q) * 1000, 1)
+                    for q in PERCENTILES
+                },
+                "max_ms": round(max(values) * 1000, 1),
+            }
+            for label, values in stages.items()
+            if values
+        },
+        "memory_stages": {
+            label: _memory_summary(records)
+            for label, records in KELogger.get_memory_metrics().items()
+            if records
+        },
+    }
+
+
+def _memory_summary(records: list[MemoryRecord]) -> dict[str, object]:
+    """段階ごとのメモリ計測結果を、確保量・RSS 増加量の分布と頻出箇所にまとめる."""
+    allocs = [r.alloc_delta / 1024**2 for r in records]
+    rss = [r.rss_delta / 1024**2 for r in records]
+    sites = Counter(site.split(" ")[0] for r in records for site in r.top_sites[:1])
+    return {
+        "count": len(records),
+        "alloc_p50_mb": round(percentile(allocs, 50), 2),
+        "alloc_max_mb": round(max(allocs), 2),
+        "rss_total_mb": round(sum(rss), 2),
+        "top_site": sites.most_common(1)[0][0] if sites else "",
+    }
+
+
+def print_report(report: dict) -> None:
+    print(
+        f"users={report['users']} iterations={report['iterations']} "
+        f"wall={report['wall_seconds']:.2f}s "
+        f"throughput={report['extractions_per_second']:.2f} extractions/s "
+        f"({report['extractions_completed']} completed)"
+    )
+    print(f"requests: {report['requests']}")
+    memory = report["memory_mb"]
+    print(
+        f"memory: rss {memory['rss_before']:.1f}MB -> {memory['rss_after']:.1f}MB "
+        f"(growth {memory['rss_growth']:+.1f}MB, peak {memory['peak']:.1f}MB)"
+    )
+    if report["errors"]:
+        print("errors:")
+        for label, count in report["errors"].items():
+            print(f"  {count:5d}  {label}")
+
+    print(
+        f"\n{_ljust('stage', 24)}{'count':>7}{'p50 ms':>10}{'p95 ms':>10}"
+        f"{'p99 ms':>10}{'max ms':>10}"
+    )
+    for label, s in report["stages"].items():
+        print(
+            f"{_ljust(label, 24)}{s['count']:>7}"
+            + "".join(f"{s[key]:>10.1f}" for key in ("p50_ms", "p95_ms", "p99_ms"))
+            + f"{s['max_ms']:>10.1f}"
+        )
+
+    if report["memory_stages"]:
+        print(
+            f"\n{_ljust('stage', 24)}{'alloc p50':>11}{'alloc max':>11}"
+            f"{'rss total':>11}  top allocation site"
+        )
+        for label, m in report["memory_stages"].items():
+            print(
+                f"{_ljust(label, 24)}{m['alloc_p50_mb']:>9.2f}MB"
+                f"{m['alloc_max_mb']:>9.2f}MB{m['rss_total_mb']:>9.2f}MB  "
+                f"{m['top_site']}"
+            )
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=4, help="同時ユーザー数")
+    parser.add_argument("--iterations", type=int, default=3, help="1人あたりの実行回数")
+    parser.add_argument(
+        "--months", nargs="+", default=["2025-01", "2025-02", "2025-03"]
+    )
+    parser.add_argument("--pages-per-month", type=int, default=30)
+    parser.add_argument("--notion-latency-ms", type=float, default=100.0)
+    parser.add_argument("--supabase-latency-ms", type=float, default=20.0)
+    parser.add_argument("--jitter-ms", type=float, default=20.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--notion-cache", action="store_true", help="Notionキャッシュを有効にする"
+    )
+    parser.add_argument(
+        "--memory-profile",
+        action="store_true",
+        help="段階ごとのメモリ計測（tracemalloc・RSS）を有効にする（低速になる）",
+    )
+    parser.add_argument(
+        "--memory-top-sites",
+        type=int,
+        default=0,
+        help="段階ごとに記録する確保箇所の数（スナップショットは1段階あたり約1秒）",
+    )
+    parser.add_argument("--json", help="結果を JSON で書き出すパス")
+    parser.add_argument("--verbose", action="store_true", help="処理ログを表示する")
+    args = parser.parse_args(argv)
+
+    json_path = os.path.abspath(args.json) if args.json else None
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix="ke_loadtest_") as workdir:
+        os.chdir(workdir)
+        try:
+            report = run_load_test(args)
+        finally:
+            os.chdir(cwd)
+
+    print_report(report)
+    if json_path:
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
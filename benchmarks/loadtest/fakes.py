@@ -0,0 +1,529 @@
+"""負荷試験用の Notion / Supabase 代替サーバー.
+
+どちらも `ThreadingHTTPServer` でローカルの空きポートに立ち上げ、
+`NOTION_BASE_URL` / `SUPABASE_URL` をその URL に向けて使う。
+応答遅延（平均 + ゆらぎ）と、指定した割合でのエラー応答を注入できる。
+
+- FakeNotionServer: `POST /v1/databases/{id}/query` と `GET /v1/databases/{id}`。
+  ページは (データベースID, 月) ごとに決まった内容を生成する。
+- FakeSupabaseServer: PostgREST 互換の `/rest/v1/{table}`。テーブルはメモリ上の
+  辞書のリストで、select / eq・in・ilike 等のフィルタ / order / limit・offset・
+  Range / count=exact / insert・upsert / update / delete に対応する。
+"""
+
+import calendar
+import json
+import random
+import re
+import threading
+import time
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+# 生成するページ本文の材料
+_PHRASES = [
+    "朝の散歩で桜が咲いていた",
+    "同僚とランチでカレーを食べた",
+    "読書会で新しい本を紹介してもらった",
+    "ジムでトレーニングを続けられた",
+    "家族と電話で話せた",
+    "プロジェクトのレビューが通った",
+    "カフェで美味しいコーヒーを飲んだ",
+    "夕方に公園でキャッチボールをした",
+    "新しいレシピのパスタがうまくできた",
+    "友人から旅行の写真が届いた",
+    "会議が予定より早く終わった",
+    "部屋の掃除をして気分がすっきりした",
+]
+TEXT_PROPERTIES = ["良かったこと１", "良かったこと２", "良かったこと３"]
+DATE_PROPERTY = "日付"
+# 解析には使わないが、実際の日記データベースにありがちなプロパティ
+_TAGS = ["仕事", "家族", "趣味", "健康", "友人", "食事", "学び"]
+_MOODS = ["😀 最高", "🙂 良い", "😐 普通"]
+_ANNOTATIONS = {
+    "bold": False,
+    "italic": False,
+    "strikethrough": False,
+    "underline": False,
+    "code": False,
+    "color": "default",
+}
+
+
+@dataclass
+class FaultConfig:
+    """応答遅延とエラー注入の設定."""
+
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0
+    error_rate: float = 0.0
+    error_status: int = 503
+    seed: int | None = None
+    _random: random.Random = field(init=False, repr=False)
+    _lock: threading.Lock = field(
+        default_factory=threading.Lock, init=False, repr=False
+    )
+
+    def __post_init__(self) -> None:
+        self._random = random.Random(self.seed)
+
+    def apply(self) -> int | None:
+        """遅延を入れ、エラーを返すべきならそのステータスコードを返す."""
+        with self._lock:
+            delay = self.latency_ms + self._random.uniform(0, self.jitter_ms)
+            failed = self._random.random() < self.error_rate
+        if delay > 0:
+            time.sleep(delay / 1000)
+        return self.error_status if failed else None
+
+
+class _FakeServer:
+    """空きポートでリクエストハンドラを別スレッドで動かす基底クラス."""
+
+    def __init__(self, handler: Callable[["_Handler"], None], faults: FaultConfig):
+        self.faults = faults
+        self.request_count = 0
+        self.bytes_sent = 0
+        self._count_lock = threading.Lock()
+
+        server = self
+
+        class Handler(_Handler):
+            def handle_request(self) -> None:
+                # keep-alive のため、応答前に本文を必ず読み切る
+                self.body = self.read_json()
+                with server._count_lock:
+                    server.request_count += 1
+                status = server.faults.apply()
+                if status is not None:
+                    self.send_json(status, {"message": "injected failure"})
+                    return
+                handler(self)
+
+            def count_sent(self, size: int) -> None:
+                with server._count_lock:
+                    server.bytes_sent += size
+
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._httpd.daemon_threads = True
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host!s}:{port}"
+
+    def start(self) -> "_FakeServer":
+        self._thread.start()
+        return self
+
+    def shutdown(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc: object) -> None:
+        self.shutdown()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    body: object = None
+
+    def handle_request(self) -> None:
+        raise NotImplementedError
+
+    def count_sent(self, size: int) -> None:
+        """送る本文のバイト数を数える（応答を書き出す前に呼ばれる）."""
+
+    do_GET = do_POST = do_PATCH = do_DELETE = lambda self: self.handle_request()
+
+    @property
+    def path_only(self) -> str:
+        return urlsplit(self.path).path
+
+    @property
+    def query(self) -> list[tuple[str, str]]:
+        return parse_qsl(urlsplit(self.path).query, keep_blank_values=True)
+
+    def read_json(self) -> object:
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length)) if length else None
+
+    def send_json(
+        self, status: int, body: object, headers: dict[str, str] | None = None
+    ) -> None:
+        payload = b"" if body is None else json.dumps(body).encode("utf-8")
+        # クライアントが応答を受け取った時点で数え終わっているよう、書き出す前に数える
+        self.count_sent(len(payload))
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format: str, *args: object) -> None:
+        pass
+
+
+# --- Notion ---
+
+
+class FakeNotionServer(_FakeServer):
+    """Notion のデータベースクエリを模したサーバー."""
+
+    def __init__(
+        self,
+        faults: FaultConfig | None = None,
+        pages_per_month: int = 30,
+        phrases_per_property: int = 2,
+    ):
+        super().__init__(self._handle, faults or FaultConfig())
+        self.pages_per_month = pages_per_month
+        self.phrases_per_property = phrases_per_property
+        self.edited_at = "2000-01-01T00:00:00.000Z"
+
+    def _handle(self, req: _Handler) -> None:
+        match = re.fullmatch(r"/v1/databases/([^/]+)(/query)?", req.path_only)
+        if match is None:
+            req.send_json(404, {"message": "not found"})
+            return
+        database_id, is_query = match.groups()
+        if not is_query:
+            req.send_json(200, self._database(database_id))
+            return
+
+        query = req.body if isinstance(req.body, dict) else {}
+        pages = self._filter_pages(database_id, query.get("filter"))
+        filter_properties = [v for k, v in req.query if k == "filter_properties"]
+        if filter_properties:
+            for page in pages:
+                page["properties"] = {
+                    name: prop
+                    for name, prop in page["properties"].items()
+                    if name in filter_properties or prop["id"] in filter_properties
+                }
+
+        start = int(query.get("start_cursor") or 0)
+        page_size = int(query.get("page_size") or 100)
+        end = start + page_size
+        has_more = end < len(pages)
+        req.send_json(
+            200,
+            {
+                "object": "list",
+                "results": pages[start:end],
+                "has_more": has_more,
+                "next_cursor": str(end) if has_more else None,
+            },
+        )
+
+    def _database(self, database_id: str) -> dict[str, object]:
+        properties: dict[str, object] = {
+            name: {"id": f"t{i}", "name": name, "type": "rich_text"}
+            for i, name in enumerate(TEXT_PROPERTIES)
+        }
+        properties[DATE_PROPERTY] = {"id": "d0", "name": DATE_PROPERTY, "type": "date"}
+        for prop_id, name, prop_type in _EXTRA_PROPERTIES:
+            properties[name] = {"id": prop_id, "name": name, "type": prop_type}
+        return {"object": "database", "id": database_id, "properties": properties}
+
+    def _filter_pages(self, database_id: str, filter_obj: object) -> list[dict]:
+        if not isinstance(filter_obj, dict):
+            # 条件なし: 最新月のページ
+            return self.month_pages(database_id, time.strftime("%Y-%m"))
+        if "timestamp" in filter_obj:
+            # 差分同期: 生成したページは編集されないので常に空
+            return []
+        conditions = filter_obj.get("and", [filter_obj])
+        starts = [
+            c["date"]["on_or_after"]
+            for c in conditions
+            if "on_or_after" in c.get("date", {})
+        ]
+        return self.month_pages(database_id, starts[0][:7]) if starts else []
+
+    def month_pages(self, database_id: str, target_month: str) -> list[dict]:
+        """(データベースID, 月) ごとに決まった内容のページを日付の降順で返す."""
+        rng = random.Random(f"{database_id}:{target_month}")
+        extra_rng = random.Random(f"{database_id}:{target_month}:extra")
+        year, month = map(int, target_month.split("-"))
+        last_day = calendar.monthrange(year, month)[1]
+        pages = []
+        for i in range(self.pages_per_month):
+            day = last_day - i % last_day
+            properties: dict[str, object] = {
+                DATE_PROPERTY: {
+                    "id": "d0",
+                    "type": "date",
+                    "date": {"start": f"{target_month}-{day:02d}"},
+                }
+            }
+            for j, name in enumerate(TEXT_PROPERTIES):
+                text = "。".join(rng.sample(_PHRASES, self.phrases_per_property))
+                properties[name] = {
+                    "id": f"t{j}",
+                    "type": "rich_text",
+                    "rich_text": [_rich_text(text)],
+                }
+            properties.update(_extra_properties(extra_rng, target_month, day))
+            page_id = f"{database_id}-{target_month}-{i:04d}"
+            pages.append(
+                {
+                    "object": "page",
+                    "id": page_id,
+                    "created_time": f"{target_month}-{day:02d}T12:00:00.000Z",
+                    "last_edited_time": self.edited_at,
+                    "created_by": {"object": "user", "id": "user-0001"},
+                    "last_edited_by": {"object": "user", "id": "user-0001"},
+                    "cover": None,
+                    "icon": {"type": "emoji", "emoji": "📔"},
+                    "parent": {"type": "database_id", "database_id": database_id},
+                    "archived": False,
+                    "in_trash": False,
+                    "url": f"https://www.notion.so/{page_id}",
+                    "public_url": None,
+                    "properties": properties,
+                }
+            )
+        return pages
+
+
+_EXTRA_PROPERTIES = [
+    ("m0", "メモ", "rich_text"),
+    ("g0", "タグ", "multi_select"),
+    ("s0", "気分", "select"),
+    ("r0", "関連ページ", "relation"),
+    ("c0", "作成日時", "created_time"),
+]
+
+
+def _rich_text(text: str) -> dict[str, object]:
+    return {
+        "type": "text",
+        "text": {"content": text, "link": None},
+        "annotations": _ANNOTATIONS,
+        "plain_text": text,
+        "href": None,
+    }
+
+
+def _extra_properties(
+    rng: random.Random, target_month: str, day: int
+) -> dict[str, object]:
+    """解析には使わないプロパティ（射影で取り除かれる分）を生成する."""
+    memo = "。".join(rng.sample(_PHRASES, 4))
+    return {
+        "メモ": {"id": "m0", "type": "rich_text", "rich_text": [_rich_text(memo)]},
+        "タグ": {
+            "id": "g0",
+            "type": "multi_select",
+            "multi_select": [
+                {"id": f"tag-{tag}", "name": tag, "color": "blue"}
+                for tag in rng.sample(_TAGS, 3)
+            ],
+        },
+        "気分": {
+            "id": "s0",
+            "type": "select",
+            "select": {"id": "mood", "name": rng.choice(_MOODS), "color": "green"},
+        },
+        "関連ページ": {
+            "id": "r0",
+            "type": "relation",
+            "relation": [{"id": f"related-{rng.randrange(1000):04d}"}],
+            "has_more": False,
+        },
+        "作成日時": {
+            "id": "c0",
+            "type": "created_time",
+            "created_time": f"{target_month}-{day:02d}T12:00:00.000Z",
+        },
+    }
+
+
+# --- Supabase (PostgREST) ---
+
+_FILTER_OPS: dict[str, Callable[[object, str], bool]] = {
+    "eq": lambda v, arg: _text(v) == arg,
+    "neq": lambda v, arg: _text(v) != arg,
+    "gt": lambda v, arg: _number(v) > _number(arg),
+    "gte": lambda v, arg: _number(v) >= _number(arg),
+    "lt": lambda v, arg: _number(v) < _number(arg),
+    "lte": lambda v, arg: _number(v) <= _number(arg),
+    "in": lambda v, arg: _text(v) in _parse_list(arg),
+    "like": lambda v, arg: _like(v, arg, 0),
+    "ilike": lambda v, arg: _like(v, arg, re.IGNORECASE),
+    "is": lambda v, arg: _text(v) == arg,
+}
+_RESERVED_PARAMS = {"select", "order", "limit", "offset", "on_conflict", "columns"}
+
+
+def _text(value: object) -> str:
+    if value is None:
+        return "null"
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return str(value)
+
+
+def _number(value: object) -> float | str:
+    try:
+        return float(str(value))
+    except ValueError:
+        return str(value)
+
+
+def _sort_key(value: object) -> tuple[bool, object]:
+    # NULL は最後に並べる（NULL 同士は比較しない）
+    return (value is None, 0 if value is None else value)
+
+
+def _parse_list(arg: str) -> set[str]:
+    return {item.strip().strip('"') for item in arg.strip("()").split(",")}
+
+
+def _like(value: object, pattern: str, flags: int) -> bool:
+    regex = ".*".join(re.escape(part) for part in re.split(r"[%*]", pattern))
+    return re.fullmatch(regex, _text(value), flags | re.DOTALL) is not None
+
+
+class FakeSupabaseServer(_FakeServer):
+    """PostgREST の主要な操作をメモリ上のテーブルで模したサーバー."""
+
+    def __init__(self, faults: FaultConfig | None = None):
+        super().__init__(self._handle, faults or FaultConfig())
+        self.tables: dict[str, list[dict[str, object]]] = {}
+        self._lock = threading.Lock()
+        self._next_id = 1
+
+    def seed(self, table: str, rows: list[dict[str, object]]) -> None:
+        """テーブルに行を追加する（id が無ければ採番する）."""
+        with self._lock:
+            self._insert(table, rows, on_conflict=None)
+
+    def _handle(self, req: _Handler) -> None:
+        match = re.fullmatch(r"/rest/v1/([^/]+)", req.path_only)
+        if match is None:
+            req.send_json(404, {"message": "not found"})
+            return
+        table = match.group(1)
+        params = req.query
+        prefer = req.headers.get("Prefer", "")
+        wants_rows = "return=representation" in prefer
+
+        with self._lock:
+            rows = self.tables.setdefault(table, [])
+            if req.command == "GET":
+                self._select(req, rows, params, prefer)
+                return
+
+            if req.command == "POST":
+                body = req.body
+                new_rows = body if isinstance(body, list) else [body]
+                on_conflict = None
+                if "resolution=merge-duplicates" in prefer:
+                    on_conflict = dict(params).get("on_conflict", "id").split(",")
+                changed = self._insert(table, new_rows, on_conflict)
+                req.send_json(201, changed if wants_rows else None)
+                return
+
+            matched = [row for row in rows if self._matches(row, params)]
+            if req.command == "PATCH":
+                changes = req.body
+                for row in matched:
+                    row.update(changes if isinstance(changes, dict) else {})
+            elif req.command == "DELETE":
+                ids = {id(row) for row in matched}
+                rows[:] = [row for row in rows if id(row) not in ids]
+            req.send_json(200, matched if wants_rows else None)
+
+    def _select(
+        self,
+        req: _Handler,
+        rows: list[dict[str, object]],
+        params: list[tuple[str, str]],
+        prefer: str,
+    ) -> None:
+        matched = [row for row in rows if self._matches(row, params)]
+        options = dict(params)
+
+        for term in reversed(options.get("order", "").split(",")):
+            if not term:
+                continue
+            column, _, direction = term.partition(".")
+            matched.sort(key=lambda row: _sort_key(row.get(column)))
+            if direction.startswith("desc"):
+                matched.reverse()
+
+        total = len(matched)
+        start = int(options.get("offset", 0))
+        end: int | None = None
+        if "limit" in options:
+            end = start + int(options["limit"])
+        range_header = req.headers.get("Range")
+        if range_header:
+            first, _, last = range_header.partition("-")
+            start, end = int(first), int(last) + 1
+        matched = matched[start:end]
+
+        columns = [c.strip() for c in options.get("select", "*").split(",")]
+        if "*" not in columns:
+            matched = [{c: row.get(c) for c in columns} for row in matched]
+
+        headers = {}
+        if "count=exact" in prefer:
+            last_index = start + len(matched) - 1
+            shown = f"{start}-{last_index}" if matched else "*"
+            headers["Content-Range"] = f"{shown}/{total}"
+        req.send_json(200, matched, headers)
+
+    def _matches(self, row: dict[str, object], params: list[tuple[str, str]]) -> bool:
+        for column, expr in params:
+            if column in _RESERVED_PARAMS:
+                continue
+            negate = expr.startswith("not.")
+            op, _, arg = expr.removeprefix("not.").partition(".")
+            check = _FILTER_OPS.get(op)
+            if check is None:
+                continue
+            if check(row.get(column), arg) == negate:
+                return False
+        return True
+
+    def _insert(
+        self,
+        table: str,
+        new_rows: list[dict[str, object]],
+        on_conflict: list[str] | None,
+    ) -> list[dict[str, object]]:
+        rows = self.tables.setdefault(table, [])
+        changed = []
+        for new_row in new_rows:
+            existing = None
+            if on_conflict:
+                existing = next(
+                    (
+                        row
+                        for row in rows
+                        if all(row.get(c) == new_row.get(c) for c in on_conflict)
+                    ),
+                    None,
+                )
+            if existing is not None:
+                existing.update(new_row)
+                changed.append(existing)
+                continue
+            row = dict(new_row)
+            if "id" not in row:
+                row["id"] = self._next_id
+                self._next_id += 1
+            rows.append(row)
+            changed.append(row)
+        return changed
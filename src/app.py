@@ -3,18 +3,30 @@
 import datetime
 import io
 from collections import Counter
-from typing import cast
+from collections.abc import Callable
+from itertools import count
+from typing import TYPE_CHECKING, cast
 
 import pytz
 import streamlit as st
 
 from src.core import generate_bar_chart, run_keyword_extraction
+from src.core.textrank import RANKER_FREQUENCY, RANKER_LABELS, RANKER_VALUE_LABELS
+from src.core.warmup import start_warmup
 from src.services import require_login, show_login
+from src.services.keyword_index import get_keyword_index, notion_page_url
 from src.services.supabase_client import get_supabase_client
 
+if TYPE_CHECKING:
+    from streamlit.delta_generator import DeltaGenerator
 
-def save_analysis_to_supabase(word_count, supabase, user_id, top_n=5):
-    """解析結果をSupabaseに保存する（既存データは削除）."""
+    from src.core.keyword_extraction import ExtractionProgress
+
+
+def save_analysis_to_supabase(
+    word_count, supabase, user_id, top_n=5, ranker=RANKER_FREQUENCY
+):
+    """解析結果を順位付けの方法とともにSupabaseに保存する（既存データは削除）."""
     supabase.table("analysis_result").delete().eq("user_id", user_id).execute()
 
     data = [
@@ -22,6 +34,7 @@ def save_analysis_to_supabase(word_count, supabase, user_id, top_n=5):
             "user_id": user_id,
             "word": word,
             "count": count,
+            "ranker": ranker,
         }
         for word, count in word_count.most_common(top_n)
     ]
@@ -30,10 +43,10 @@ def save_analysis_to_supabase(word_count, supabase, user_id, top_n=5):
 
 
 def load_last_analysis(supabase, user_id):
-    """最新の解析結果をSupabaseから取得する."""
+    """最新の解析結果と更新日時、順位付けの方法をSupabaseから取得する."""
     response = (
         supabase.table("analysis_result")
-        .select("word, count, updated_at")
+        .select("word, count, ranker, updated_at")
         .eq("user_id", user_id)
         .order("updated_at", desc=True)
         .limit(5)
@@ -42,8 +55,12 @@ def load_last_analysis(supabase, user_id):
     if response.data:
         last_updated = response.data[0].get("updated_at", None)
         word_counts = Counter({item["word"]: item["count"] for item in response.data})
-        return word_counts, last_updated
-    return None, None
+        # ranker 列の無い古い結果は出現回数の順位とみなす
+        ranker = response.data[0].get("ranker") or RANKER_FREQUENCY
+        if ranker not in RANKER_LABELS:
+            ranker = RANKER_FREQUENCY
+        return word_counts, last_updated, ranker
+    return None, None, RANKER_FREQUENCY
 
 
 def format_jst_datetime(dt_str):
@@ -67,6 +84,31 @@ def get_month_options() -> list[str]:
     return options
 
 
+def progress_renderer(
+    chart_slot: "DeltaGenerator", list_slot: "DeltaGenerator", month: str
+) -> Callable[["ExtractionProgress"], None]:
+    """解析の途中経過でグラフと上位の一覧をその場で描き替える関数を返す."""
+    renders = count()
+
+    def render(progress: "ExtractionProgress") -> None:
+        fig = generate_bar_chart(progress.word_count, target_month=month)
+        chart_slot.plotly_chart(
+            fig, use_container_width=True, key=f"progress_chart_{next(renders)}"
+        )
+        lines = [
+            f"{rank}. {word}（{n}回）"
+            for rank, (word, n) in enumerate(progress.word_count.most_common(5), 1)
+        ]
+        list_slot.markdown(
+            "\n".join([f"**解析中: {progress.analysed}件まで集計**", "", *lines])
+        )
+
+    return render
+
+
+# `streamlit run` で直接起動された場合もウォームアップを開始する（多重起動はしない）
+start_warmup()
+
 # --- 1. ログインガード ---
 if "user" not in st.session_state:
     show_login()
@@ -82,10 +124,11 @@ user_id = st.session_state.user.id
 
 # 前回の解析結果をセッションに読み込む
 if "word_count" not in st.session_state:
-    last_word_count, last_updated = load_last_analysis(supabase, user_id)
+    last_word_count, last_updated, last_ranker = load_last_analysis(supabase, user_id)
     if last_word_count:
         st.session_state["word_count"] = last_word_count
         st.session_state["last_updated"] = last_updated
+        st.session_state["last_ranker"] = last_ranker
     else:
         st.session_state["last_updated"] = None
 
@@ -93,22 +136,41 @@ if "word_count" not in st.session_state:
 st.subheader("解析設定")
 month_options = get_month_options()
 selected_month = st.selectbox("解析対象月を選択してください", options=month_options)
+selected_ranker = st.radio(
+    "順位付けの方法",
+    options=list(RANKER_LABELS),
+    format_func=RANKER_LABELS.__getitem__,
+    horizontal=True,
+    help="TextRank は、多くの語と同じ日に書かれた語（話題の中心の語）を上位にします。",
+)
 
 is_running = st.session_state.get("running", False)
 
 if st.button(f"{selected_month} の解析開始", disabled=is_running):
+    # 解析中はここに途中経過を表示し、完了したら下の結果表示に切り替える
+    progress_chart = st.empty()
+    progress_list = st.empty()
     try:
         st.session_state.running = True
         with st.spinner(f"{selected_month} のデータを取得・解析中..."):
-            word_count = run_keyword_extraction(target_month=selected_month)
+            word_count = run_keyword_extraction(
+                target_month=selected_month,
+                on_progress=progress_renderer(
+                    progress_chart, progress_list, selected_month
+                ),
+                ranker=selected_ranker,
+            )
             st.session_state["word_count"] = word_count
             st.session_state["last_selected_month"] = selected_month
+            st.session_state["last_ranker"] = selected_ranker
 
             # Supabaseに保存
-            save_analysis_to_supabase(word_count, supabase, user_id, top_n=5)
+            save_analysis_to_supabase(
+                word_count, supabase, user_id, top_n=5, ranker=selected_ranker
+            )
 
             # 最新日時を取得し直し
-            _, last_updated = load_last_analysis(supabase, user_id)
+            _, last_updated, _ = load_last_analysis(supabase, user_id)
             st.session_state["last_updated"] = last_updated
 
         st.success(f"{selected_month} の解析が完了しました！")
@@ -116,6 +178,8 @@ if st.button(f"{selected_month} の解析開始", disabled=is_running):
         st.error(f"解析中にエラーが発生しました: {e}")
     finally:
         st.session_state.running = False
+        progress_chart.empty()
+        progress_list.empty()
 
 st.divider()
 
@@ -123,11 +187,16 @@ st.divider()
 if "word_count" in st.session_state:
     word_count = cast(Counter[str], st.session_state["word_count"])
     display_month = st.session_state.get("last_selected_month", selected_month)
+    display_ranker = st.session_state.get("last_ranker", RANKER_FREQUENCY)
 
-    st.subheader(f"解析結果: {display_month}")
+    st.subheader(f"解析結果: {display_month}（{RANKER_LABELS[display_ranker]}）")
 
     # グラフ生成
-    fig = generate_bar_chart(word_count, target_month=display_month)
+    fig = generate_bar_chart(
+        word_count,
+        target_month=display_month,
+        value_label=RANKER_VALUE_LABELS[display_ranker],
+    )
     st.plotly_chart(fig, use_container_width=True)
 
     # ダウンロードと最終更新日時
@@ -145,3 +214,21 @@ if "word_count" in st.session_state:
         if st.session_state.get("last_updated"):
             formatted_date = format_jst_datetime(st.session_state["last_updated"])
             st.write(f"最終解析日時: {formatted_date}")
+
+    # キーワード → 元のエントリへのドリルダウン
+    with st.expander("キーワードを含むエントリを見る"):
+        top_words = [word for word, _ in word_count.most_common(5)]
+        selected_word = st.selectbox("キーワード", options=top_words)
+        hits = (
+            get_keyword_index().lookup(user_id, selected_word, display_month)
+            if selected_word
+            else []
+        )
+        if not hits:
+            st.write("この月の解析を実行すると、元のエントリを表示できます。")
+        for hit in hits:
+            date_label = hit["date"][:10] if hit["date"] else "日付なし"
+            st.markdown(
+                f"- [{date_label}]({notion_page_url(hit['page_id'])})"
+                f"（{hit['count']}回）"
+            )
@@ -1,17 +1,51 @@
-"""各種バックエンド処理を行うためのパッケージ."""
+"""各種バックエンド処理を行うためのパッケージ.
 
-from src.core.csv_to_dic import (
-    build_user_dic_from_csv_data,
-    build_user_dic_from_local_file,
-)
-from src.core.keyword_extraction import run_keyword_extraction
-from src.core.plot import generate_bar_chart
-from src.core.word_analyser import analyse_word
+pandas / plotly / MeCab / streamlit などの重い依存は、属性へ最初に
+アクセスしたときに初めて読み込まれる（PEP 562 の遅延インポート）。
+"""
+
+import importlib
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from src.core.csv_to_dic import (
+        build_user_dic_from_csv_data,
+        build_user_dic_from_entries,
+        build_user_dic_from_local_file,
+    )
+    from src.core.keyword_extraction import run_keyword_extraction
+    from src.core.plot import generate_bar_chart
+    from src.core.word_analyser import analyse_word
+
+# 公開名 → 定義モジュール
+_LAZY_ATTRS: dict[str, str] = {
+    "run_keyword_extraction": "src.core.keyword_extraction",
+    "generate_bar_chart": "src.core.plot",
+    "build_user_dic_from_csv_data": "src.core.csv_to_dic",
+    "build_user_dic_from_entries": "src.core.csv_to_dic",
+    "build_user_dic_from_local_file": "src.core.csv_to_dic",
+    "analyse_word": "src.core.word_analyser",
+}
 
 __all__ = [
     "run_keyword_extraction",
     "generate_bar_chart",
     "build_user_dic_from_csv_data",
+    "build_user_dic_from_entries",
     "build_user_dic_from_local_file",
     "analyse_word",
 ]
+
+
+def __getattr__(name: str) -> Any:
+    """公開名へのアクセス時に定義モジュールを読み込む."""
+    module_name = _LAZY_ATTRS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name), name)
+    globals()[name] = value  # 2回目以降は通常の属性参照で解決させる
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted(list(globals()) + __all__)
@@ -0,0 +1,153 @@
+"""名詞の共起行列を構築・保存し、関連キーワードを引くためのモジュール.
+
+エントリ（1日分の「良かったこと」）ごとの名詞列から、同じエントリ内
+（または指定した窓幅内）で共に現れた名詞の組を数え、CSR 形式の疎行列として
+月ごとに `.npz` へ保存する。問い合わせは保存済み行列の1行を読むだけなので、
+Notion や MeCab には触れない。
+"""
+
+import os
+from array import array
+from collections.abc import Iterable, Sequence
+from dataclasses import dataclass, field
+from functools import lru_cache
+
+import numpy as np
+import numpy.typing as npt
+
+# 共起行列の保存先（<base_dir>/cooccurrence/<user_id>/<YYYY-MM>.npz）
+COOCCURRENCE_DIR = "cooccurrence"
+
+
+@dataclass
+class CooccurrenceMatrix:
+    """名詞ID × 名詞ID の対称な共起回数行列（CSR 形式）."""
+
+    vocab: list[str]
+    indptr: npt.NDArray[np.int64]
+    indices: npt.NDArray[np.int32]
+    data: npt.NDArray[np.int32]
+    _index: dict[str, int] = field(default_factory=dict, init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        self._index = {word: i for i, word in enumerate(self.vocab)}
+
+    def related(self, term: str, top_k: int = 10) -> list[tuple[str, int]]:
+        """term と共起した回数の多い名詞を、回数の降順で最大 top_k 件返す."""
+        row = self._index.get(term)
+        if row is None or top_k <= 0:
+            return []
+
+        start, end = self.indptr[row], self.indptr[row + 1]
+        cols = self.indices[start:end]
+        counts = self.data[start:end]
+        if len(counts) > top_k:
+            top = np.argpartition(counts, -top_k)[-top_k:]
+            cols, counts = cols[top], counts[top]
+
+        # 回数の降順、同数なら語彙順で安定させる
+        order = np.lexsort((cols, -counts))
+        return [(self.vocab[cols[i]], int(counts[i])) for i in order]
+
+    def save(self, path: str) -> None:
+        """圧縮した .npz として保存する."""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        np.savez_compressed(
+            path,
+            vocab=np.array(self.vocab, dtype=np.str_),
+            indptr=self.indptr,
+            indices=self.indices,
+            data=self.data,
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "CooccurrenceMatrix":
+        """save() で保存した .npz を読み込む."""
+        with np.load(path, allow_pickle=False) as npz:
+            return cls(
+                vocab=npz["vocab"].tolist(),
+                indptr=npz["indptr"],
+                indices=npz["indices"],
+                data=npz["data"],
+            )
+
+
+def build_cooccurrence(
+    documents: Iterable[Sequence[str]], window: int | None = None
+) -> CooccurrenceMatrix:
+    """エントリごとの名詞列から共起行列を構築する.
+
+    Args:
+        documents: エントリごとの、出現順に並んだ名詞列。
+        window: None ならエントリ単位（同じエントリに現れた異なる名詞の組を
+            エントリごとに1回数える）。整数なら、その距離以内に並んだ異なる
+            名詞の組を出現ごとに数える。
+
+    Returns:
+        CooccurrenceMatrix: 対称な共起行列。
+    """
+    index: dict[str, int] = {}
+    rows = array("i")
+    cols = array("i")
+
+    for nouns in documents:
+        ids = [index.setdefault(word, len(index)) for word in nouns]
+        if window is None:
+            unique_ids = sorted(set(ids))
+            for i, a in enumerate(unique_ids):
+                for b in unique_ids[i + 1 :]:
+                    rows.append(a)
+                    cols.append(b)
+        else:
+            for i, a in enumerate(ids):
+                for b in ids[i + 1 : i + 1 + window]:
+                    if a != b:
+                        rows.append(a)
+                        cols.append(b)
+
+    vocab = list(index)
+    n = len(vocab)
+    row_arr = np.frombuffer(rows, dtype=np.int32).astype(np.int64)
+    col_arr = np.frombuffer(cols, dtype=np.int32).astype(np.int64)
+
+    # 対称化してから (行, 列) のキーで集計する
+    keys = np.concatenate([row_arr * n + col_arr, col_arr * n + row_arr])
+    unique_keys, counts = np.unique(keys, return_counts=True)
+    key_rows = unique_keys // max(n, 1)
+
+    indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(key_rows, minlength=n), out=indptr[1:])
+
+    return CooccurrenceMatrix(
+        vocab=vocab,
+        indptr=indptr,
+        indices=(unique_keys % max(n, 1)).astype(np.int32),
+        data=counts.astype(np.int32),
+    )
+
+
+def cooccurrence_path(user_id: str, target_month: str, base_dir: str = "output") -> str:
+    """ユーザー・月ごとの共起行列の保存先パスを返す."""
+    return os.path.join(base_dir, COOCCURRENCE_DIR, user_id, f"{target_month}.npz")
+
+
+def related_keywords(
+    user_id: str,
+    target_month: str,
+    term: str,
+    top_k: int = 10,
+    base_dir: str = "output",
+) -> list[tuple[str, int]]:
+    """保存済みの共起行列から term の関連キーワードを返す（無ければ空リスト）."""
+    path = cooccurrence_path(user_id, target_month, base_dir)
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return []
+    return _load_cached(path, mtime).related(term, top_k)
+
+
+@lru_cache(maxsize=32)
+def _load_cached(path: str, mtime: float) -> CooccurrenceMatrix:
+    """ファイルの更新時刻込みでキャッシュし、再保存されたら読み直す."""
+    return CooccurrenceMatrix.load(path)
@@ -1,39 +1,223 @@
-"""CSVファイルをMeCabの辞書形式に変換するためのモジュール."""
+"""CSVファイルをMeCabの辞書形式に変換するためのモジュール.
+
+辞書エントリ（単語, 品詞, 読み, 発音）はジェネレータで1行ずつ検証・重複排除し、
+正しくエスケープしたMeCab用CSVとして一度だけ書き出す。
+"""
 
 import csv
+import hashlib
+import io
 import logging
 import os
+import shutil
 import subprocess
 import tempfile
+from collections.abc import Iterable, Iterator, Sequence
+from itertools import islice
+from typing import Protocol, TextIO
 
+from src.core.normalizer import normalize_fields
 from src.logs.logger import KELogger
 
 # 内部的な詳細ログ用
 _log = logging.getLogger("keyword_logger")
 
+# 内容ハッシュごとにビルド済み辞書を置くディレクトリ
+USER_DIC_CACHE_DIR = os.path.join(tempfile.gettempdir(), "ke_user_dic")
+# 残しておくビルド済み辞書の数（使われていない古いものから削除する）
+USER_DIC_CACHE_KEEP = 64
+# 内容ハッシュのディレクトリ名の長さ
+_HASH_DIR_LENGTH = 16
 
-def build_user_dic_from_csv_data(csv_data: str, dic_dir: str) -> str:
-    """本番用: Supabaseから取得したCSVデータからMeCab辞書を生成する."""
-    tmpdir = tempfile.mkdtemp()  # 削除されない一時ディレクトリ
-    input_csv_path = os.path.join(tmpdir, "user_entry.csv")
-    output_csv_path = os.path.join(tmpdir, "user.csv")
-    user_dic_path = os.path.join(tmpdir, "user.dic")
+# 1エントリの列数（単語, 品詞, 読み, 発音）
+ENTRY_FIELDS = 4
+# MeCab用CSVを書き出すときに1回でまとめる行数
+WRITE_BATCH_ROWS = 1000
 
-    # CSV文字列を書き出す
-    with open(input_csv_path, "w", encoding="utf-8") as f:
-        f.write(csv_data)
 
-    # CSV → MeCab用CSVに変換（ヘッダーなし）
-    _csv_to_dic(input_csv_path, output_csv_path, has_header=False)
+class SupportsWrite(Protocol):
+    """csv.writer に渡せる書き込み先の最小要件."""
+
+    def write(self, s: str, /) -> int: ...
+
+
+class _HashingWriter:
+    """書き込んだ内容のハッシュを取りながらファイルへ書き出す薄いラッパー."""
+
+    def __init__(self, f: TextIO, digest: "hashlib._Hash"):
+        self._f = f
+        self._digest = digest
+
+    def write(self, s: str) -> int:
+        self._digest.update(s.encode("utf-8"))
+        return self._f.write(s)
+
+
+def iter_dic_entries(
+    rows: Iterable[Sequence[str]],
+) -> Iterator[tuple[str, str, str, str]]:
+    """辞書エントリを1行ずつ検証し、正規化・重複排除して返す.
+
+    各列は本文と同じ規則（`normalize_word`）で正規化する。
+    列数が合わない行・空欄のある行・改行を含む行は警告を出して読み飛ばす。
+    (単語, 読み) が既出の行は重複として捨てる。
+    """
+    seen: set[tuple[str, str]] = set()
+    for line_no, row in enumerate(rows, start=1):
+        if len(row) != ENTRY_FIELDS:
+            _log.warning(f"辞書エントリの列数が不正です ({line_no}行目): {row}")
+            continue
+
+        text = "".join(row)
+        if "\n" in text or "\r" in text:
+            _log.warning(f"辞書エントリに改行が含まれています ({line_no}行目): {row}")
+            continue
+
+        # 4列をまとめて1回で正規化する（列ごとに normalize_word を呼ぶと遅い）
+        word, part_of_speech, reading, pronunciation = normalize_fields(row)
+        if not (word and part_of_speech and reading and pronunciation):
+            _log.warning(f"辞書エントリに不正な値があります ({line_no}行目): {row}")
+            continue
+
+        key = (word, reading)
+        if key in seen:
+            continue
+        seen.add(key)
+        yield (word, part_of_speech, reading, pronunciation)
+
+
+def iter_mecab_rows(
+    entries: Iterable[tuple[str, str, str, str]],
+) -> Iterator[list[str]]:
+    """辞書エントリをMeCabのユーザー辞書ソース形式の行に変換する."""
+    for word, part_of_speech, reading, pronunciation in entries:
+        # 表層形,左文脈ID,右文脈ID,コスト,品詞...,原形,読み,発音
+        yield [
+            word,
+            "0",
+            "0",
+            "0",
+            part_of_speech,
+            "*",
+            part_of_speech,
+            "*",
+            "*",
+            "*",
+            reading,
+            pronunciation,
+            pronunciation,
+        ]
+
+
+def write_mecab_csv(rows: Iterable[Sequence[str]], out: SupportsWrite) -> int:
+    """エントリを検証しながらMeCab用CSVとして書き出し、書いた行数を返す.
+
+    カンマや引用符を含む単語は csv モジュールで引用符付きにエスケープされる。
+    行は WRITE_BATCH_ROWS 行ずつ文字列にまとめてから out へ渡す
+    （書き込み先がハッシュを取るラッパーでも、呼び出しはバッチごとの1回で済む）。
+    """
+    mecab_rows = iter_mecab_rows(iter_dic_entries(rows))
+    count = 0
+    while batch := list(islice(mecab_rows, WRITE_BATCH_ROWS)):
+        buffer = io.StringIO()
+        csv.writer(buffer, lineterminator="\n").writerows(batch)
+        out.write(buffer.getvalue())
+        count += len(batch)
+    return count
 
-    # MeCab辞書をビルド
-    _build_mecab_dict(dic_dir, output_csv_path, tmpdir)
 
-    # 存在確認
-    if not os.path.exists(user_dic_path):
-        raise FileNotFoundError(f"辞書ファイルが見つかりません: {user_dic_path}")
+def build_user_dic_from_entries(rows: Iterable[Sequence[str]], dic_dir: str) -> str:
+    """辞書エントリの行から直接MeCab辞書を生成し、そのパスを返す.
 
-    return user_dic_path
+    行はストリームのままMeCab用CSVへ一度だけ書き出し、同時に内容ハッシュを取る。
+    同じ内容の辞書がビルド済みであれば mecab-dict-index は実行せずにそのパスを
+    返す。パスが内容に対して一意なので、Tagger のキャッシュもそのまま再利用される。
+    ビルド済み辞書は最近使った USER_DIC_CACHE_KEEP 件だけを残す。
+
+    有効な行が1件も無ければビルドせず、空文字列（ユーザー辞書なし）を返す。
+    """
+    os.makedirs(USER_DIC_CACHE_DIR, exist_ok=True)
+    tmpdir = tempfile.mkdtemp(dir=USER_DIC_CACHE_DIR)
+    try:
+        source_csv_path = os.path.join(tmpdir, "user.csv")
+        digest = hashlib.sha256(f"{dic_dir}\n".encode("utf-8"))
+        with open(source_csv_path, "w", encoding="utf-8") as f:
+            count = write_mecab_csv(rows, _HashingWriter(f, digest))
+        _log.debug(f"MeCab用CSVを書き出しました (件数: {count})")
+        if count == 0:
+            _log.warning("有効な辞書エントリが無いため、ユーザー辞書を使いません")
+            return ""
+
+        cached_path = os.path.join(
+            USER_DIC_CACHE_DIR, digest.hexdigest()[:_HASH_DIR_LENGTH], "user.dic"
+        )
+        if os.path.exists(cached_path):
+            _log.debug("ビルド済みのユーザー辞書を再利用します: %s", cached_path)
+            # 最近使った辞書として残るよう、更新時刻を進める
+            os.utime(os.path.dirname(cached_path))
+            return cached_path
+
+        # MeCab辞書をビルド
+        _build_mecab_dict(dic_dir, source_csv_path, tmpdir)
+
+        # 存在確認
+        user_dic_path = os.path.join(tmpdir, "user.dic")
+        if not os.path.exists(user_dic_path):
+            raise FileNotFoundError(f"辞書ファイルが見つかりません: {user_dic_path}")
+
+        # 並行ビルドと衝突しないよう、完成した辞書だけをアトミックに配置する
+        os.makedirs(os.path.dirname(cached_path), exist_ok=True)
+        os.replace(user_dic_path, cached_path)
+        prune_user_dic_cache(keep_path=cached_path)
+        return cached_path
+    finally:
+        shutil.rmtree(tmpdir, ignore_errors=True)
+
+
+def prune_user_dic_cache(
+    keep: int | None = None, keep_path: str | None = None
+) -> list[str]:
+    """ビルド済み辞書のうち、最近使った keep 件より古いものを削除する.
+
+    keep を省くと USER_DIC_CACHE_KEEP 件残す。keep_path（いま返す辞書）は
+    件数に関わらず残す。読み込み済みの Tagger は辞書をメモリに載せているので、
+    ファイルを消しても使い続けられる。
+
+    Returns:
+        list[str]: 削除したディレクトリ。
+    """
+    if keep is None:
+        keep = USER_DIC_CACHE_KEEP
+    keep_dir = os.path.dirname(keep_path) if keep_path else None
+    try:
+        names = os.listdir(USER_DIC_CACHE_DIR)
+    except FileNotFoundError:
+        return []
+
+    dirs: list[tuple[float, str]] = []
+    for name in names:
+        # 作業中の一時ディレクトリ（mkdtemp）は対象外
+        path = os.path.join(USER_DIC_CACHE_DIR, name)
+        if len(name) != _HASH_DIR_LENGTH or path == keep_dir:
+            continue
+        try:
+            dirs.append((os.stat(path).st_mtime, path))
+        except FileNotFoundError:
+            continue
+
+    dirs.sort(reverse=True)
+    # keep_path の分も件数に含める
+    stale = [path for _, path in dirs[max(keep - (keep_dir is not None), 0) :]]
+    for path in stale:
+        shutil.rmtree(path, ignore_errors=True)
+    if stale:
+        _log.debug(f"古いユーザー辞書を削除しました: {len(stale)}件")
+    return stale
+
+
+def build_user_dic_from_csv_data(csv_data: str, dic_dir: str) -> str:
+    """本番用: CSV文字列（ヘッダーなし）からMeCab辞書を生成する."""
+    return build_user_dic_from_entries(csv.reader(io.StringIO(csv_data)), dic_dir)
 
 
 def build_user_dic_from_local_file(entry_csv_path: str, dic_dir: str, output_dir: str):
@@ -49,19 +233,13 @@ def build_user_dic_from_local_file(entry_csv_path: str, dic_dir: str, output_dir
 
 def _csv_to_dic(input_csv: str, output_csv: str, has_header: bool = True):
     """MeCab形式のCSVファイルを生成する."""
-    with open(input_csv, "r", encoding="utf-8") as infile:
+    with open(input_csv, "r", encoding="utf-8", newline="") as infile:
         csvreader = csv.reader(infile)
         if has_header:
-            next(csvreader)  # ヘッダーをスキップ
+            next(csvreader, None)  # ヘッダーをスキップ
 
         with open(output_csv, "w", encoding="utf-8") as outfile:
-            for row in csvreader:
-                word, part_of_speech, reading, pronunciation = row
-                dic_line = (
-                    f"{word},0,0,0,{part_of_speech},*,{part_of_speech},*,*,*,"
-                    f"{reading},{pronunciation},{pronunciation}\n"
-                )
-                outfile.write(dic_line)
+            write_mecab_csv(csvreader, outfile)
 
 
 def _build_mecab_dict(dic_dir: str, csv_file: str, output_dir: str):
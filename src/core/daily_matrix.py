@@ -0,0 +1,193 @@
+"""日付 × キーワードの出現回数行列を構築・保存するモジュール.
+
+形態素解析で得たエントリごとの名詞列を、エントリの日付ごとに数えて
+CSR 形式の疎行列にする（解析のやり直しは不要）。行は開始日から1日ずつ連続する
+日付なので、カレンダーのヒートマップ・曜日ごとの傾向・任意の期間の集計を
+配列演算で切り出せる。月ごとに `.npz` へ保存する。
+"""
+
+import datetime
+import logging
+import os
+from array import array
+from collections import Counter
+from collections.abc import Iterable, Sequence
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING
+
+import numpy as np
+import numpy.typing as npt
+
+if TYPE_CHECKING:
+    from src.services.notion_handler import GoodThingsEntry
+
+_log = logging.getLogger("keyword_logger")
+
+# 日別行列の保存先（<base_dir>/daily_keywords/<user_id>/<YYYY-MM>.npz）
+DAILY_MATRIX_DIR = "daily_keywords"
+
+
+@dataclass
+class DailyKeywordMatrix:
+    """日付 × 名詞ID の出現回数行列（CSR 形式）.
+
+    行 i は `start + i 日` に対応する。記録の無い日は空の行になる。
+    """
+
+    start: datetime.date
+    vocab: list[str]
+    indptr: npt.NDArray[np.int64]
+    indices: npt.NDArray[np.int32]
+    data: npt.NDArray[np.int32]
+    _index: dict[str, int] = field(default_factory=dict, init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        self._index = {word: i for i, word in enumerate(self.vocab)}
+
+    @property
+    def n_days(self) -> int:
+        return len(self.indptr) - 1
+
+    @property
+    def dates(self) -> list[datetime.date]:
+        """各行に対応する日付."""
+        return [self.start + datetime.timedelta(days=i) for i in range(self.n_days)]
+
+    def _row(self, day: datetime.date) -> int:
+        return min(max((day - self.start).days, 0), self.n_days)
+
+    def to_dense(self) -> npt.NDArray[np.int32]:
+        """(日数, 語彙数) の密な配列を返す（ヒートマップ描画用）."""
+        dense = np.zeros((self.n_days, len(self.vocab)), dtype=np.int32)
+        dense[self._row_ids(), self.indices] = self.data
+        return dense
+
+    def word_counts(
+        self,
+        start: datetime.date | None = None,
+        end: datetime.date | None = None,
+    ) -> Counter[str]:
+        """start〜end（両端を含む）の期間の出現回数を集計する."""
+        first = 0 if start is None else self._row(start)
+        next_day = None if end is None else end + datetime.timedelta(days=1)
+        last = self.n_days if next_day is None else self._row(next_day)
+        lo, hi = self.indptr[first], self.indptr[last]
+        totals = np.bincount(
+            self.indices[lo:hi], weights=self.data[lo:hi], minlength=len(self.vocab)
+        )
+        return Counter({self.vocab[i]: int(totals[i]) for i in np.flatnonzero(totals)})
+
+    def series(self, word: str) -> npt.NDArray[np.int32]:
+        """word の日ごとの出現回数（長さ n_days）を返す."""
+        counts = np.zeros(self.n_days, dtype=np.int32)
+        col = self._index.get(word)
+        if col is not None:
+            hit = self.indices == col
+            counts[self._row_ids()[hit]] = self.data[hit]
+        return counts
+
+    def weekday_totals(self, word: str | None = None) -> npt.NDArray[np.int64]:
+        """曜日（月曜 = 0）ごとの出現回数を返す（word を省略すると全名詞の合計）."""
+        rows = self._row_ids()
+        weights = self.data
+        if word is not None:
+            hit = self.indices == self._index.get(word, -1)
+            rows, weights = rows[hit], weights[hit]
+        weekdays = (rows + self.start.weekday()) % 7
+        return np.bincount(weekdays, weights=weights, minlength=7).astype(np.int64)
+
+    def _row_ids(self) -> npt.NDArray[np.int64]:
+        return np.repeat(np.arange(self.n_days, dtype=np.int64), np.diff(self.indptr))
+
+    def save(self, path: str) -> None:
+        """圧縮した .npz として保存する."""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        np.savez_compressed(
+            path,
+            start=np.array(self.start.isoformat(), dtype=np.str_),
+            vocab=np.array(self.vocab, dtype=np.str_),
+            indptr=self.indptr,
+            indices=self.indices,
+            data=self.data,
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "DailyKeywordMatrix":
+        """save() で保存した .npz を読み込む."""
+        with np.load(path, allow_pickle=False) as npz:
+            return cls(
+                start=datetime.date.fromisoformat(str(npz["start"])),
+                vocab=npz["vocab"].tolist(),
+                indptr=npz["indptr"],
+                indices=npz["indices"],
+                data=npz["data"],
+            )
+
+
+def build_daily_matrix(
+    target_month: str,
+    entries: Sequence["GoodThingsEntry"],
+    nouns_per_entry: Iterable[Sequence[str]],
+) -> DailyKeywordMatrix:
+    """エントリの日付と名詞列から日別の出現回数行列を構築する.
+
+    行は対象月の全日を含み、対象月の外の日付（最新モードで前月にかかる場合など）が
+    あればそこまで広げる。日付の無いエントリは数えない。
+    """
+    year, month = map(int, target_month.split("-"))
+    month_start = datetime.date(year, month, 1)
+    next_month = (month_start + datetime.timedelta(days=31)).replace(day=1)
+
+    days: list[datetime.date | None] = [_entry_date(e) for e in entries]
+    known = [d for d in days if d is not None]
+    start = min([month_start, *known])
+    end = max([next_month - datetime.timedelta(days=1), *known])
+    n_days = (end - start).days + 1
+
+    index: dict[str, int] = {}
+    rows = array("i")
+    cols = array("i")
+    skipped = 0
+    for day, nouns in zip(days, nouns_per_entry):
+        if day is None:
+            skipped += len(nouns)
+            continue
+        row = (day - start).days
+        for word in nouns:
+            rows.append(row)
+            cols.append(index.setdefault(word, len(index)))
+    if skipped:
+        _log.debug(f"日付の無いエントリの名詞 {skipped} 件を日別行列から除外しました")
+
+    vocab = list(index)
+    n = max(len(vocab), 1)
+    row_arr = np.frombuffer(rows, dtype=np.int32).astype(np.int64)
+    col_arr = np.frombuffer(cols, dtype=np.int32)
+    # (日, 名詞) のキーで集計する
+    unique_keys, counts = np.unique(row_arr * n + col_arr, return_counts=True)
+
+    indptr = np.zeros(n_days + 1, dtype=np.int64)
+    np.cumsum(np.bincount(unique_keys // n, minlength=n_days), out=indptr[1:])
+
+    return DailyKeywordMatrix(
+        start=start,
+        vocab=vocab,
+        indptr=indptr,
+        indices=(unique_keys % n).astype(np.int32),
+        data=counts.astype(np.int32),
+    )
+
+
+def _entry_date(entry: "GoodThingsEntry") -> datetime.date | None:
+    value = entry.get("date")
+    if not value:
+        return None
+    try:
+        return datetime.date.fromisoformat(value[:10])
+    except ValueError:
+        return None
+
+
+def daily_matrix_path(user_id: str, target_month: str, base_dir: str = "output") -> str:
+    """ユーザー・月ごとの日別行列の保存先パスを返す."""
+    return os.path.join(base_dir, DAILY_MATRIX_DIR, user_id, f"{target_month}.npz")
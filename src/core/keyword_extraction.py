@@ -1,28 +1,56 @@
 """キーワード抽出処理のメインモジュール."""
 
+import csv
 import logging
 import os
-import tempfile
+import sqlite3
+import time
 from collections import Counter
+from collections.abc import Callable, Iterable, Iterator
+from dataclasses import dataclass
 from datetime import datetime
-from typing import Protocol, TypedDict, cast
+from queue import Empty, SimpleQueue
+from typing import TYPE_CHECKING, Protocol, TypedDict, cast
 
 import MeCab
 import streamlit as st
 from dotenv import load_dotenv
 
+from src.core.cooccurrence import build_cooccurrence, cooccurrence_path
 from src.core.csv_to_dic import (
-    build_user_dic_from_csv_data,
+    build_user_dic_from_entries,
     build_user_dic_from_local_file,
+    iter_dic_entries,
 )
-from src.core.plot import generate_bar_chart
-from src.core.word_analyser import analyse_word
+from src.core.daily_matrix import build_daily_matrix, daily_matrix_path
+from src.core.normalizer import normalize_text, normalize_word
+from src.core.phrase_matcher import PhraseMatcher
+from src.core.pipeline import Stage, run_pipeline, waiting
+from src.core.pos_filter import PosFilter, pos_filter_from_env, read_pos_id_def
+from src.core.stop_rules import StopRules, compile_stop_rules
+from src.core.textrank import (
+    RANKER_FREQUENCY,
+    RANKER_LABELS,
+    RANKER_VALUE_LABELS,
+    rank_keywords,
+    ranker_from_env,
+)
+from src.core.token_store import TOKEN_STORE_ENV, dictionary_version, get_token_store
+from src.core.word_analyser import extract_nouns, extract_nouns_with_phrases
 from src.logs.logger import KELogger
 from src.services import (
-    fetch_good_things,
     get_supabase_client,
+    iter_good_things_entries,
+    refresh_keyword_trends,
+    save_monthly_keyword_counts,
     save_monthly_top_keywords,
 )
+from src.services.keyword_index import get_keyword_index
+from src.services.notion_cache import fetch_good_things_entries_cached
+from src.services.notion_handler import GoodThingsEntry
+
+if TYPE_CHECKING:
+    from supabase import Client
 
 
 # --- 型定義 ---
@@ -47,31 +75,207 @@ class UserLike(Protocol):
     id: str | int
 
 
+@dataclass(frozen=True)
+class ExtractionProgress:
+    """解析途中の集計（on_progress に渡す）."""
+
+    word_count: Counter[str]
+    analysed: int
+    """解析し終えたエントリ数."""
+
+
 # --- 定数 ---
 TOP_N = 5
+SYSTEM_DIC_DIR = "/usr/share/mecab/dic/ipadic"
+# 共起を数える範囲（None ならエントリ単位、整数なら名詞の窓幅）
+COOCCURRENCE_WINDOW: int | None = None
+# 途中経過を通知する最短の間隔（秒）
+PROGRESS_INTERVAL = 0.5
+# ユーザー辞書の適用方法:
+#   compiled: mecab-dict-index でビルドした辞書を Tagger に読み込む（既定）
+#   matcher: 登録語を Aho-Corasick で先に切り出し、残りをシステム辞書で解析する。
+#            辞書の編集がビルドなし・Tagger の作り直しなしで次の解析から反映される
+USER_DICT_MODE_ENV = "USER_DICT_MODE"
+USER_DICT_MODE_COMPILED = "compiled"
+USER_DICT_MODE_MATCHER = "matcher"
+# KE_TOKEN_STORE=true のとき、保存済みの形態素列から一度に集計するエントリ数の上限
+TOKEN_STORE_CHUNK = 256
 
 
 @st.cache_resource
 def get_tagger(custom_dict_path: str) -> MeCab.Tagger:
-    """MeCab Tagger をキャッシュして取得する"""
+    """MeCab Tagger をキャッシュして取得する（パスが空ならユーザー辞書なし）"""
     # 渡された log ではなく、名前を指定して取得する
     logger = logging.getLogger("keyword_logger")
     logger.debug("MeCab.Tagger を新規生成します")
 
-    return MeCab.Tagger(
-        f"-r /etc/mecabrc -d /var/lib/mecab/dic/ipadic-utf8 -u {custom_dict_path}"
+    args = "-r /etc/mecabrc -d /var/lib/mecab/dic/ipadic-utf8"
+    if custom_dict_path:
+        args += f" -u {custom_dict_path}"
+    return MeCab.Tagger(args)
+
+
+def load_stop_words(supabase: "Client", user_id: str) -> set[str]:
+    """Supabaseからユーザーのストップワードを取得し、本文と同じ表記に正規化する."""
+    response_sw = (
+        supabase.table("stop_words").select("word").eq("user_id", user_id).execute()
+    )
+    sw_list = cast(list[StopWordRow], response_sw.data or [])
+    return {normalize_word(str(item["word"])) for item in sw_list} - {""}
+
+
+def fetch_user_dict_rows(
+    supabase: "Client", user_id: str
+) -> Iterator[tuple[str, str, str, str]]:
+    """Supabaseからユーザー辞書を取得し、(単語, 品詞, 読み, 発音) の行で返す."""
+    log = logging.getLogger("keyword_logger")
+    log.debug("DBからユーザー辞書を取得します")
+    response_ud = (
+        supabase.table("user_dict")
+        .select("word,part_of_speech,reading,pronunciation")
+        .eq("user_id", user_id)
+        .execute()
+    )
+    entries = cast(list[UserDictRow], response_ud.data or [])
+    log.debug(f"辞書取得件数: {len(entries)}")
+    return (
+        (e["word"], e["part_of_speech"], e["reading"], e["pronunciation"])
+        for e in entries
+    )
+
+
+def load_user_dic_path(supabase: "Client", user_id: str) -> str:
+    """Supabaseからユーザー辞書を取得し、ビルド済みMeCab辞書のパスを返す.
+
+    登録が無い場合は空文字列を返す（空の .dic は MeCab が読み込めないため）。
+    """
+    rows = list(fetch_user_dict_rows(supabase, user_id))
+    if not rows:
+        logging.getLogger("keyword_logger").info(
+            "ユーザー辞書が空なのでシステム辞書のみを使用します"
+        )
+        return ""
+    return build_user_dic_from_entries(rows, dic_dir=SYSTEM_DIC_DIR)
+
+
+def load_user_dict_matcher(supabase: "Client", user_id: str) -> PhraseMatcher:
+    """Supabaseのユーザー辞書から登録語のオートマトンを作る（辞書のビルドなし）."""
+    return PhraseMatcher.from_dic_entries(
+        iter_dic_entries(fetch_user_dict_rows(supabase, user_id))
+    )
+
+
+def user_dict_mode() -> str:
+    """ユーザー辞書の適用方法（USER_DICT_MODE）. 不明な値なら compiled とみなす."""
+    mode = os.getenv(USER_DICT_MODE_ENV, USER_DICT_MODE_COMPILED)
+    if mode not in (USER_DICT_MODE_COMPILED, USER_DICT_MODE_MATCHER):
+        logging.getLogger("keyword_logger").warning(
+            f"{USER_DICT_MODE_ENV} の値が不正です: {mode}（compiled を使います）"
+        )
+        return USER_DICT_MODE_COMPILED
+    return mode
+
+
+def load_pos_filter() -> PosFilter:
+    """KE_POS_FILTER の PosFilter を返す.
+
+    システム辞書のソースに pos-id.def があれば、posid ごとの判定を先にまとめて求める。
+    """
+    pos_filter = pos_filter_from_env()
+    pos_id_def = os.path.join(SYSTEM_DIC_DIR, "pos-id.def")
+    if os.path.exists(pos_id_def):
+        try:
+            pos_filter.load_pos_ids(read_pos_id_def(pos_id_def))
+        except (OSError, ValueError) as e:
+            logging.getLogger("keyword_logger").warning(
+                f"pos-id.def の読み込みに失敗しました: {e}"
+            )
+    return pos_filter
+
+
+def load_local_stop_words(path: str) -> set[str]:
+    """ローカルのストップワードファイル（1行1語）を読み込む（無ければ空）."""
+    if not os.path.exists(path):
+        return set()
+    with open(path, encoding="utf-8") as f:
+        return {normalize_word(line) for line in f} - {""}
+
+
+def load_local_user_dic_path(dict_dir: str) -> str:
+    """ローカルのユーザー辞書のパスを返す（未ビルドなら CSV からビルドする）."""
+    custom_dict_path = os.path.join(dict_dir, "user.dic")
+    if os.path.exists(custom_dict_path):
+        logging.getLogger("keyword_logger").info(
+            f"既存のユーザー辞書を使用します: {custom_dict_path}"
+        )
+        return custom_dict_path
+    build_user_dic_from_local_file(
+        os.path.join(dict_dir, "user_entry.csv"), SYSTEM_DIC_DIR, dict_dir
     )
+    return custom_dict_path
+
 
+def load_local_user_dict_matcher(dict_dir: str) -> PhraseMatcher:
+    """ローカルの辞書エントリCSV（ヘッダーあり）から登録語のオートマトンを作る."""
+    entry_csv_path = os.path.join(dict_dir, "user_entry.csv")
+    if not os.path.exists(entry_csv_path):
+        return PhraseMatcher([])
+    with open(entry_csv_path, encoding="utf-8", newline="") as f:
+        rows = csv.reader(f)
+        next(rows, None)  # ヘッダーをスキップ
+        return PhraseMatcher.from_dic_entries(iter_dic_entries(rows))
 
-def run_keyword_extraction(target_month: str | None = None) -> Counter[str]:
+
+def _drain_in_chunks(
+    entry_queue: "SimpleQueue[GoodThingsEntry | None]", size: int
+) -> Iterator[list[GoodThingsEntry]]:
+    """キューに届いているエントリを最大 size 件ずつまとめて返す（None で終わり）.
+
+    次のエントリが届くまで待つ時間は、段階の処理時間に含めない。
+    """
+    while True:
+        with waiting():
+            entry = entry_queue.get()
+        if entry is None:
+            return
+        chunk = [entry]
+        while len(chunk) < size:
+            try:
+                entry = entry_queue.get_nowait()
+            except Empty:
+                break
+            if entry is None:
+                yield chunk
+                return
+            chunk.append(entry)
+        yield chunk
+
+
+def run_keyword_extraction(
+    target_month: str | None = None,
+    user_id: str | None = None,
+    on_progress: Callable[[ExtractionProgress], object] | None = None,
+    ranker: str | None = None,
+) -> Counter[str]:
     """
     以下の手順でキーワード抽出を行う.
     1. 実行月の確定（Noneなら今月）
     2. 環境に応じた設定（Notion/Supabase/辞書）の読み込み
     3. Notionから指定月のテキストデータを取得
-    4. MeCabによる構文解析とキーワードカウント
-    5. 統計データの保存（Supabase / ローカル）
+    4. テキスト正規化とMeCabによる構文解析・キーワードカウント・共起行列と
+       日付 × キーワード行列の保存・キーワードの順位付け
+    5. 統計データ・キーワード推移の保存（Supabase / ローカル）
     6. 画像出力（ローカル環境のみ）
+
+    ranker は順位付けの方法（"frequency" / "textrank"、None なら KE_RANKER）。
+    戻り値は語ごとの順位付けの値で、frequency なら出現回数、textrank なら
+    TextRank のスコアを整数にしたもの（`rank_keywords` 参照）。
+
+    user_id を指定すると、セッションに関係なくそのユーザーとして
+    Supabase モードで実行する（負荷試験など Streamlit の外から呼ぶ場合）。
+
+    on_progress を渡すと、解析の途中経過（それまでの集計）を PROGRESS_INTERVAL 秒に
+    1回まで、最後に全件の集計を1回通知する。解析用の作業スレッドから呼ばれる。
     """
     KELogger.setup(level=logging.DEBUG)
     log = logging.getLogger("keyword_logger")
@@ -79,9 +283,15 @@ def run_keyword_extraction(target_month: str | None = None) -> Counter[str]:
     # --- 1. 実行月の確定 ---
     if target_month is None:
         target_month = datetime.now().strftime("%Y-%m")
+    if ranker is None:
+        ranker = ranker_from_env()
+    elif ranker not in RANKER_LABELS:
+        raise ValueError(f"未知の順位付けの方法です: {ranker}")
 
     # メインフローの開始は INFO
     log.info(f"{'=' * 15} Keyword Extraction Start: {target_month} {'=' * 15}")
+    # KE_MEMORY_PROFILE=true なら段階ごとのメモリ計測を実行単位でまとめる
+    KELogger.begin_run()
 
     # --- 2. 実行モードの判定 ---
     is_streamlit_mode = False
@@ -91,14 +301,11 @@ def run_keyword_extraction(target_month: str | None = None) -> Counter[str]:
         is_streamlit_mode = False
 
     is_render = os.getenv("RENDER") == "true"
-    use_supabase = is_render or is_streamlit_mode
+    use_supabase = is_render or is_streamlit_mode or user_id is not None
 
     # 共通変数の初期化
     notion_token = os.getenv("NOTION_TOKEN")
     database_id = os.getenv("DATABASE_ID")
-    user_id = ""
-    stop_words_set: set[str] = set()
-    custom_dict_path = ""
     dotenv_path = ""
 
     if not is_render:
@@ -111,104 +318,200 @@ def run_keyword_extraction(target_month: str | None = None) -> Counter[str]:
         notion_token = os.getenv("NOTION_TOKEN")
         database_id = os.getenv("DATABASE_ID")
 
-    # --- 3. 辞書とストップワードの準備 ---
+    # --- 3. 辞書・ストップワード・Notion の準備（依存の無い段階は並行に実行） ---
+    supabase: "Client | None" = None
     if use_supabase:
         supabase = get_supabase_client()
-        session_user = st.session_state.get("user")
-        user_id = (
-            str(session_user.id)
-            if session_user
-            else (os.getenv("USER_ID") or "unknown")
-        )
-
-        # ストップワード取得
-        response_sw = (
-            supabase.table("stop_words").select("word").eq("user_id", user_id).execute()
-        )
-        sw_list = cast(list[StopWordRow], response_sw.data or [])
-        stop_words_set = {str(item["word"]) for item in sw_list}
-
-        # ユーザー辞書取得
-        log.debug("DBからユーザー辞書を取得します")
-        response_ud = (
-            supabase.table("user_dict")
-            .select("word,part_of_speech,reading,pronunciation")
-            .eq("user_id", user_id)
-            .execute()
-        )
-        entries = cast(list[UserDictRow], response_ud.data or [])
-        log.debug(f"辞書取得件数: {len(entries)}")
-
-        if not entries:
-            log.info("ユーザー辞書が空なので空ファイルを作成")
-            temp_csv = tempfile.NamedTemporaryFile(
-                mode="w", encoding="utf-8", delete=False, suffix=".csv"
-            )
-            temp_csv.write("")
-            temp_csv.close()
-
-            temp_dic = tempfile.NamedTemporaryFile(delete=False, suffix=".dic")
-            temp_dic.close()
-            custom_dict_path = temp_dic.name
-        else:
-            log.debug(f"辞書エントリを CSV 形式に変換中... (件数: {len(entries)})")
-            csv_data = "\n".join(
-                [
-                    f"{e['word']},{e['part_of_speech']},{e['reading']},{e['pronunciation']}"
-                    for e in entries
-                ]
-            )
-            custom_dict_path = build_user_dic_from_csv_data(
-                csv_data, dic_dir="/usr/share/mecab/dic/ipadic"
+        if user_id is None:
+            session_user = st.session_state.get("user")
+            user_id = (
+                str(session_user.id)
+                if session_user
+                else (os.getenv("USER_ID") or "unknown")
             )
     else:
         log.info(
             "ローカルモードで実行中: 辞書とストップワードをファイルから読み込みます"
         )
         user_id = os.getenv("USER_ID") or "dev_user"
-        sw_path = "custom_dict/stop_words.txt"
-        if os.path.exists(sw_path):
-            with open(sw_path, encoding="utf-8") as f:
-                stop_words_set = {line.strip() for line in f if line.strip()}
-
-        custom_dict_path = "custom_dict/user.dic"
-        if not os.path.exists(custom_dict_path):
-            build_user_dic_from_local_file(
-                "custom_dict/user_entry.csv",
-                "/usr/share/mecab/dic/ipadic",
-                "custom_dict",
-            )
-        else:
-            log.info(f"既存のユーザー辞書を使用します: {custom_dict_path}")
 
-    if not notion_token or not database_id:
+    # Notionキャッシュ: ローカルでは既定で有効、オフラインではキャッシュのみを使う
+    notion_offline = os.getenv("NOTION_OFFLINE") == "true"
+    use_notion_cache = (
+        os.getenv("NOTION_CACHE", "false" if is_render else "true") == "true"
+    )
+
+    if not database_id or (not notion_token and not notion_offline):
         error_msg = f"Notion環境変数が不足しています。(dotenv_path: {dotenv_path})"
         log.error(error_msg)
         raise ValueError(error_msg)
 
-    # --- 4. Notionからテキスト取得 ---
-    KELogger.start("Notionデータ取得")
-    all_text = fetch_good_things(notion_token, database_id, target_month)
-    KELogger.end("Notionデータ取得")
+    def stage_stop_words() -> StopRules:
+        if supabase is not None:
+            words = load_stop_words(supabase, user_id)
+        else:
+            words = load_local_stop_words("custom_dict/stop_words.txt")
+        # 原形・品詞・文字種の規則も含めて、照合用の表に一度だけまとめる
+        return compile_stop_rules(frozenset(words))
+
+    use_matcher = user_dict_mode() == USER_DICT_MODE_MATCHER
+    pos_filter = load_pos_filter()
+    token_store = get_token_store() if os.getenv(TOKEN_STORE_ENV) == "true" else None
+
+    def stage_user_dic() -> str | PhraseMatcher:
+        if use_matcher:
+            if supabase is not None:
+                return load_user_dict_matcher(supabase, user_id)
+            return load_local_user_dict_matcher("custom_dict")
+        if supabase is not None:
+            return load_user_dic_path(supabase, user_id)
+        return load_local_user_dic_path("custom_dict")
+
+    # 取得したエントリは1件ずつ解析へ渡す（None は取得の終わり）
+    entry_queue: SimpleQueue[GoodThingsEntry | None] = SimpleQueue()
+
+    def stage_notion() -> list[GoodThingsEntry]:
+        entries: list[GoodThingsEntry] = []
+        try:
+            if use_notion_cache or notion_offline:
+                source: Iterable[GoodThingsEntry] = fetch_good_things_entries_cached(
+                    notion_token, database_id, target_month, offline=notion_offline
+                )
+            else:
+                source = iter_good_things_entries(
+                    notion_token or "", database_id, target_month
+                )
+            for entry in source:
+                entries.append(entry)
+                entry_queue.put(entry)
+        finally:
+            entry_queue.put(None)
+        return entries
+
+    def stage_analyse(
+        tagger: MeCab.Tagger, stop_rules: StopRules, user_dic: str | PhraseMatcher
+    ) -> tuple[list[list[str]], Counter[str]]:
+        matcher = user_dic if isinstance(user_dic, PhraseMatcher) else None
+
+        def analyse(text: str) -> list[str]:
+            if matcher is not None:
+                return extract_nouns_with_phrases(
+                    text, tagger, stop_rules, matcher, pos_filter
+                )
+            return extract_nouns(text, tagger, stop_rules, pos_filter)
+
+        if token_store is None:
+            chunks: Iterable[list[GoodThingsEntry]] = _drain_in_chunks(entry_queue, 1)
+        else:
+            # 届いている分をまとめて、保存済みの形態素列から一度に集計する
+            chunks = _drain_in_chunks(entry_queue, TOKEN_STORE_CHUNK)
+            dict_version = dictionary_version(tagger, matcher)
+
+        # 共起の集計のため、エントリの境界と名詞の出現順を保って解析する
+        nouns_per_entry: list[list[str]] = []
+        word_count: Counter[str] = Counter()
+        last_notified: float | None = None
+        for chunk in chunks:
+            texts = [normalize_text(entry["text"]) for entry in chunk]
+            if token_store is None:
+                chunk_nouns = [analyse(text) for text in texts]
+            else:
+                streams = token_store.load_or_tokenize(
+                    texts, tagger, matcher, dict_version
+                )
+                chunk_nouns = token_store.replay(streams, stop_rules, pos_filter)
+            for nouns in chunk_nouns:
+                nouns_per_entry.append(nouns)
+                word_count.update(nouns)
+            now = time.monotonic()
+            if on_progress is not None and (
+                last_notified is None or now - last_notified >= PROGRESS_INTERVAL
+            ):
+                on_progress(ExtractionProgress(word_count.copy(), len(nouns_per_entry)))
+                last_notified = now
+        if on_progress is not None and nouns_per_entry:
+            on_progress(ExtractionProgress(word_count.copy(), len(nouns_per_entry)))
+        return nouns_per_entry, word_count
+
+    # 解析は Tagger とストップワードがそろえば始まり、届いたエントリから順に進む
+    report = run_pipeline(
+        [
+            Stage("ストップワード取得", stage_stop_words),
+            Stage("ユーザー辞書準備", stage_user_dic),
+            # matcher モードの Tagger はシステム辞書だけなので辞書を待たない
+            Stage("Tagger準備", lambda: get_tagger(""))
+            if use_matcher
+            else Stage("Tagger準備", get_tagger, deps=("ユーザー辞書準備",)),
+            Stage("Notionデータ取得", stage_notion),
+            Stage(
+                "形態素解析",
+                stage_analyse,
+                deps=("Tagger準備", "ストップワード取得", "ユーザー辞書準備"),
+            ),
+        ]
+    )
+    entries: list[GoodThingsEntry] = report.results["Notionデータ取得"]
+    nouns_per_entry, word_count = cast(
+        tuple[list[list[str]], Counter[str]], report.results["形態素解析"]
+    )
 
-    # 取得内容のチラ見せは DEBUG
-    preview = all_text[:50].replace("\n", " ")
+    # 取得内容のチラ見せは DEBUG（全文を連結せず、冒頭のエントリだけで作る）
+    preview = ""
+    for entry in entries:
+        preview = f"{preview} {entry['text']}" if preview else entry["text"]
+        if len(preview) >= 50:
+            break
+    preview = preview[:50].replace("\n", " ")
     log.debug(f"取得テキスト(冒頭50文字): {preview}...")
 
-    if not all_text.strip():
+    if not any(entry["text"].strip() for entry in entries):
         log.warning(f"対象データが空です (月: {target_month})")
+        KELogger.end_run(target_month)
         return Counter()
 
-    # --- 5. 解析実行 ---
-    tagger = get_tagger(custom_dict_path)
-    KELogger.start("形態素解析")
-    word_count = analyse_word(all_text, tagger, stop_words_set)
-    KELogger.end("形態素解析")
+    KELogger.start("共起行列構築")
+    matrix = build_cooccurrence(nouns_per_entry, COOCCURRENCE_WINDOW)
+    try:
+        matrix.save(cooccurrence_path(user_id, target_month))
+    except OSError as e:
+        log.warning(f"共起行列の保存に失敗しました: {e}")
+    finally:
+        KELogger.end("共起行列構築")
+
+    # 出現回数以外の順位付けは共起行列から求める（推移には出現回数を使う）
+    frequency = word_count
+    if ranker != RANKER_FREQUENCY:
+        KELogger.start("キーワード順位付け")
+        try:
+            word_count = rank_keywords(word_count, matrix, ranker)
+        finally:
+            KELogger.end("キーワード順位付け")
+
+    KELogger.start("日別行列構築")
+    try:
+        build_daily_matrix(target_month, entries, nouns_per_entry).save(
+            daily_matrix_path(user_id, target_month)
+        )
+    except OSError as e:
+        log.warning(f"日別行列の保存に失敗しました: {e}")
+    finally:
+        KELogger.end("日別行列構築")
+
+    KELogger.start("転置インデックス更新")
+    try:
+        get_keyword_index().update_month(
+            user_id, target_month, entries, nouns_per_entry
+        )
+    except sqlite3.Error as e:
+        log.warning(f"転置インデックスの更新に失敗しました: {e}")
+    finally:
+        KELogger.end("転置インデックス更新")
 
     # 最終的なトップキーワードは INFO
-    log.info(f"Top {TOP_N} Keywords: {word_count.most_common(TOP_N)}")
+    log.info(f"Top {TOP_N} Keywords ({ranker}): {word_count.most_common(TOP_N)}")
 
     # --- 6. 統計保存 ---
+    KELogger.start("統計保存")
     if use_supabase:
         try:
             save_monthly_top_keywords(
@@ -217,7 +520,12 @@ def run_keyword_extraction(target_month: str | None = None) -> Counter[str]:
                 target_month=target_month,
                 word_count=word_count,
                 top_n=TOP_N,
+                ranker=ranker,
             )
+            save_monthly_keyword_counts(
+                get_supabase_client(), user_id, target_month, frequency
+            )
+            refresh_keyword_trends(get_supabase_client(), user_id)
         except Exception as e:
             log.error(f"Supabase保存失敗: {e}")
             if is_streamlit_mode:
@@ -225,17 +533,25 @@ def run_keyword_extraction(target_month: str | None = None) -> Counter[str]:
     else:
         from src.services import save_monthly_top_keywords_local
 
-        save_monthly_top_keywords_local(user_id, target_month, word_count, TOP_N)
+        save_monthly_top_keywords_local(
+            user_id, target_month, word_count, TOP_N, ranker=ranker
+        )
         log.info("ローカルへの統計保存が完了しました")
+    KELogger.end("統計保存")
 
     # --- 7. 画像出力 ---
     if not is_render:
+        from src.core.plot import generate_bar_chart
+
         KELogger.start("グラフ画像出力")
-        fig = generate_bar_chart(word_count, target_month)
+        fig = generate_bar_chart(
+            word_count, target_month, value_label=RANKER_VALUE_LABELS[ranker]
+        )
         os.makedirs("output", exist_ok=True)
         fig.write_image(f"output/keyword_chart_{target_month}.png")
         KELogger.end("グラフ画像出力")
 
+    KELogger.end_run(target_month)
     log.info(f"{'=' * 15} Keyword Extraction Finished {'=' * 15}")
     return word_count
 
@@ -0,0 +1,126 @@
+"""形態素解析の前段で行うテキスト正規化モジュール.
+
+全角/半角の揺れ（`ＡＩ` と `AI`、`ｶﾀｶﾅ` と `カタカナ`）を NFKC で畳み込み、
+URL・絵文字の除去と空白の圧縮を行う。変換表と正規表現はモジュール読み込み時に
+一度だけ構築し、長いテキストはチャンク単位で処理する。
+
+ストップワードやユーザー辞書の単語にも `normalize_word` を適用することで、
+本文と同じ表記に揃えてから照合する。
+"""
+
+import re
+import unicodedata
+from collections.abc import Iterator, Sequence
+
+# NFKC の前に適用する1文字単位の変換表（ゼロ幅文字の削除と、NFKC で
+# 統一されないダッシュ類の統一）。いずれも下記の安定文字クラスの外にある
+_TRANSLATE_TABLE: dict[int, int | None] = {
+    **dict.fromkeys(map(ord, "\u200b\u200c\u200d\u2060\ufeff"), None),
+    **dict.fromkeys(map(ord, "\u2010\u2011\u2012\u2013\u2014\u2015\u2212"), ord("-")),
+}
+
+# NFKC で変化せず、結合文字でもない文字のクラス（ASCII・かな・CJK統合漢字と
+# 主な和文記号）。日記本文の大半はここに収まるので、この外側の連続部分だけを
+# NFKC に掛ける
+NFKC_STABLE_CLASS = (
+    "\x00-\x7f"
+    "\u3001-\u3029\u3030-\u3035"  # 和文記号（結合用の声調記号を除く）
+    "\u3041-\u3096"  # ひらがな
+    "\u30a1-\u30fa\u30fc-\u30fe"  # カタカナ・長音符
+    "\u4e00-\u9fff"  # CJK統合漢字
+)
+_UNSTABLE_RUN_PATTERN = re.compile(f"[^{NFKC_STABLE_CLASS}]+")
+
+# URL と絵文字はまとめて1パスで除去する
+_STRIP_PATTERN = re.compile(
+    r"https?://[!-~]+|www\.[!-~]+"
+    "|["
+    "\U0001f000-\U0001faff"  # 絵文字・記号・国旗・肌色修飾子
+    "\u2600-\u27bf"  # その他の記号・装飾記号
+    "\u2b00-\u2bff"  # 矢印・星など
+    "\ufe0e\ufe0f"  # 異体字セレクタ
+    "\u20e3"  # キーキャップ
+    "]+"
+)
+
+# 改行（列の区切り）以外の空白
+_FIELD_SPACE_PATTERN = re.compile(r"[^\S\n]")
+
+# チャンクの目安サイズ（文字数）。境界は空白の位置に合わせる
+CHUNK_SIZE = 64 * 1024
+
+
+def normalize_word(word: str) -> str:
+    """単語（ストップワード・辞書エントリ）を本文と同じ表記に揃える."""
+    word = unicodedata.normalize("NFKC", word.translate(_TRANSLATE_TABLE))
+    return " ".join(word.split())
+
+
+def normalize_fields(fields: Sequence[str]) -> list[str]:
+    """改行を含まない複数の単語を、まとめて1回で `normalize_word` と同じ表記にする.
+
+    改行で連結して変換表と NFKC を一度だけ掛ける（改行は結合の起点になる文字
+    なので、各単語を別々に正規化した結果と一致する）。すべて安定文字クラスの
+    文字なら変換そのものを省き、空白が無ければ空白の圧縮も省く。
+    """
+    joined = "\n".join(fields)
+    if _UNSTABLE_RUN_PATTERN.search(joined):
+        joined = unicodedata.normalize("NFKC", joined.translate(_TRANSLATE_TABLE))
+    if _FIELD_SPACE_PATTERN.search(joined) is None:
+        return joined.split("\n")
+    return [" ".join(field.split()) for field in joined.split("\n")]
+
+
+def normalize_text(text: str, chunk_size: int = CHUNK_SIZE) -> str:
+    """解析対象のテキスト全体を正規化する."""
+    return " ".join(iter_normalized_chunks(text, chunk_size))
+
+
+def iter_normalized_chunks(text: str, chunk_size: int = CHUNK_SIZE) -> Iterator[str]:
+    """テキストを空白境界で分割し、正規化したチャンクを順に返す.
+
+    URL や結合文字の途中で切らないよう、分割位置は空白に合わせる。
+    空になったチャンクは返さない。
+    """
+    for chunk in _split_chunks(text, chunk_size):
+        normalized = _normalize_chunk(chunk)
+        if normalized:
+            yield normalized
+
+
+def _nfkc_unstable_runs(chunk: str) -> str:
+    """安定文字クラスの外側の連続部分だけを変換表と NFKC で正規化する."""
+    pieces: list[str] = []
+    pos = 0
+    for match in _UNSTABLE_RUN_PATTERN.finditer(chunk):
+        start = match.start()
+        # 結合文字で始まる場合は、合成できるよう直前の1文字も含める
+        if start > pos and unicodedata.combining(chunk[start]):
+            start -= 1
+        pieces.append(chunk[pos:start])
+        run = chunk[start : match.end()].translate(_TRANSLATE_TABLE)
+        pieces.append(unicodedata.normalize("NFKC", run))
+        pos = match.end()
+    pieces.append(chunk[pos:])
+    return "".join(pieces)
+
+
+def _normalize_chunk(chunk: str) -> str:
+    chunk = _nfkc_unstable_runs(chunk)
+    chunk = _STRIP_PATTERN.sub(" ", chunk)
+    # str.split() は Unicode の空白全般で区切るので、空白の圧縮と strip を兼ねる
+    return " ".join(chunk.split())
+
+
+def _split_chunks(text: str, chunk_size: int) -> Iterator[str]:
+    start = 0
+    length = len(text)
+    while start < length:
+        end = start + chunk_size
+        if end < length:
+            # チャンク末尾から直近の空白まで戻る（無ければそのまま切る）
+            boundary = max(text.rfind(" ", start, end), text.rfind("\n", start, end))
+            if boundary > start:
+                end = boundary
+        yield text[start:end]
+        start = end
@@ -0,0 +1,120 @@
+"""ユーザー辞書の語を Aho-Corasick 法で本文から探すモジュール.
+
+コンパイル済みのユーザー辞書（mecab-dict-index でビルドし、Tagger を作り直す）の
+代わりに、登録語をメモリ上のオートマトンにして形態素解析の前に本文を1回走査する。
+見つかった語はそのまま数え、残りの区間だけをシステム辞書の Tagger で解析する。
+辞書の編集はオートマトンを作り直すだけで反映され、サブプロセスも新しい Tagger も
+要らない。
+"""
+
+from collections import deque
+from collections.abc import Iterable, Iterator, Sequence
+
+# 数える対象とする品詞（コンパイル済み辞書でも名詞だけが数えられる）
+COUNTED_PART_OF_SPEECH = "名詞"
+
+
+class PhraseMatcher:
+    """登録語の Aho-Corasick オートマトン.
+
+    重なり合う候補は、開始位置が最も左のもの、同じ位置なら最も長いものを採る
+    （MeCab がユーザー辞書の語を1語として切り出すのに近い）。
+    """
+
+    def __init__(self, terms: Iterable[str], counted: Iterable[str] | None = None):
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+        # 状態で終わる登録語の長さ（登録語でなければ 0）
+        self._length: list[int] = [0]
+        # 失敗リンクをたどって最初に着く、登録語で終わる状態（無ければ 0）
+        self._output: list[int] = [0]
+        self.terms: frozenset[str] = frozenset(t for t in terms if t)
+        self.counted: frozenset[str] = (
+            self.terms if counted is None else self.terms & frozenset(counted)
+        )
+        for term in self.terms:
+            self._add(term)
+        self._link()
+
+    @classmethod
+    def from_dic_entries(cls, entries: Iterable[Sequence[str]]) -> "PhraseMatcher":
+        """(単語, 品詞, 読み, 発音) の辞書エントリから作る（名詞だけを数える）."""
+        terms: list[str] = []
+        counted: list[str] = []
+        for word, part_of_speech, *_ in entries:
+            terms.append(word)
+            if part_of_speech.startswith(COUNTED_PART_OF_SPEECH):
+                counted.append(word)
+        return cls(terms, counted)
+
+    def __len__(self) -> int:
+        return len(self.terms)
+
+    def _add(self, term: str) -> None:
+        state = 0
+        for ch in term:
+            next_state = self._goto[state].get(ch)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][ch] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._length.append(0)
+                self._output.append(0)
+            state = next_state
+        self._length[state] = len(term)
+
+    def _link(self) -> None:
+        """幅優先で失敗リンクと出力リンクを張る."""
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, child in self._goto[state].items():
+                queue.append(child)
+                fail = self._fail[state]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                target = self._goto[fail].get(ch, 0)
+                self._fail[child] = target if target != child else 0
+                linked = self._fail[child]
+                if not self._length[linked]:
+                    linked = self._output[linked]
+                self._output[child] = linked
+
+    def find(self, text: str) -> list[tuple[int, int]]:
+        """本文中の登録語の位置 (開始, 終了) を重ならないように左から返す."""
+        if not self.terms:
+            return []
+        goto, fail, length, output = self._goto, self._fail, self._length, self._output
+        # 開始位置ごとに最も長い一致の終了位置
+        longest: dict[int, int] = {}
+        state = 0
+        for end, ch in enumerate(text, 1):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            hit = state if length[state] else output[state]
+            while hit:
+                start = end - length[hit]
+                if longest.get(start, 0) < end:
+                    longest[start] = end
+                hit = output[hit]
+
+        spans: list[tuple[int, int]] = []
+        covered = 0
+        for start in sorted(longest):
+            if start >= covered:
+                spans.append((start, longest[start]))
+                covered = longest[start]
+        return spans
+
+    def split(self, text: str) -> Iterator[tuple[str, bool]]:
+        """本文を (区間, 登録語かどうか) に分けて出現順に返す."""
+        pos = 0
+        for start, end in self.find(text):
+            if pos < start:
+                yield text[pos:start], False
+            yield text[start:end], True
+            pos = end
+        if pos < len(text):
+            yield text[pos:], False
@@ -0,0 +1,219 @@
+"""依存関係のある処理段階をスレッドプールで並行に実行するモジュール.
+
+各段階は名前・関数・依存する段階の名前を持つ。依存がすべて終わった段階から
+順に実行し、依存先の結果を引数として受け取る。I/O 待ちの段階（Supabase・Notion
+への問い合わせ、辞書のビルド）同士が重なることで、全体の待ち時間が縮む。
+
+段階ごとの処理時間は `KELogger` で計測し、逐次実行した場合の合計との差を
+並行化で短縮できた時間として報告する。他の段階の途中結果を待ちながら進む段階
+（キューからエントリを受け取る解析など）は、待つ区間を `waiting()` で囲む。
+その区間は処理時間から除き、`<段階名>（待ち）` として別に記録する（除かないと、
+待っていた段階の時間を逐次実行の合計に二重に数えてしまう）。
+"""
+
+import logging
+import sys
+import threading
+import time
+from collections.abc import Callable, Iterator, Sequence
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any
+
+from src.logs.logger import KELogger
+
+_log = logging.getLogger("keyword_logger")
+
+# 並行化による短縮時間を記録するラベル
+SAVED_TIME_LABEL = "並行化による短縮"
+# 段階の中で待っていた時間を記録するラベルの接尾辞
+WAIT_LABEL_SUFFIX = "（待ち）"
+
+# 実行中の段階が待っていた時間（段階を実行しているスレッドごと）
+_stage_state = threading.local()
+
+
+@contextmanager
+def waiting() -> Iterator[None]:
+    """段階の中で他の段階を待つ区間を囲み、その時間を段階の処理時間から除く.
+
+    段階の外（run_pipeline の作業スレッド以外）で使った場合は何もしない。
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        waited = getattr(_stage_state, "waited", None)
+        if waited is not None:
+            _stage_state.waited = waited + time.perf_counter() - started
+
+
+@dataclass(frozen=True)
+class Stage:
+    """処理段階. func は deps の順に依存先の結果を受け取る."""
+
+    name: str
+    func: Callable[..., Any]
+    deps: tuple[str, ...] = ()
+
+
+@dataclass
+class PipelineReport:
+    """実行結果と段階ごとの処理時間.
+
+    durations は待ち（`waiting()` で囲んだ区間）を除いた時間で、待ちは waits に入る。
+    """
+
+    results: dict[str, Any]
+    durations: dict[str, float]
+    wall_time: float
+    deps: dict[str, tuple[str, ...]] = field(default_factory=dict)
+    waits: dict[str, float] = field(default_factory=dict)
+
+    @property
+    def sequential_time(self) -> float:
+        """すべての段階を逐次実行した場合の所要時間（各段階の合計）."""
+        return sum(self.durations.values())
+
+    @property
+    def saved_time(self) -> float:
+        """並行化で短縮できた時間."""
+        return max(self.sequential_time - self.wall_time, 0.0)
+
+    def critical_path(self) -> tuple[list[str], float]:
+        """処理時間の合計が最も長い依存の連なりと、その所要時間を返す."""
+        best: dict[str, tuple[float, list[str]]] = {}
+        for name in self.durations:  # durations は依存先が先に並ぶ
+            prev = max(
+                (best[d] for d in self.deps.get(name, ()) if d in best),
+                default=(0.0, []),
+                key=lambda item: item[0],
+            )
+            best[name] = (prev[0] + self.durations[name], [*prev[1], name])
+        if not best:
+            return [], 0.0
+        total, path = max(best.values(), key=lambda item: item[0])
+        return path, total
+
+
+def _check_stages(stages: Sequence[Stage]) -> list[Stage]:
+    """名前の重複・未定義の依存・循環を検出し、依存先が先に来る順に並べて返す."""
+    by_name = {stage.name: stage for stage in stages}
+    if len(by_name) != len(stages):
+        raise ValueError("段階の名前が重複しています")
+    for stage in stages:
+        unknown = [d for d in stage.deps if d not in by_name]
+        if unknown:
+            raise ValueError(f"[{stage.name}] 未定義の段階に依存しています: {unknown}")
+
+    ordered: list[Stage] = []
+    done: set[str] = set()
+    pending = list(stages)
+    while pending:
+        ready = [s for s in pending if all(d in done for d in s.deps)]
+        if not ready:
+            names = [s.name for s in pending]
+            raise ValueError(f"段階の依存関係が循環しています: {names}")
+        ordered.extend(ready)
+        done.update(s.name for s in ready)
+        pending = [s for s in pending if s.name not in done]
+    return ordered
+
+
+def _thread_initializer() -> Callable[[], None]:
+    """呼び出し元スレッドの実行状態を作業スレッドへ引き継ぐ初期化関数を返す.
+
+    KELogger の run 単位のメモリ記録と、Streamlit のスクリプト実行コンテキスト
+    （Streamlit を読み込んでいるときだけ）を引き継ぐ。
+    """
+    records = KELogger.current_run()
+    ctx = None
+    if "streamlit" in sys.modules:
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+        ctx = get_script_run_ctx(suppress_warning=True)
+
+    def initialize() -> None:
+        KELogger.join_run(records)
+        if ctx is not None:
+            from streamlit.runtime.scriptrunner import add_script_run_ctx
+
+            add_script_run_ctx(threading.current_thread(), ctx)
+
+    return initialize
+
+
+def run_pipeline(
+    stages: Sequence[Stage], max_workers: int | None = None
+) -> PipelineReport:
+    """依存関係に従って段階を並行に実行する.
+
+    どれかの段階が例外を送出したら、未着手の段階は実行せずにその例外を送出する。
+    """
+    ordered = _check_stages(stages)
+    results: dict[str, Any] = {}
+    durations: dict[str, float] = {}
+    waits: dict[str, float] = {}
+    lock = threading.Lock()
+
+    def run_stage(stage: Stage) -> Any:
+        args = [results[d] for d in stage.deps]
+        KELogger.start(stage.name)
+        _stage_state.waited = 0.0
+        started = time.perf_counter()
+        try:
+            return stage.func(*args)
+        finally:
+            elapsed = time.perf_counter() - started
+            waited = min(_stage_state.waited, elapsed)
+            _stage_state.waited = None
+            with lock:
+                durations[stage.name] = elapsed - waited
+                if waited > 0:
+                    waits[stage.name] = waited
+            KELogger.end(stage.name, idle=waited)
+            if waited > 0:
+                KELogger.record(f"{stage.name}{WAIT_LABEL_SUFFIX}", waited)
+
+    wall_start = time.perf_counter()
+    pending = list(ordered)
+    running: dict[Future[Any], Stage] = {}
+    with ThreadPoolExecutor(
+        max_workers=max_workers or len(ordered) or 1,
+        thread_name_prefix="ke-stage",
+        initializer=_thread_initializer(),
+    ) as executor:
+        while pending or running:
+            ready = [s for s in pending if all(d in results for d in s.deps)]
+            for stage in ready:
+                running[executor.submit(run_stage, stage)] = stage
+                pending.remove(stage)
+
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                stage = running.pop(future)
+                error = future.exception()
+                if error is not None:
+                    for other in running:
+                        other.cancel()
+                    raise error
+                results[stage.name] = future.result()
+    wall_time = time.perf_counter() - wall_start
+
+    report = PipelineReport(
+        results=results,
+        # 依存先が先に来る順（critical_path の計算に使う）
+        durations={s.name: durations[s.name] for s in ordered},
+        wall_time=wall_time,
+        deps={s.name: s.deps for s in ordered},
+        waits=waits,
+    )
+    path, path_time = report.critical_path()
+    _log.info(
+        f"並行実行: {report.wall_time:.2f}秒（逐次なら {report.sequential_time:.2f}秒、"
+        f"短縮 {report.saved_time:.2f}秒）/ "
+        f"クリティカルパス: {' → '.join(path)} {path_time:.2f}秒"
+    )
+    KELogger.record(SAVED_TIME_LABEL, report.saved_time)
+    return report
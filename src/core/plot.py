@@ -11,15 +11,24 @@ from plotly.graph_objects import Figure
 
 
 def generate_bar_chart(
-    word_count: Counter[str], target_month: str | None = None, TOP_N: int = 5
+    word_count: Counter[str],
+    target_month: str | None = None,
+    TOP_N: int = 5,
+    value_label: str = "出現回数",
 ) -> Figure:
-    """頻出単語の棒グラフを生成。target_monthの有無でラベルを動的に切り替える。"""
+    """頻出単語の棒グラフを生成。target_monthの有無でラベルを動的に切り替える。
+
+    value_label は値の軸の名前（TextRank で順位付けした場合は "スコア"）。
+    """
 
     # データの変換
     data = [
-        {"単語": word, "出現回数": count}
+        {"単語": word, value_label: count}
         for word, count in word_count.most_common(TOP_N)
     ]
+    title = (
+        "頻出単語" if value_label == "出現回数" else f"キーワード（{value_label}順）"
+    )
     df = pd.DataFrame(data)
 
     # 期間ラベルの構築
@@ -41,15 +50,15 @@ def generate_bar_chart(
     fig = px.bar(
         df,
         x="単語",
-        y="出現回数",
+        y=value_label,
         color_discrete_sequence=["#63D194"],
-        title=f"頻出単語 TOP{TOP_N}{title_suffix}",
+        title=f"{title} TOP{TOP_N}{title_suffix}",
     )
 
     fig.update_layout(
         font=dict(family="Noto Sans CJK JP", size=16),
         xaxis_title=None,
-        yaxis_title="出現回数",
+        yaxis_title=value_label,
         width=700,
         height=400,
     )
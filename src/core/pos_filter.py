@@ -0,0 +1,118 @@
+"""数える語を品詞で絞り込むフィルタ.
+
+品詞は ``名詞`` ``名詞-固有名詞`` のように細分類を ``-`` でつないで指定し、
+先頭に ``!`` を付けると除外になる（例: ``名詞,!名詞-非自立,!名詞-代名詞``）。
+環境変数 ``KE_POS_FILTER`` で切り替えられ、既定は名詞すべて。
+
+形態素解析のループでは素性の文字列を分割せず、ノードの posid（品詞 ID）で判定する。
+posid ごとの判定は初めて出てきたときに一度だけ素性から求めて覚える
+（システム辞書のソースに pos-id.def があれば最初にまとめて求める）。
+品詞 ID が割り当てられない語（ユーザー辞書の語など）だけは毎回素性を見る。
+"""
+
+import os
+from collections.abc import Mapping, Sequence
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Protocol
+
+from src.core.stop_rules import parse_pos
+
+POS_FILTER_ENV = "KE_POS_FILTER"
+DEFAULT_POS_FILTER = "名詞"
+EXCLUDE_PREFIX = "!"
+
+# pos-id.def に当てはまらない品詞（ユーザー辞書の語など）に MeCab が割り当てる posid
+UNMATCHED_POSID = 65535
+# BOS/EOS ノードの stat
+_BOS_EOS_STATS = (2, 3)
+
+
+class MorphNode(Protocol):
+    """MeCab のノードのうち、品詞の判定に使う属性."""
+
+    posid: int
+    stat: int
+    feature: str
+
+
+@dataclass(frozen=True)
+class PosFilter:
+    """品詞の前方一致で語を絞り込むフィルタ."""
+
+    include: frozenset[tuple[str, ...]]
+    exclude: frozenset[tuple[str, ...]] = frozenset()
+    # posid → 数えるか（初めて出てきた posid だけ素性から判定する）
+    _by_posid: dict[int, bool] = field(
+        default_factory=dict, init=False, repr=False, compare=False
+    )
+
+    def accepts(self, features: Sequence[str]) -> bool:
+        """素性（品詞, 細分類1, ...）が対象の品詞か判定する."""
+
+        def matches(prefix: tuple[str, ...]) -> bool:
+            return tuple(features[: len(prefix)]) == prefix
+
+        return any(map(matches, self.include)) and not any(map(matches, self.exclude))
+
+    def accepts_node(self, node: MorphNode) -> bool:
+        """ノードが対象の品詞か、posid ごとに覚えた判定で返す."""
+        posid = node.posid
+        accepted = self._by_posid.get(posid)
+        if accepted is None:
+            if node.stat in _BOS_EOS_STATS:
+                return False
+            accepted = self.accepts(node.feature.split(","))
+            if posid != UNMATCHED_POSID:
+                self._by_posid[posid] = accepted
+        return accepted
+
+    def load_pos_ids(self, pos_ids: Mapping[int, Sequence[str]]) -> frozenset[int]:
+        """posid → 品詞の表から判定をまとめて求め、対象の posid の集合を返す."""
+        for posid, features in pos_ids.items():
+            self._by_posid[posid] = self.accepts(features)
+        return frozenset(p for p, accepted in self._by_posid.items() if accepted)
+
+
+@lru_cache(maxsize=16)
+def compile_pos_filter(spec: str = DEFAULT_POS_FILTER) -> PosFilter:
+    """``名詞,!名詞-非自立`` のような指定から PosFilter を作る（指定ごとに共有）."""
+    include: set[tuple[str, ...]] = set()
+    exclude: set[tuple[str, ...]] = set()
+    for item in spec.split(","):
+        item = item.strip()
+        target = exclude if item.startswith(EXCLUDE_PREFIX) else include
+        pos = parse_pos(item.removeprefix(EXCLUDE_PREFIX))
+        if pos:
+            target.add(pos)
+    if not include:
+        raise ValueError(f"数える品詞が指定されていません: {spec!r}")
+    return PosFilter(frozenset(include), frozenset(exclude))
+
+
+def pos_filter_from_env() -> PosFilter:
+    """KE_POS_FILTER の指定（無ければ名詞すべて）の PosFilter を返す."""
+    return compile_pos_filter(os.getenv(POS_FILTER_ENV) or DEFAULT_POS_FILTER)
+
+
+def read_pos_id_def(path: str) -> dict[int, tuple[str, ...]]:
+    """辞書ソースの pos-id.def（``名詞,数,*,* 48`` の形式）を読み込む.
+
+    IPADIC のソースは EUC-JP のことがあるので、UTF-8 で読めなければ EUC-JP で読む。
+    """
+    for encoding in ("utf-8", "euc_jp"):
+        try:
+            with open(path, encoding=encoding) as f:
+                lines = f.read().splitlines()
+            break
+        except UnicodeDecodeError:
+            continue
+    else:
+        raise ValueError(f"pos-id.def の文字コードを判別できません: {path}")
+
+    pos_ids: dict[int, tuple[str, ...]] = {}
+    for line in lines:
+        pos, _, posid = line.strip().rpartition(" ")
+        if pos and posid.isdigit():
+            pos_ids[int(posid)] = tuple(pos.split(","))
+    return pos_ids
@@ -0,0 +1,153 @@
+"""ストップワードを規則として解釈し、照合用の表にまとめるモジュール.
+
+ストップワードのテーブルには語そのもののほかに、次の形の規則も登録できる。
+
+- ``原形:言う`` … 原形（活用前の形）が一致する語を除く（「言っ」「言わ」なども除く）
+- ``品詞:名詞-非自立`` … 品詞（細分類は ``-`` でつなぐ）が前方一致する語を除く
+- ``@数字`` ``@1文字`` ``@ひらがな`` ``@カタカナ`` ``@英字`` ``@記号``
+  … 表層形がその文字種だけでできている語を除く（``@数字`` は日付・時刻の区切りも含む）
+
+規則はストップワードの集合ごとに一度だけ `StopRules` にまとめる。表層形だけで
+決まる判定は表層形ごとに結果を覚えておくので、解析のループでは辞書を引くだけで済む。
+"""
+
+import logging
+import unicodedata
+from collections.abc import Callable, Iterable, Sequence
+from dataclasses import dataclass, field
+from functools import lru_cache
+
+_log = logging.getLogger("keyword_logger")
+
+BASE_FORM_PREFIX = "原形:"
+POS_PREFIX = "品詞:"
+CHAR_CLASS_PREFIX = "@"
+
+# MeCab（IPADIC）の素性で原形が入る位置
+BASE_FORM_FIELD = 6
+
+# 数字の間に入る区切り（日付・時刻・小数）
+_NUMBER_SEPARATORS = str.maketrans("", "", ".,/:-")
+
+
+def _is_number(surface: str) -> bool:
+    return surface.translate(_NUMBER_SEPARATORS).isdecimal()
+
+
+def _is_symbol(surface: str) -> bool:
+    return all(unicodedata.category(ch)[0] in "PSZ" for ch in surface)
+
+
+def _only(first: str, last: str) -> Callable[[str], bool]:
+    return lambda surface: all(first <= ch <= last for ch in surface)
+
+
+CHAR_CLASSES: dict[str, Callable[[str], bool]] = {
+    "数字": _is_number,
+    "1文字": lambda surface: len(surface) == 1,
+    "ひらがな": _only("ぁ", "ゟ"),
+    "カタカナ": _only("ァ", "ヿ"),
+    "英字": lambda surface: surface.isascii() and surface.isalpha(),
+    "記号": _is_symbol,
+}
+
+
+@dataclass(frozen=True)
+class StopRules:
+    """照合用にまとめたストップワードの規則."""
+
+    surfaces: frozenset[str] = frozenset()
+    base_forms: frozenset[str] = frozenset()
+    pos_prefixes: frozenset[tuple[str, ...]] = frozenset()
+    char_classes: tuple[Callable[[str], bool], ...] = ()
+    _pos_levels: tuple[int, ...] = field(default=(), init=False, repr=False)
+    # 表層形だけで決まる判定の結果（表層形 → 除外するか）
+    _by_surface: dict[str, bool] = field(
+        default_factory=dict, init=False, repr=False, compare=False
+    )
+
+    def __post_init__(self) -> None:
+        levels = tuple(sorted({len(prefix) for prefix in self.pos_prefixes}))
+        object.__setattr__(self, "_pos_levels", levels)
+
+    def __bool__(self) -> bool:
+        return bool(
+            self.surfaces or self.base_forms or self.pos_prefixes or self.char_classes
+        )
+
+    @property
+    def needs_features(self) -> bool:
+        """判定に素性（原形・品詞）が要るか（要らなければ表層形だけで判定できる）."""
+        return bool(self.base_forms or self.pos_prefixes)
+
+    def is_stopped(self, surface: str, features: Sequence[str]) -> bool:
+        """表層形と MeCab の素性（品詞, 細分類1, ..., 原形, ...）で除外を判定する."""
+        if self.stops_surface(surface):
+            return True
+        if self.base_forms and base_form(surface, features) in self.base_forms:
+            return True
+        return self.stops_pos(features)
+
+    def stops_surface(self, surface: str) -> bool:
+        """表層形だけで決まる規則（語そのもの・文字種）に当たるか."""
+        stopped = self._by_surface.get(surface)
+        if stopped is None:
+            stopped = surface in self.surfaces or any(
+                matches(surface) for matches in self.char_classes
+            )
+            self._by_surface[surface] = stopped
+        return stopped
+
+    def stops_pos(self, features: Sequence[str]) -> bool:
+        """品詞の規則に当たるか."""
+        return any(tuple(features[:n]) in self.pos_prefixes for n in self._pos_levels)
+
+
+def base_form(surface: str, features: Sequence[str]) -> str:
+    """素性の原形（未知語などで原形が無ければ表層形）."""
+    if len(features) > BASE_FORM_FIELD and features[BASE_FORM_FIELD] != "*":
+        return features[BASE_FORM_FIELD]
+    return surface
+
+
+def parse_pos(value: str) -> tuple[str, ...]:
+    """``名詞-非自立`` のような品詞の指定を (品詞, 細分類1, ...) に分ける."""
+    return tuple(part for part in value.replace(",", "-").split("-") if part)
+
+
+@lru_cache(maxsize=32)
+def compile_stop_rules(words: frozenset[str]) -> StopRules:
+    """ストップワード（規則を含む）の集合を照合用の表にまとめる.
+
+    同じ集合に対しては、まとめた結果（と覚えた判定）を使い回す。
+    """
+    surfaces: set[str] = set()
+    base_forms: set[str] = set()
+    pos_prefixes: set[tuple[str, ...]] = set()
+    char_classes: dict[str, Callable[[str], bool]] = {}
+    for word in words:
+        if word.startswith(BASE_FORM_PREFIX) and word[len(BASE_FORM_PREFIX) :]:
+            base_forms.add(word[len(BASE_FORM_PREFIX) :])
+        elif word.startswith(POS_PREFIX) and parse_pos(word[len(POS_PREFIX) :]):
+            pos_prefixes.add(parse_pos(word[len(POS_PREFIX) :]))
+        elif word.startswith(CHAR_CLASS_PREFIX) and len(word) > 1:
+            name = word[len(CHAR_CLASS_PREFIX) :]
+            if name in CHAR_CLASSES:
+                char_classes[name] = CHAR_CLASSES[name]
+            else:
+                _log.warning(f"未知の文字種のストップワードは無視します: {word}")
+        else:
+            surfaces.add(word)
+    return StopRules(
+        surfaces=frozenset(surfaces),
+        base_forms=frozenset(base_forms),
+        pos_prefixes=frozenset(pos_prefixes),
+        char_classes=tuple(char_classes[name] for name in sorted(char_classes)),
+    )
+
+
+def as_stop_rules(stop_words: "StopRules | Iterable[str]") -> StopRules:
+    """語の集合を渡された場合も StopRules にそろえる."""
+    if isinstance(stop_words, StopRules):
+        return stop_words
+    return compile_stop_rules(frozenset(stop_words))
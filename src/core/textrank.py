@@ -0,0 +1,100 @@
+"""キーワードの順位付け（出現回数 / TextRank）を行うモジュール.
+
+TextRank は月の名詞の共起グラフ（`build_cooccurrence` の共起行列をそのまま重み付きの
+無向グラフとみなす）に PageRank と同じ反復をかけ、多くの語と共に現れる語ほど
+高く評価する。出現回数だけでは上位に来やすい汎用的な名詞より、話題の中心に
+なっている語が上位に来やすい。
+
+反復は CSR 形式の配列のまま、行列とベクトルの積を行ごとの和で計算する。
+"""
+
+import os
+from collections import Counter
+
+import numpy as np
+import numpy.typing as npt
+
+from src.core.cooccurrence import CooccurrenceMatrix
+
+# 順位付けの方法（monthly_keywords の ranker 列の値）
+RANKER_ENV = "KE_RANKER"
+RANKER_FREQUENCY = "frequency"
+RANKER_TEXTRANK = "textrank"
+# 画面に表示する名前と、値の意味
+RANKER_LABELS: dict[str, str] = {
+    RANKER_FREQUENCY: "出現回数",
+    RANKER_TEXTRANK: "TextRank",
+}
+RANKER_VALUE_LABELS: dict[str, str] = {
+    RANKER_FREQUENCY: "出現回数",
+    RANKER_TEXTRANK: "スコア",
+}
+
+DAMPING = 0.85
+TOLERANCE = 1e-8
+MAX_ITERATIONS = 100
+# TextRank のスコア（合計 1）を整数の値にするときの倍率（合計がおよそこの値になる）
+SCORE_SCALE = 1000
+
+
+def ranker_from_env() -> str:
+    """KE_RANKER の順位付けの方法（不明な値なら出現回数）."""
+    ranker = os.getenv(RANKER_ENV, RANKER_FREQUENCY)
+    return ranker if ranker in RANKER_LABELS else RANKER_FREQUENCY
+
+
+def textrank(
+    matrix: CooccurrenceMatrix,
+    damping: float = DAMPING,
+    tolerance: float = TOLERANCE,
+    max_iterations: int = MAX_ITERATIONS,
+) -> npt.NDArray[np.float64]:
+    """共起行列の語ごとの TextRank スコア（合計 1）を返す.
+
+    共起の無い語（どの語とも共に現れなかった語）からの遷移は全語へ均等に配る。
+    """
+    n = len(matrix.vocab)
+    if n == 0:
+        return np.zeros(0, dtype=np.float64)
+
+    # 共起行列は対称なので、語 j へ流れ込む量は j の行と遷移元の値の内積になる。
+    # CSR の行ごとの和（np.add.reduceat）で、行列とベクトルの積を一度に求める
+    has_edges = np.diff(matrix.indptr) > 0
+    row_starts = matrix.indptr[:-1][has_edges]
+    weights = matrix.data.astype(np.float64)
+    out_weight = np.zeros(n, dtype=np.float64)
+    out_weight[has_edges] = np.add.reduceat(weights, row_starts)
+    inv_out_weight = np.divide(
+        1.0, out_weight, out=np.zeros(n, dtype=np.float64), where=has_edges
+    )
+
+    scores = np.full(n, 1.0 / n)
+    flow = np.zeros(n, dtype=np.float64)
+    for _ in range(max_iterations):
+        source = scores * inv_out_weight
+        flow[has_edges] = np.add.reduceat(weights * source[matrix.indices], row_starts)
+        spread = (1.0 - damping + damping * scores[~has_edges].sum()) / n
+        updated = damping * flow + spread
+        delta = np.abs(updated - scores).sum()
+        scores = updated
+        if delta < tolerance:
+            break
+    return scores
+
+
+def rank_keywords(
+    word_count: Counter[str], matrix: CooccurrenceMatrix, ranker: str
+) -> Counter[str]:
+    """順位付けの方法に応じて、語ごとの値（大きいほど上位）を返す.
+
+    出現回数なら word_count をそのまま返す。TextRank ならスコアを
+    `SCORE_SCALE` 倍して丸めた整数にする（同点は出現回数の多い順）。
+    """
+    if ranker != RANKER_TEXTRANK or not matrix.vocab:
+        return word_count
+
+    scores = textrank(matrix)
+    # most_common の順が同点で出現回数順になるよう、出現回数の多い語から並べる
+    order = np.lexsort((-np.array([word_count[w] for w in matrix.vocab]), -scores))
+    points = np.maximum(np.rint(scores * SCORE_SCALE), 1).astype(np.int64).tolist()
+    return Counter({matrix.vocab[i]: points[i] for i in order.tolist()})
@@ -0,0 +1,378 @@
+"""エントリごとの形態素列を保存し、集計し直すときに再生するモジュール.
+
+ストップワードや数える品詞を変えて集計し直すたびに MeCab で解析し直さなくて済むよう、
+エントリの本文を解析した形態素列を、表層形・原形・品詞をそれぞれ語彙表の ID に
+置き換えた int32 の配列として SQLite に保存する。キーは本文のハッシュと辞書の版
+（システム辞書・ユーザー辞書の内容）で、本文か辞書が変わらない限り使い回せる。
+
+集計は保存した配列をつなげ、語彙 ID ごとに一度だけ求めた判定（数える品詞か・
+ストップワードに当たるか）を添字で引いて、全エントリ分を一度に絞り込む。
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+from collections.abc import Callable, Iterable, Mapping, Sequence
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+import numpy as np
+import numpy.typing as npt
+
+from src.core.phrase_matcher import COUNTED_PART_OF_SPEECH, PhraseMatcher
+from src.core.pos_filter import PosFilter
+from src.core.stop_rules import StopRules, base_form
+
+if TYPE_CHECKING:
+    import MeCab
+
+# 保存先
+DEFAULT_STORE_PATH = os.path.join("output", "token_store.db")
+# KE_TOKEN_STORE=true で形態素列の保存・再生を使う
+TOKEN_STORE_ENV = "KE_TOKEN_STORE"
+
+# 素性のうち品詞として保存する階層数（品詞, 細分類1, 細分類2, 細分類3）
+POS_LEVELS = 4
+# BOS/EOS ノードの stat
+_BOS_EOS_STATS = (2, 3)
+# 1回の問い合わせに入れるキーの数（SQLite のパラメータ数の上限より小さく）
+_QUERY_CHUNK = 500
+
+_SCHEMA = """
+create table if not exists strings (
+    id integer primary key,
+    value text not null unique
+);
+
+create table if not exists pos (
+    id integer primary key,
+    value text not null unique
+);
+
+create table if not exists streams (
+    dict_version text not null,
+    content_hash text not null,
+    surfaces blob not null,
+    bases blob not null,
+    pos blob not null,
+    primary key (dict_version, content_hash)
+);
+"""
+
+# (表層形, 原形, 品詞の階層)
+Token = tuple[str, str, tuple[str, ...]]
+
+
+@dataclass(frozen=True)
+class TokenStream:
+    """1エントリ分の形態素列（語彙表の ID の配列）."""
+
+    surfaces: npt.NDArray[np.int32]
+    bases: npt.NDArray[np.int32]
+    pos: npt.NDArray[np.int32]
+
+    def __len__(self) -> int:
+        return len(self.surfaces)
+
+    @classmethod
+    def from_blobs(cls, surfaces: bytes, bases: bytes, pos: bytes) -> "TokenStream":
+        return cls(
+            np.frombuffer(surfaces, dtype=np.int32),
+            np.frombuffer(bases, dtype=np.int32),
+            np.frombuffer(pos, dtype=np.int32),
+        )
+
+
+def content_hash(text: str) -> str:
+    """本文のハッシュ（保存のキー）."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:32]
+
+
+def dictionary_version(tagger: "MeCab.Tagger", matcher: PhraseMatcher | None) -> str:
+    """Tagger の辞書と登録語のオートマトンから、形態素列の版を求める.
+
+    システム辞書はファイル名・サイズ・版で、ユーザー辞書は中身で見分ける
+    （ローカルの user.dic はビルドし直しても同じパスのため）。
+    """
+    digest = hashlib.sha256()
+    info = tagger.dictionary_info()
+    while info:
+        digest.update(f"{info.filename}\t{info.size}\t{info.version}\n".encode())
+        if info.type == 1 and os.path.exists(info.filename):
+            with open(info.filename, "rb") as f:
+                digest.update(hashlib.sha256(f.read()).digest())
+        info = info.next
+    if matcher is not None:
+        for term in sorted(matcher.terms):
+            digest.update(f"{term}\t{int(term in matcher.counted)}\n".encode())
+    return digest.hexdigest()[:16]
+
+
+def tokenize(
+    text: str, tagger: "MeCab.Tagger", matcher: PhraseMatcher | None = None
+) -> list[Token]:
+    """絞り込まずに、すべての形態素を (表層形, 原形, 品詞) で返す.
+
+    matcher を渡すと `extract_nouns_with_phrases` と同じく登録語を先に切り出す。
+    数える登録語は品詞を名詞とし、それ以外の登録語は品詞を空にする（数えない）。
+    """
+    if matcher is None:
+        return _tokenize_segment(text, tagger)
+    tokens: list[Token] = []
+    for segment, is_term in matcher.split(text):
+        if not is_term:
+            tokens.extend(_tokenize_segment(segment, tagger))
+        elif segment in matcher.counted:
+            tokens.append((segment, segment, (COUNTED_PART_OF_SPEECH,)))
+        else:
+            tokens.append((segment, segment, ()))
+    return tokens
+
+
+def _tokenize_segment(text: str, tagger: "MeCab.Tagger") -> list[Token]:
+    tokens: list[Token] = []
+    node = tagger.parseToNode(text)
+    while node:
+        if node.stat not in _BOS_EOS_STATS:
+            surface = node.surface
+            features = node.feature.split(",")
+            tokens.append(
+                (surface, base_form(surface, features), tuple(features[:POS_LEVELS]))
+            )
+        node = node.next
+    return tokens
+
+
+class TokenStore:
+    """形態素列の SQLite ストア.
+
+    語彙表（表層形・原形と品詞）はプロセス内にも持ち、ID から語を引くときは
+    SQLite に問い合わせない。ID は SQLite の行 ID をそのまま使うので、
+    複数のプロセスが同じファイルに書き込んでも食い違わない。
+    """
+
+    def __init__(self, path: str = DEFAULT_STORE_PATH):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._strings: list[str] = []
+        self._string_ids: dict[str, int] = {}
+        self._pos: list[tuple[str, ...]] = []
+        self._pos_ids: dict[tuple[str, ...], int] = {}
+        with self._lock, self._conn:
+            self._conn.execute("pragma journal_mode=wal")
+            self._conn.executescript(_SCHEMA)
+            self._catch_up()
+
+    def get_many(
+        self, dict_version: str, hashes: Iterable[str]
+    ) -> dict[str, TokenStream]:
+        """保存済みの形態素列を本文のハッシュごとに返す（無いものは含めない）."""
+        keys = list(dict.fromkeys(hashes))
+        found: dict[str, TokenStream] = {}
+        with self._lock:
+            for i in range(0, len(keys), _QUERY_CHUNK):
+                chunk = keys[i : i + _QUERY_CHUNK]
+                rows = self._conn.execute(
+                    "select content_hash, surfaces, bases, pos from streams "
+                    f"where dict_version = ? and content_hash in "
+                    f"({','.join('?' * len(chunk))})",
+                    (dict_version, *chunk),
+                ).fetchall()
+                for key, surfaces, bases, pos in rows:
+                    found[key] = TokenStream.from_blobs(surfaces, bases, pos)
+            # 他のプロセスが追加した語彙を参照していれば読み込む
+            self._catch_up()
+        return found
+
+    def put_many(
+        self, dict_version: str, tokens_by_hash: Mapping[str, Sequence[Token]]
+    ) -> dict[str, TokenStream]:
+        """形態素列を語彙 ID の配列にして保存し、本文のハッシュごとに返す."""
+        with self._lock:
+            n_strings, n_pos = len(self._strings), len(self._pos)
+            try:
+                with self._conn:
+                    # 語彙の ID を振る間は他のプロセスの書き込みを待たせる
+                    self._conn.execute("begin immediate")
+                    self._catch_up()
+                    n_strings, n_pos = len(self._strings), len(self._pos)
+                    streams = {
+                        key: self._encode(tokens)
+                        for key, tokens in tokens_by_hash.items()
+                    }
+                    self._conn.executemany(
+                        "insert into strings values (?, ?)",
+                        enumerate(self._strings[n_strings:], start=n_strings),
+                    )
+                    self._conn.executemany(
+                        "insert into pos values (?, ?)",
+                        (
+                            (i, ",".join(pos))
+                            for i, pos in enumerate(self._pos[n_pos:], start=n_pos)
+                        ),
+                    )
+                    self._conn.executemany(
+                        "insert or replace into streams values (?, ?, ?, ?, ?)",
+                        (
+                            (
+                                dict_version,
+                                key,
+                                stream.surfaces.tobytes(),
+                                stream.bases.tobytes(),
+                                stream.pos.tobytes(),
+                            )
+                            for key, stream in streams.items()
+                        ),
+                    )
+            except sqlite3.Error:
+                # 保存できなかった語彙は ID ごと捨て、次の書き込みで振り直す
+                self._truncate(n_strings, n_pos)
+                raise
+        return streams
+
+    def load_or_tokenize(
+        self,
+        texts: Sequence[str],
+        tagger: "MeCab.Tagger",
+        matcher: PhraseMatcher | None = None,
+        dict_version: str | None = None,
+    ) -> list[TokenStream]:
+        """本文ごとの形態素列を返す（保存されていない本文だけを解析して保存する）."""
+        if dict_version is None:
+            dict_version = dictionary_version(tagger, matcher)
+        hashes = [content_hash(text) for text in texts]
+        streams = self.get_many(dict_version, hashes)
+        missing = {
+            key: tokenize(text, tagger, matcher)
+            for key, text in zip(hashes, texts)
+            if key not in streams
+        }
+        if missing:
+            streams.update(self.put_many(dict_version, missing))
+        return [streams[key] for key in hashes]
+
+    def replay(
+        self,
+        streams: Sequence[TokenStream],
+        stop_rules: StopRules,
+        pos_filter: PosFilter,
+    ) -> list[list[str]]:
+        """形態素列から、`extract_nouns` と同じ規則で語を取り出す（エントリごと）."""
+        lengths = np.fromiter((len(s) for s in streams), dtype=np.int64, count=-1)
+        if not lengths.sum():
+            return [[] for _ in streams]
+        surfaces = np.concatenate([s.surfaces for s in streams])
+        bases = np.concatenate([s.bases for s in streams])
+        pos = np.concatenate([s.pos for s in streams])
+
+        # 判定は語彙 ID ごとに1回だけ求め、形態素には添字で配る
+        keep = self._mask(
+            pos, lambda i: _accepts_pos(self._pos[i], stop_rules, pos_filter)
+        )
+        keep[keep] = ~self._mask(
+            surfaces[keep],
+            lambda i: (
+                self._strings[i] == "" or stop_rules.stops_surface(self._strings[i])
+            ),
+        )
+        if stop_rules.base_forms:
+            keep[keep] = ~self._mask(
+                bases[keep], lambda i: self._strings[i] in stop_rules.base_forms
+            )
+
+        words = [self._strings[i] for i in surfaces[keep].tolist()]
+        entry_of = np.repeat(np.arange(len(streams)), lengths)
+        ends = np.cumsum(np.bincount(entry_of[keep], minlength=len(streams))).tolist()
+        return [words[start:end] for start, end in zip([0, *ends], ends)]
+
+    def _mask(
+        self, ids: npt.NDArray[np.int32], judge: Callable[[int], bool]
+    ) -> npt.NDArray[np.bool_]:
+        unique, inverse = np.unique(ids, return_inverse=True)
+        judged = np.fromiter(
+            (judge(i) for i in unique.tolist()), dtype=np.bool_, count=len(unique)
+        )
+        return judged[inverse]
+
+    def _encode(self, tokens: Sequence[Token]) -> TokenStream:
+        surfaces = np.fromiter(
+            (self._intern(surface) for surface, _, _ in tokens),
+            dtype=np.int32,
+            count=len(tokens),
+        )
+        bases = np.fromiter(
+            (self._intern(base) for _, base, _ in tokens),
+            dtype=np.int32,
+            count=len(tokens),
+        )
+        pos = np.fromiter(
+            (self._intern_pos(p) for _, _, p in tokens),
+            dtype=np.int32,
+            count=len(tokens),
+        )
+        return TokenStream(surfaces, bases, pos)
+
+    def _intern(self, value: str) -> int:
+        string_id = self._string_ids.get(value)
+        if string_id is None:
+            string_id = len(self._strings)
+            self._strings.append(value)
+            self._string_ids[value] = string_id
+        return string_id
+
+    def _intern_pos(self, value: tuple[str, ...]) -> int:
+        pos_id = self._pos_ids.get(value)
+        if pos_id is None:
+            pos_id = len(self._pos)
+            self._pos.append(value)
+            self._pos_ids[value] = pos_id
+        return pos_id
+
+    def _catch_up(self) -> None:
+        """SQLite にあってまだ読み込んでいない語彙を読み込む."""
+        for string_id, value in self._conn.execute(
+            "select id, value from strings where id >= ? order by id",
+            (len(self._strings),),
+        ):
+            assert string_id == len(self._strings)
+            self._strings.append(value)
+            self._string_ids[value] = string_id
+        for pos_id, value in self._conn.execute(
+            "select id, value from pos where id >= ? order by id", (len(self._pos),)
+        ):
+            assert pos_id == len(self._pos)
+            pos = tuple(value.split(",")) if value else ()
+            self._pos.append(pos)
+            self._pos_ids[pos] = pos_id
+
+    def _truncate(self, n_strings: int, n_pos: int) -> None:
+        for value in self._strings[n_strings:]:
+            del self._string_ids[value]
+        for value in self._pos[n_pos:]:
+            del self._pos_ids[value]
+        del self._strings[n_strings:]
+        del self._pos[n_pos:]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def _accepts_pos(
+    pos: tuple[str, ...], stop_rules: StopRules, pos_filter: PosFilter
+) -> bool:
+    return bool(pos) and pos_filter.accepts(pos) and not stop_rules.stops_pos(pos)
+
+
+_stores: dict[str, TokenStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_token_store(path: str = DEFAULT_STORE_PATH) -> TokenStore:
+    """パスごとに1つの TokenStore をプロセス内で共有して返す."""
+    with _stores_lock:
+        if path not in _stores:
+            _stores[path] = TokenStore(path)
+        return _stores[path]
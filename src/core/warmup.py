@@ -0,0 +1,248 @@
+"""サーバー起動時のウォームアップ処理を行うモジュール.
+
+デプロイ直後の最初の解析で発生する以下のコストを、バックグラウンド
+スレッドで先に支払っておく。
+
+1. pandas / plotly / MeCab などの重いモジュールの import
+2. 最近利用したユーザーのユーザー辞書のビルド（mecab-dict-index）
+3. MeCab.Tagger の生成（ipadic の読み込み）
+4. kaleido（Chrome）の起動
+
+`KE_WARMUP=true` のときだけ有効になる。進捗は `get_warmup_status()` と
+ステータスファイル（`KE_WARMUP_STATUS_FILE`）で参照でき、
+ヘルスチェックからは以下のコマンドで準備完了を待てる。
+
+    PYTHONPATH=. python3 -m src.core.warmup --wait 120
+"""
+
+import argparse
+import importlib
+import json
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+from typing import TYPE_CHECKING, Literal, TypedDict, cast
+
+from src.logs.logger import KELogger
+
+if TYPE_CHECKING:
+    from supabase import Client
+
+_log = logging.getLogger("keyword_logger")
+
+
+class AnalysisResultRow(TypedDict):
+    """analysis_result テーブルから参照する列."""
+
+    user_id: str
+
+
+StepState = Literal["pending", "running", "done", "failed"]
+
+# ウォームアップの各ステップ（実行順）
+STEPS: tuple[str, ...] = ("modules", "user_dicts", "taggers", "renderer")
+HEAVY_MODULES: tuple[str, ...] = ("pandas", "plotly.express", "MeCab", "kaleido")
+RECENT_USER_LIMIT = 20
+STATUS_FILE = os.getenv(
+    "KE_WARMUP_STATUS_FILE",
+    os.path.join(tempfile.gettempdir(), "ke_warmup_status.json"),
+)
+
+_lock = threading.Lock()
+_thread: threading.Thread | None = None
+_ready = threading.Event()
+_status: dict[str, StepState] = {step: "pending" for step in STEPS}
+
+
+def is_enabled() -> bool:
+    """環境変数でウォームアップが有効化されているかを返す."""
+    return os.getenv("KE_WARMUP") == "true"
+
+
+def start_warmup() -> bool:
+    """ウォームアップスレッドを開始する（多重起動はしない）.
+
+    Returns:
+        bool: このプロセスでウォームアップが有効なら True。
+    """
+    global _thread
+    if not is_enabled():
+        return False
+
+    with _lock:
+        if _thread is not None:
+            return True
+        _thread = threading.Thread(target=_run_warmup, name="ke-warmup", daemon=True)
+
+    # 前回プロセスの「準備完了」が残らないよう、開始時点の状態で上書きする
+    _write_status_file()
+    _thread.start()
+    return True
+
+
+def get_warmup_status() -> dict[str, object]:
+    """現在のウォームアップ状態を返す."""
+    with _lock:
+        steps = dict(_status)
+    return {"ready": _ready.is_set(), "steps": steps}
+
+
+def wait_until_ready(timeout: float | None = None) -> bool:
+    """同一プロセス内でウォームアップの完了を待つ."""
+    return _ready.wait(timeout)
+
+
+def _set_step(step: str, state: StepState) -> None:
+    with _lock:
+        _status[step] = state
+    _write_status_file()
+
+
+def _write_status_file(ready: bool | None = None) -> None:
+    """別プロセスのヘルスチェックから読めるよう状態をファイルに書き出す."""
+    payload = get_warmup_status()
+    if ready is not None:
+        payload["ready"] = ready
+    tmp_path = f"{STATUS_FILE}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(payload, f, ensure_ascii=False)
+        os.replace(tmp_path, STATUS_FILE)
+    except OSError as e:
+        _log.warning(f"ウォームアップ状態の書き出しに失敗しました: {e}")
+
+
+def _run_warmup() -> None:
+    """各ステップを順に実行する。失敗しても後続ステップは続行する."""
+    KELogger.setup()
+    KELogger.start("ウォームアップ")
+    dic_paths: list[str] = []
+
+    for step in STEPS:
+        _set_step(step, "running")
+        try:
+            if step == "modules":
+                _import_heavy_modules()
+            elif step == "user_dicts":
+                dic_paths = _prebuild_recent_user_dicts()
+            elif step == "taggers":
+                _preload_taggers(dic_paths)
+            elif step == "renderer":
+                _start_renderer()
+        except Exception as e:
+            _log.warning(f"ウォームアップ失敗 ({step}): {e}")
+            _set_step(step, "failed")
+            continue
+        _set_step(step, "done")
+
+    KELogger.end("ウォームアップ")
+    # ファイルを書き終えてから完了を通知する（待機側が古い状態を読まないように）
+    _write_status_file(ready=True)
+    _ready.set()
+
+
+def _import_heavy_modules() -> None:
+    for module_name in HEAVY_MODULES:
+        importlib.import_module(module_name)
+
+
+def _recent_user_ids(supabase: "Client", limit: int = RECENT_USER_LIMIT) -> list[str]:
+    """最近解析を実行したユーザーIDを新しい順に返す（全ユーザーの行を読める鍵で）."""
+    response = (
+        supabase.table("analysis_result")
+        .select("user_id, updated_at")
+        .order("updated_at", desc=True)
+        .limit(limit * 10)
+        .execute()
+    )
+    rows = cast(list[AnalysisResultRow], response.data or [])
+    # 順序を保ったまま重複を除く
+    user_ids = list(dict.fromkeys(str(row["user_id"]) for row in rows))
+    return user_ids[:limit]
+
+
+def _prebuild_recent_user_dicts() -> list[str]:
+    """最近のユーザーの辞書をビルドし、辞書パスの一覧を返す."""
+    from src.core.keyword_extraction import (
+        USER_DICT_MODE_MATCHER,
+        load_user_dic_path,
+        user_dict_mode,
+    )
+    from src.services.supabase_client import create_service_supabase_client
+
+    if user_dict_mode() == USER_DICT_MODE_MATCHER:
+        # 登録語は解析のたびにオートマトンにするので、システム辞書の Tagger だけでよい
+        return [""]
+
+    # 他のユーザーの解析結果・辞書は anon の鍵では読めない（行レベルセキュリティ）
+    try:
+        supabase = create_service_supabase_client()
+    except ValueError as e:
+        _log.warning(f"ユーザー辞書の事前ビルドを省きます: {e}")
+        return [""]
+
+    user_ids = _recent_user_ids(supabase)
+    if not user_ids:
+        _log.warning(
+            "最近解析したユーザーが見つからないため、ユーザー辞書を事前ビルドしません"
+        )
+        return [""]
+
+    paths: list[str] = []
+    for user_id in user_ids:
+        try:
+            paths.append(load_user_dic_path(supabase, user_id))
+        except Exception as e:
+            _log.warning(f"ユーザー辞書の事前ビルドに失敗しました ({user_id}): {e}")
+    # 同じ内容の辞書は同じパスになるので重複を除く
+    return list(dict.fromkeys(paths))
+
+
+def _preload_taggers(dic_paths: list[str]) -> None:
+    """ビルド済み辞書ごとに Tagger を生成してキャッシュに載せる."""
+    from src.core.keyword_extraction import get_tagger
+
+    for path in dic_paths:
+        get_tagger(path)
+
+
+def _start_renderer() -> None:
+    """kaleido の常駐サーバー（Chrome）を起動する."""
+    import kaleido
+
+    kaleido.start_sync_server(silence_warnings=True)
+
+
+def _read_status_file() -> dict[str, object]:
+    try:
+        with open(STATUS_FILE, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {"ready": False, "steps": {}}
+
+
+def main(argv: list[str] | None = None) -> int:
+    """ヘルスチェック用CLI。準備完了なら終了コード 0 を返す."""
+    parser = argparse.ArgumentParser(description="ウォームアップ状態の確認")
+    parser.add_argument(
+        "--wait", type=float, default=0.0, help="準備完了まで待つ最大秒数"
+    )
+    args = parser.parse_args(argv)
+
+    deadline = time.monotonic() + args.wait
+    while True:
+        status = _read_status_file()
+        if status.get("ready"):
+            print(json.dumps(status, ensure_ascii=False))
+            return 0
+        if time.monotonic() >= deadline:
+            print(json.dumps(status, ensure_ascii=False))
+            return 1
+        time.sleep(0.5)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
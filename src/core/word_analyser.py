@@ -1,38 +1,119 @@
 """形態素解析を行うモジュール."""
 
 from collections import Counter
+from collections.abc import Iterable
+from typing import TYPE_CHECKING
 
-import MeCab
+from src.core.phrase_matcher import COUNTED_PART_OF_SPEECH, PhraseMatcher
+from src.core.pos_filter import PosFilter, compile_pos_filter
+from src.core.stop_rules import StopRules, as_stop_rules
 
+if TYPE_CHECKING:
+    import MeCab
 
-def analyse_word(text: str, tagger: MeCab.Tagger, stop_words: set[str]) -> Counter[str]:
+
+def extract_nouns(
+    text: str,
+    tagger: "MeCab.Tagger",
+    stop_words: StopRules | Iterable[str],
+    pos_filter: PosFilter | None = None,
+) -> list[str]:
     """
-    文章を形態素解析し、名詞のみを抽出して頻度カウントを行う。
+    文章を形態素解析し、出現順の名詞リストを返す。
 
-    指定されたMeCab Taggerインスタンスとストップワードを考慮し、
-    名詞に限定した単語の出現回数をカウントして返す。
+    ストップワード（原形・品詞・文字種の規則を含む）と空文字は除外する。
+    共起の集計など、出現位置が必要な処理で使う。
 
     Args:
         text (str): 解析対象の文章。
         tagger (MeCab.Tagger): MeCabのTaggerインスタンス。
-        stop_words (set[str]): 除外対象のストップワード集合。
+        stop_words (StopRules | Iterable[str]): 除外対象のストップワード。
+            語の集合を渡した場合は `compile_stop_rules` でまとめてから使う。
+        pos_filter (PosFilter | None): 数える品詞（省略時は名詞すべて）。
 
     Returns:
-        Counter[str]: 名詞ごとの出現回数を表すカウンターオブジェクト。
+        list[str]: 出現順に並んだ名詞のリスト。
     """
 
+    rules = as_stop_rules(stop_words)
+    pos_filter = pos_filter or compile_pos_filter()
+    needs_features = rules.needs_features
+
     # 形態素解析を行い、結果を取得
     node = tagger.parseToNode(text)
 
-    # 名詞のみを抽出
+    # 対象の品詞のみを抽出（素性の文字列は分割せず posid で判定する）
     noun_list: list[str] = []
     while node:
-        features = node.feature.split(",")
-        if features[0] == "名詞":
-            # ストップワードに含まれず、かつ空文字でないものを抽出
-            if node.surface not in stop_words and node.surface != "":
-                noun_list.append(node.surface)
+        if pos_filter.accepts_node(node):
+            # ストップワードの規則に当たらず、かつ空文字でないものを抽出
+            surface = node.surface
+            features = node.feature.split(",") if needs_features else ()
+            if surface != "" and not (rules and rules.is_stopped(surface, features)):
+                noun_list.append(surface)
         node = node.next
 
+    return noun_list
+
+
+def extract_nouns_with_phrases(
+    text: str,
+    tagger: "MeCab.Tagger",
+    stop_words: StopRules | Iterable[str],
+    matcher: PhraseMatcher,
+    pos_filter: PosFilter | None = None,
+) -> list[str]:
+    """
+    ユーザー辞書の語を先に本文から切り出してから、残りを形態素解析する。
+
+    登録語は名詞として登録されたものだけを数え（ストップワードは除く）、
+    それ以外の区間は `extract_nouns` と同じ規則で名詞を取り出す。
+    出現順は本文の順のまま保つ。
+
+    Args:
+        text (str): 解析対象の文章。
+        tagger (MeCab.Tagger): システム辞書だけの MeCab の Tagger インスタンス。
+        stop_words (StopRules | Iterable[str]): 除外対象のストップワード。
+        matcher (PhraseMatcher): ユーザー辞書の語のオートマトン。
+        pos_filter (PosFilter | None): 数える品詞（省略時は名詞すべて）。
+
+    Returns:
+        list[str]: 出現順に並んだ名詞のリスト。
+    """
+    rules = as_stop_rules(stop_words)
+    pos_filter = pos_filter or compile_pos_filter()
+    # 登録語は品詞の細分類を持たないので、名詞として数える対象かだけを見る
+    counts_terms = pos_filter.accepts((COUNTED_PART_OF_SPEECH,))
+    noun_list: list[str] = []
+    for segment, is_term in matcher.split(text):
+        if not is_term:
+            noun_list.extend(extract_nouns(segment, tagger, rules, pos_filter))
+        elif (
+            counts_terms
+            and segment in matcher.counted
+            and not rules.is_stopped(segment, (COUNTED_PART_OF_SPEECH,))
+        ):
+            noun_list.append(segment)
+    return noun_list
+
+
+def analyse_word(
+    text: str, tagger: "MeCab.Tagger", stop_words: set[str]
+) -> Counter[str]:
+    """
+    文章を形態素解析し、名詞のみを抽出して頻度カウントを行う。
+
+    指定されたMeCab Taggerインスタンスとストップワードを考慮し、
+    名詞に限定した単語の出現回数をカウントして返す。
+
+    Args:
+        text (str): 解析対象の文章。
+        tagger (MeCab.Tagger): MeCabのTaggerインスタンス。
+        stop_words (set[str]): 除外対象のストップワード集合。
+
+    Returns:
+        Counter[str]: 名詞ごとの出現回数を表すカウンターオブジェクト。
+    """
+
     # 名詞のみをカウントして返す
-    return Counter(noun_list)
+    return Counter(extract_nouns(text, tagger, stop_words))
@@ -1,17 +1,86 @@
 import logging
+import os
+import resource
 import sys
+import threading
 import time
-from dataclasses import dataclass
+import tracemalloc
+from collections import deque
+from dataclasses import dataclass, field
 from datetime import datetime, timedelta, timezone
 from typing import ClassVar
 
+# ラベルごとに保持する処理時間の最大件数（常駐プロセスで増え続けないように）
+METRICS_MAXLEN = 10_000
+
+# "true" のとき、各段階の前後でメモリ（tracemalloc と RSS）を計測する
+MEMORY_PROFILE_ENV = "KE_MEMORY_PROFILE"
+# 段階ごとに記録する、確保量の多い箇所の件数（0 ならスナップショットを取らない）。
+# スナップショットの比較は生存オブジェクト数に比例して遅くなる
+TOP_SITES_ENV = "KE_MEMORY_TOP_SITES"
+DEFAULT_TOP_SITES = 5
+
+_MB = 1024 * 1024
+
+
+def current_rss_bytes() -> int:
+    """プロセスの現在の RSS（バイト）。/proc が無い環境ではピーク値で代用する."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return peak_rss_bytes()
+
+
+def peak_rss_bytes() -> int:
+    """プロセス開始以降のピーク RSS（バイト）."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux は KB、macOS はバイト単位
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+@dataclass
+class MemoryRecord:
+    """1段階分のメモリ計測結果.
+
+    tracemalloc はプロセス全体を追跡するため、並行に動く段階があると
+    その確保分も alloc_delta に含まれる。
+    """
+
+    label: str
+    alloc_delta: int
+    """段階の前後での Python ヒープ確保量の差（バイト）."""
+    rss_before: int
+    rss_after: int
+    peak_rss: int
+    top_sites: list[str] = field(default_factory=list)
+    """確保量が増えた箇所（ファイル:行 と増加量）の上位."""
+
+    @property
+    def rss_delta(self) -> int:
+        return self.rss_after - self.rss_before
+
 
 @dataclass
 class KELogger:
     """JST対応ロガーの設定マネージャー。"""
 
-    _start_times: ClassVar[dict[str, float]] = {}
-    """計測開始時刻を保持する辞書."""
+    _start_times: ClassVar[dict[tuple[int, str], float]] = {}
+    """計測開始時刻を保持する辞書（同じラベルの並行実行を区別するためスレッド単位）."""
+
+    _durations: ClassVar[dict[str, deque[float]]] = {}
+    """ラベルごとの処理時間（秒）の集計."""
+
+    _memory_starts: ClassVar[dict[tuple[int, str], "_MemoryStart"]] = {}
+    """メモリ計測開始時の RSS・確保量・スナップショット."""
+
+    _memory: ClassVar[dict[str, deque[MemoryRecord]]] = {}
+    """ラベルごとのメモリ計測結果の集計."""
+
+    _run = threading.local()
+    """実行（run）単位のメモリ計測結果（スレッドごと）."""
+
+    _lock: ClassVar[threading.Lock] = threading.Lock()
 
     @staticmethod
     def setup(level: int = logging.DEBUG):
@@ -44,16 +113,167 @@ class KELogger:
     @classmethod
     def start(cls, label: str = "default"):
         """計測開始。ロガーはライブラリから取得。"""
-        cls._start_times[label] = time.time()
+        key = (threading.get_ident(), label)
+        if cls.memory_profile_enabled():
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+            top_sites = int(os.getenv(TOP_SITES_ENV, DEFAULT_TOP_SITES))
+            memory_start = _MemoryStart(
+                rss=current_rss_bytes(),
+                traced=tracemalloc.get_traced_memory()[0],
+                snapshot=tracemalloc.take_snapshot() if top_sites > 0 else None,
+                top_sites=top_sites,
+            )
+            with cls._lock:
+                cls._memory_starts[key] = memory_start
+        with cls._lock:
+            cls._start_times[key] = time.time()
         logging.getLogger("keyword_logger").info(f"[{label}] 処理開始")
 
     @classmethod
-    def end(cls, label: str = "default"):
-        """計測終了。"""
-        start_time = cls._start_times.pop(label, None)
-        if start_time is None:
-            return
-        elapsed = time.time() - start_time
-        logging.getLogger("keyword_logger").info(
-            f"[{label}] 処理終了（処理時間: {elapsed:.2f}秒）"
+    def end(cls, label: str = "default", idle: float = 0.0):
+        """計測終了。処理時間（とメモリ）はラベルごとに集計される。
+
+        idle には、開始から終了までのうち他の処理を待っていた秒数を渡す
+        （処理時間から除く）。
+        """
+        key = (threading.get_ident(), label)
+        with cls._lock:
+            start_time = cls._start_times.pop(key, None)
+            memory_start = cls._memory_starts.pop(key, None)
+            if start_time is None:
+                return
+            elapsed = time.time() - start_time - idle
+            cls._durations.setdefault(label, deque(maxlen=METRICS_MAXLEN)).append(
+                elapsed
+            )
+        logger = logging.getLogger("keyword_logger")
+        if idle > 0:
+            logger.info(
+                f"[{label}] 処理終了"
+                f"（処理時間: {elapsed:.2f}秒、待ち {idle:.2f}秒を除く）"
+            )
+        else:
+            logger.info(f"[{label}] 処理終了（処理時間: {elapsed:.2f}秒）")
+
+        if memory_start is not None and tracemalloc.is_tracing():
+            record = _memory_record(label, memory_start)
+            with cls._lock:
+                cls._memory.setdefault(label, deque(maxlen=METRICS_MAXLEN)).append(
+                    record
+                )
+            run_records = getattr(cls._run, "records", None)
+            if run_records is not None:
+                run_records.append(record)
+            logger.info(
+                f"[{label}] メモリ: 確保 {record.alloc_delta / _MB:+.1f}MB / "
+                f"RSS {record.rss_before / _MB:.1f}→{record.rss_after / _MB:.1f}MB "
+                f"(ピーク {record.peak_rss / _MB:.1f}MB)"
+            )
+            for site in record.top_sites:
+                logger.debug(f"[{label}]   {site}")
+
+    @staticmethod
+    def memory_profile_enabled() -> bool:
+        """KE_MEMORY_PROFILE=true のときメモリ計測を行う."""
+        return os.getenv(MEMORY_PROFILE_ENV) == "true"
+
+    @classmethod
+    def begin_run(cls):
+        """このスレッドでの実行単位のメモリレポートを開始する."""
+        cls._run.records = []
+
+    @classmethod
+    def end_run(cls, title: str = "run") -> list[MemoryRecord]:
+        """実行単位のメモリレポートをログに出して返す（計測していなければ空）."""
+        records: list[MemoryRecord] = getattr(cls._run, "records", None) or []
+        cls._run.records = None
+        if records:
+            logger = logging.getLogger("keyword_logger")
+            logger.info(f"--- メモリレポート: {title} ---")
+            for r in records:
+                logger.info(
+                    f"{r.label}: 確保 {r.alloc_delta / _MB:+.2f}MB, "
+                    f"RSS {r.rss_delta / _MB:+.2f}MB"
+                )
+            logger.info(f"ピーク RSS: {peak_rss_bytes() / _MB:.1f}MB")
+        return records
+
+    @classmethod
+    def current_run(cls) -> list[MemoryRecord] | None:
+        """このスレッドで実行中の run の記録先（begin_run していなければ None）."""
+        return getattr(cls._run, "records", None)
+
+    @classmethod
+    def join_run(cls, records: list[MemoryRecord] | None):
+        """別スレッドの run の記録先をこのスレッドでも使う（作業スレッド用）."""
+        cls._run.records = records
+
+    @classmethod
+    def record(cls, label: str, seconds: float):
+        """start/end で計測しない値（並行化による短縮時間など）を集計に加える."""
+        with cls._lock:
+            cls._durations.setdefault(label, deque(maxlen=METRICS_MAXLEN)).append(
+                seconds
+            )
+
+    @classmethod
+    def get_metrics(cls) -> dict[str, list[float]]:
+        """ラベルごとの処理時間（秒）の一覧を返す."""
+        with cls._lock:
+            return {label: list(values) for label, values in cls._durations.items()}
+
+    @classmethod
+    def get_memory_metrics(cls) -> dict[str, list[MemoryRecord]]:
+        """ラベルごとのメモリ計測結果の一覧を返す."""
+        with cls._lock:
+            return {label: list(records) for label, records in cls._memory.items()}
+
+    @classmethod
+    def reset_metrics(cls):
+        """集計した処理時間とメモリ計測結果を破棄する."""
+        with cls._lock:
+            cls._durations.clear()
+            cls._memory.clear()
+
+
+@dataclass
+class _MemoryStart:
+    rss: int
+    traced: int
+    snapshot: tracemalloc.Snapshot | None
+    top_sites: int
+
+
+# 計測自体による確保は上位箇所から除く
+_IGNORED_FILES = (tracemalloc.__file__, "<frozen importlib._bootstrap>", "<unknown>")
+
+
+def _memory_record(label: str, start: _MemoryStart) -> MemoryRecord:
+    """開始時との差分から計測結果を作る."""
+    top_sites: list[str] = []
+    if start.snapshot is not None:
+        stats = tracemalloc.take_snapshot().compare_to(start.snapshot, "lineno")
+        grown = sorted(
+            (
+                stat
+                for stat in stats
+                if stat.size_diff > 0
+                and stat.traceback[0].filename not in _IGNORED_FILES
+            ),
+            key=lambda stat: stat.size_diff,
+            reverse=True,
         )
+        top_sites = [
+            f"{stat.traceback[0].filename}:{stat.traceback[0].lineno} "
+            f"{stat.size_diff / 1024:+,.1f}KiB ({stat.count_diff:+d} blocks)"
+            for stat in grown[: start.top_sites]
+        ]
+    return MemoryRecord(
+        label=label,
+        alloc_delta=tracemalloc.get_traced_memory()[0] - start.traced,
+        rss_before=start.rss,
+        rss_after=current_rss_bytes(),
+        peak_rss=peak_rss_bytes(),
+        top_sites=top_sites,
+    )
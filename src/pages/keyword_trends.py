@@ -0,0 +1,108 @@
+"""キーワードの上昇・下降トレンドを表示するページモジュール."""
+
+from typing import TypedDict, cast
+
+import streamlit as st
+
+from src.services import get_supabase_client, require_login
+
+
+# 記録データの型定義
+class KeywordTrendEntry(TypedDict):
+    target_month: str
+    word: str
+    count: int
+    delta: int
+    moving_avg: float
+    growth_score: float
+
+
+# 表示する件数
+SHOW_N = 10
+
+# ログイン必須
+require_login()
+supabase = get_supabase_client()
+user_id = st.session_state.user.id
+
+st.title("キーワードの推移")
+
+
+# --- データ取得ロジック ---
+@st.cache_data(ttl=60)
+def fetch_trend_months(u_id: str) -> list[str]:
+    """推移が計算済みの月を新しい順に取得."""
+    response = (
+        supabase.table("monthly_keywords")
+        .select("target_month")
+        .eq("user_id", u_id)
+        .order("target_month", desc=True)
+        .execute()
+    )
+    rows = cast(list[dict[str, str]], response.data or [])
+    return list(dict.fromkeys(row["target_month"] for row in rows))
+
+
+@st.cache_data(ttl=60)
+def fetch_trends(u_id: str, month: str) -> list[KeywordTrendEntry]:
+    """指定月の推移を成長スコア順に1回のクエリで取得."""
+    try:
+        response = (
+            supabase.table("keyword_trends")
+            .select("target_month, word, count, delta, moving_avg, growth_score")
+            .eq("user_id", u_id)
+            .eq("target_month", month)
+            .order("growth_score", desc=True)
+            .execute()
+        )
+        return cast(list[KeywordTrendEntry], response.data or [])
+    except Exception as e:
+        st.error(f"データ取得に失敗しました: {e}")
+        return []
+
+
+months = fetch_trend_months(user_id)
+if not months:
+    st.info("推移を表示できる記録がまだありません。メイン画面から解析してください。")
+    st.stop()
+
+selected_month = st.selectbox("表示する月を選択", options=months)
+trends = fetch_trends(user_id, selected_month)
+
+
+def _to_table(entries: list[KeywordTrendEntry]) -> list[dict[str, object]]:
+    return [
+        {
+            "キーワード": e["word"],
+            "出現回数": e["count"],
+            "前月差": e["delta"],
+            "移動平均": e["moving_avg"],
+            "成長スコア": e["growth_score"],
+        }
+        for e in entries
+    ]
+
+
+rising = [e for e in trends if e["delta"] > 0][:SHOW_N]
+fading = sorted((e for e in trends if e["delta"] < 0), key=lambda e: e["growth_score"])[
+    :SHOW_N
+]
+
+col_up, col_down = st.columns(2)
+with col_up:
+    st.subheader("📈 上昇")
+    if rising:
+        st.table(_to_table(rising))
+    else:
+        st.write("上昇したキーワードはありません。")
+with col_down:
+    st.subheader("📉 下降")
+    if fading:
+        st.table(_to_table(fading))
+    else:
+        st.write("下降したキーワードはありません。")
+
+st.caption(
+    "※推移は解析を実行するたびに全期間分が再計算されます。"
+    "全件の出現回数を保存する前に解析した月は、解析し直すと推移に含まれます。"
+)
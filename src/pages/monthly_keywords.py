@@ -4,6 +4,7 @@ from typing import TypedDict, cast
 
 import streamlit as st
 
+from src.core.textrank import RANKER_FREQUENCY, RANKER_LABELS, RANKER_VALUE_LABELS
 from src.services import get_supabase_client, require_login
 
 
@@ -13,6 +14,7 @@ class MonthlyKeywordEntry(TypedDict):
     target_month: str
     word: str
     count: int
+    ranker: str | None
 
 
 # ログイン必須
@@ -20,16 +22,6 @@ require_login()
 supabase = get_supabase_client()
 user_id = st.session_state.user.id
 
-# --- ヘッダーエリア ---
-col_title, col_btn = st.columns([4, 1])
-with col_title:
-    st.title("過去の解析記録")
-with col_btn:
-    st.write("")
-    if st.button("🔄 更新", use_container_width=True):
-        st.cache_data.clear()
-        st.rerun()
-
 
 # --- データ取得ロジック ---
 @st.cache_data(ttl=60)
@@ -38,7 +30,7 @@ def fetch_monthly_history(u_id: str) -> list[MonthlyKeywordEntry]:
     try:
         response = (
             supabase.table("monthly_keywords")
-            .select("id, target_month, word, count")
+            .select("id, target_month, word, count, ranker")
             .eq("user_id", u_id)
             .order("target_month", desc=True)
             .order("count", desc=True)
@@ -50,7 +42,30 @@ def fetch_monthly_history(u_id: str) -> list[MonthlyKeywordEntry]:
         return []
 
 
-history_data = fetch_monthly_history(user_id)
+# --- ヘッダーエリア ---
+col_title, col_btn = st.columns([4, 1])
+with col_title:
+    st.title("過去の解析記録")
+with col_btn:
+    st.write("")
+    if st.button("🔄 更新", use_container_width=True):
+        # 他のユーザーのキャッシュは残し、自分の履歴だけ取り直す
+        fetch_monthly_history.clear(user_id)
+        st.rerun()
+
+
+ranker = st.radio(
+    "順位付けの方法",
+    options=list(RANKER_LABELS),
+    format_func=RANKER_LABELS.__getitem__,
+    horizontal=True,
+)
+# ranker 列の無い古い記録は出現回数の順位とみなす
+history_data = [
+    item
+    for item in fetch_monthly_history(user_id)
+    if (item.get("ranker") or RANKER_FREQUENCY) == ranker
+]
 
 if not history_data:
     st.info("過去の解析記録はまだありません。メイン画面から解析を実行してください。")
@@ -87,7 +102,7 @@ for month in months_in_year:
         st.markdown(f"### 📍 {month_label}")
 
         display_list = [
-            {"キーワード": item["word"], "出現回数": item["count"]}
+            {"キーワード": item["word"], RANKER_VALUE_LABELS[ranker]: item["count"]}
             for item in month_data
         ]
 
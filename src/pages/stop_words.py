@@ -1,14 +1,25 @@
-from typing import TypedDict, cast
-
 import streamlit as st
 
+from src.core.normalizer import normalize_word
 from src.services import get_supabase_client, require_login
+from src.services.bulk_ops import (
+    dedupe_words,
+    delete_by_ids,
+    find_existing_words,
+    insert_in_batches,
+    parse_word_list,
+    select_word_updates,
+    upsert_in_batches,
+)
+from src.services.paged_table import (
+    DELETE_COLUMN,
+    diff_edits,
+    fetch_page,
+    page_navigation,
+    page_query_controls,
+)
 
-
-class StopWordEntry(TypedDict):
-    id: int  # または UUID なら str
-    word: str
-
+TABLE_KEY = "stop_words"
 
 # ログインを必須にする
 require_login()
@@ -18,41 +29,31 @@ supabase = get_supabase_client()
 
 # ログイン中のユーザー情報
 user = st.session_state.user
+user_id = str(user.id)
 
 st.title("ストップワード管理")
 
 
-# データ取得: 内部で型を確定させてから返す
-@st.cache_data(ttl=60)
-def fetch_stop_words() -> list[StopWordEntry]:
-    user_id = st.session_state.user.id
-    response = (
-        supabase.table("stop_words").select("id, word").eq("user_id", user_id).execute()
+# 一括追加: 既存・入力内の重複を除いてからまとめて insert する
+def add_stop_words(words: list[str]) -> int:
+    candidates = dedupe_words(words, existing=[])
+    new_words = dedupe_words(
+        candidates, find_existing_words(supabase, "stop_words", user_id, candidates)
     )
-
-    res_data = response.data
-    if isinstance(res_data, list):
-        # 外部の JSON 型を StopWordEntry 型に変換して返す
-        return cast(list[StopWordEntry], res_data)
-    return []
-
-
-# 追加
-def add_stop_word(word: str) -> None:
-    user_id = st.session_state.user.id
-    supabase.table("stop_words").insert({"user_id": user_id, "word": word}).execute()
-
-
-# 削除
-def delete_stop_word(word_id: int) -> None:
-    supabase.table("stop_words").delete().eq("id", word_id).eq(
-        "user_id", st.session_state.user.id
-    ).execute()
-
-
-# 現在のストップワード一覧を取得
-stop_words = fetch_stop_words()
-existing_words = {str(entry["word"]) for entry in stop_words}
+    if not new_words:
+        return 0
+
+    progress = st.progress(0.0, text="追加中...")
+    added = insert_in_batches(
+        supabase,
+        "stop_words",
+        [{"user_id": user_id, "word": w} for w in new_words],
+        on_progress=lambda done, total: progress.progress(
+            done / total, text=f"追加中... {done}/{total}"
+        ),
+    )
+    progress.empty()
+    return added
 
 
 if "input_key_version" not in st.session_state:
@@ -64,34 +65,87 @@ new_word = st.text_input(
     "ストップワードを追加",
     key=input_key,
     placeholder="ストップワードを入力してください",
+    help=(
+        "語のほかに規則も登録できます。"
+        "`原形:言う`（活用形もまとめて除外）、"
+        "`品詞:名詞-非自立`（品詞・細分類で除外）、"
+        "`@数字` `@1文字` `@ひらがな` `@カタカナ` `@英字` `@記号`"
+        "（その文字種だけの語を除外）"
+    ),
 )
 
 
 if st.button("追加する") and new_word:
-    cleaned_word = new_word.strip()
-    if cleaned_word in existing_words:
+    cleaned_word = normalize_word(new_word)
+    if add_stop_words([cleaned_word]) == 0:
         st.warning(f"「{cleaned_word}」は既に追加されています")
     else:
-        add_stop_word(cleaned_word)
         st.success(f"「{cleaned_word}」を追加しました")
         # キーを変えてウィジェットを新規生成 → 入力欄リセット効果
         st.session_state.input_key_version += 1
-        st.cache_data.clear()
-        st.session_state["new_word_input"] = ""
         st.rerun()
 
 
-# ストップワード表示
-stop_words_sorted = sorted(stop_words, key=lambda x: x["word"])
-for entry in stop_words_sorted:
-    word = str(entry["word"])
-    word_id = int(entry["id"])
-
-    col1, col2 = st.columns([8, 1])
-    with col1:
-        st.write(word)
-    with col2:
-        if st.button("削除", key=f"del_{word_id}"):
-            delete_stop_word(word_id)
-            st.cache_data.clear()
+with st.expander("まとめて追加（貼り付け・ファイル）"):
+    pasted = st.text_area(
+        "1行に1語（カンマ・読点区切りも可）",
+        key=f"bulk_input_{st.session_state.input_key_version}",
+    )
+    uploaded = st.file_uploader("テキスト / CSV ファイル", type=["txt", "csv"])
+
+    if st.button("まとめて追加する"):
+        words = parse_word_list(pasted)
+        if uploaded is not None:
+            words += parse_word_list(uploaded.getvalue().decode("utf-8-sig"))
+
+        added = add_stop_words(words)
+        skipped = len(words) - added
+        if added:
+            st.session_state.input_key_version += 1
+            st.session_state.bulk_result = f"{added}件追加しました（重複 {skipped}件）"
             st.rerun()
+        else:
+            st.warning("追加できる新しいストップワードがありません")
+
+if "bulk_result" in st.session_state:
+    st.success(st.session_state.pop("bulk_result"))
+
+
+# 登録済みの一覧: 検索・並べ替え・ページ分割はサーバー側で行い、1ページ分だけ描く
+st.subheader("登録済みのストップワード")
+query = page_query_controls(
+    TABLE_KEY, {"word": "ストップワード", "id": "登録順"}, "ストップワードを検索"
+)
+page = fetch_page(supabase, "stop_words", user_id, "id, word", "word", query)
+
+edited = st.data_editor(
+    [{**row, DELETE_COLUMN: False} for row in page.rows],
+    column_config={
+        "id": None,
+        "word": st.column_config.TextColumn("ストップワード", required=True),
+        DELETE_COLUMN: st.column_config.CheckboxColumn(DELETE_COLUMN, width="small"),
+    },
+    hide_index=True,
+    use_container_width=True,
+    key=f"{TABLE_KEY}_editor_{page.query}_{st.session_state.input_key_version}",
+)
+page_navigation(TABLE_KEY, page)
+
+edits = diff_edits(page.rows, edited, ["word"])
+if st.button("変更を保存", disabled=not edits):
+    updates = [
+        {"id": row["id"], "user_id": user_id, "word": normalize_word(row["word"])}
+        for row in edits.updated_rows
+    ]
+    # 削除してから重複を確かめる（削除する行の語への書き換えも通す）
+    delete_by_ids(supabase, "stop_words", user_id, edits.deleted_ids)
+    valid = select_word_updates(supabase, "stop_words", user_id, updates)
+    upsert_in_batches(supabase, "stop_words", valid)
+    st.session_state.input_key_version += 1
+    message = f"削除 {len(edits.deleted_ids)}件・更新 {len(valid)}件を保存しました"
+    if len(valid) < len(updates):
+        message += (
+            f"（空欄・重複のため {len(updates) - len(valid)}件は更新していません）"
+        )
+    st.session_state.bulk_result = message
+    st.rerun()
@@ -1,39 +1,49 @@
-import re
-from typing import TypedDict, cast
+import io
 
 import streamlit as st
 
+from src.core.normalizer import normalize_word
+from src.services.bulk_ops import (
+    delete_by_ids,
+    fetch_normalized_keys,
+    upsert_in_batches,
+)
+from src.services.paged_table import (
+    DELETE_COLUMN,
+    diff_edits,
+    fetch_page,
+    iter_all_rows,
+    page_navigation,
+    page_query_controls,
+)
 from src.services.supabase_auth import get_supabase_client, require_login
-
-
-class UserDictEntry(TypedDict):
-    id: int
-    word: str
-    reading: str
-
+from src.services.user_dict_io import (
+    USER_DICT_COLUMNS,
+    ImportResult,
+    export_user_dict_csv,
+    import_user_dict,
+    is_katakana,
+    iter_csv_rows,
+)
+
+TABLE_KEY = "user_dict"
+EDITABLE_COLUMNS = ["word", "part_of_speech", "reading", "pronunciation"]
 
 require_login()
 
 supabase = get_supabase_client()
-user_id = st.session_state.user.id
+user_id = str(st.session_state.user.id)
 
 st.title("ユーザー辞書")
 
+if "user_dict_version" not in st.session_state:
+    st.session_state.user_dict_version = 0
 
-@st.cache_data(ttl=60)
-def fetch_user_dict() -> list[UserDictEntry]:
-    """DBから辞書を取得し、具体的な型を付けて返す。"""
-    response = (
-        supabase.table("user_dict")
-        .select("id, word, reading")
-        .eq("user_id", user_id)
-        .execute()
-    )
-    res_data = response.data
-    if isinstance(res_data, list):
-        # 戻り値の型に合わせてキャスト
-        return cast(list[UserDictEntry], res_data)
-    return []
+
+def is_registered(word: str, reading: str) -> bool:
+    """その単語と読みの組み合わせが登録済みか（登録済みの側も正規化して比べる）."""
+    stored = fetch_normalized_keys(supabase, "user_dict", user_id, ["word", "reading"])
+    return (word, reading) in stored
 
 
 def add_user_entry(word: str, reading: str) -> None:
@@ -49,15 +59,24 @@ def add_user_entry(word: str, reading: str) -> None:
     ).execute()
 
 
-def delete_user_entry(entry_id: int) -> None:
-    supabase.table("user_dict").delete().eq("id", entry_id).eq(
-        "user_id", user_id
-    ).execute()
+def rebuild_user_dic() -> None:
+    """取り込み後に辞書を一度だけビルドしておく（次回の解析はキャッシュを使う）."""
+    # MeCab を読み込むため、必要になったときだけ import する
+    from src.core.keyword_extraction import load_user_dic_path
 
+    try:
+        load_user_dic_path(supabase, user_id)
+    except Exception as e:
+        st.warning(f"辞書のビルドに失敗しました。次回の解析時に再試行します: {e}")
+
+
+def refresh_user_dict(message: str | None = None) -> None:
+    """一覧の編集状態を捨てて再描画する."""
+    st.session_state.user_dict_version += 1
+    if message:
+        st.session_state.import_result = message
+    st.rerun()
 
-# 呼び出し側
-user_dict = fetch_user_dict()
-existing_entries = {(str(e["word"]), str(e["reading"])) for e in user_dict}
 
 col1, col2 = st.columns(2)
 with col1:
@@ -66,32 +85,120 @@ with col2:
     new_reading = st.text_input("読み（例：キホンジョウホウギジュツシャシケン）")
 
 if st.button("追加する") and new_word and new_reading:
-    cleaned = (new_word.strip(), new_reading.strip())
-    if cleaned in existing_entries:
-        st.warning("その単語と読みの組み合わせは既に登録されています")
-    elif not re.fullmatch(r"[ァ-ンヴー]+", cleaned[1]):
+    cleaned = (normalize_word(new_word), normalize_word(new_reading))
+    if not is_katakana(cleaned[1]):
         st.warning("読みはカタカナで入力してください")
+    elif is_registered(*cleaned):
+        st.warning("その単語と読みの組み合わせは既に登録されています")
     else:
         add_user_entry(*cleaned)
-        st.success(f"{cleaned[0]} を辞書に追加しました")
-        st.cache_data.clear()
-        st.rerun()
+        refresh_user_dict(f"{cleaned[0]} を辞書に追加しました")
 
+with st.expander("CSV で取り込み・書き出し"):
+    st.caption(
+        "1行に「単語,品詞,読み,発音」または「単語,読み」。"
+        "読みはカタカナで入力してください（ヘッダー行は省略可）。"
+    )
+    uploaded = st.file_uploader("辞書 CSV", type=["csv"])
+
+    if st.button("取り込む", disabled=uploaded is None) and uploaded is not None:
+        progress = st.progress(0.0, text="取り込み中...")
+        csv_file = uploaded
+        total_bytes = max(csv_file.size, 1)
+
+        def show_progress(result: ImportResult) -> None:
+            done = min(csv_file.tell() / total_bytes, 1.0)
+            progress.progress(done, text=f"取り込み中... {result.read}行")
+
+        # ファイル全体をデコードせず、1行ずつ読みながら検証する
+        stream = io.TextIOWrapper(csv_file, encoding="utf-8-sig", newline="")
+        result = import_user_dict(
+            supabase, user_id, iter_csv_rows(stream), on_progress=show_progress
+        )
+        progress.empty()
+
+        if result.added:
+            rebuild_user_dic()
+            refresh_user_dict(
+                f"{result.added}件追加しました（スキップ {result.skipped}件、"
+                f"うち読みがカタカナでない行 {result.invalid_reading}件）"
+            )
+        else:
+            st.warning(
+                f"追加できる新しいエントリがありません（{result.read}行を確認、"
+                f"うち読みがカタカナでない行 {result.invalid_reading}件）"
+            )
+
+    # 書き出しは全件を読むため、ボタンを押したときだけ作る
+    if st.button("CSV を作成"):
+        columns = ", ".join(USER_DICT_COLUMNS)
+        rows = iter_all_rows(supabase, "user_dict", user_id, columns)
+        st.session_state.user_dict_csv = export_user_dict_csv(rows)
+    if "user_dict_csv" in st.session_state:
+        st.download_button(
+            "CSV をダウンロード",
+            data=st.session_state.user_dict_csv,
+            file_name="user_dict.csv",
+            mime="text/csv",
+        )
+
+if "import_result" in st.session_state:
+    st.success(st.session_state.pop("import_result"))
+
+# 登録済みの一覧: 検索・並べ替え・ページ分割はサーバー側で行い、1ページ分だけ描く
 st.subheader("登録済みの単語")
-
-user_dict_sorted = sorted(user_dict, key=lambda x: str(x["word"]))
-for entry in user_dict_sorted:
-    word = str(entry["word"])
-    reading = str(entry["reading"])
-    entry_id = int(entry["id"])
-
-    col1, col2, col3 = st.columns([4, 4, 1])
-    with col1:
-        st.write(word)
-    with col2:
-        st.write(reading)
-    with col3:
-        if st.button("削除", key=f"del_{entry_id}"):
-            delete_user_entry(entry_id)
-            st.cache_data.clear()
-            st.rerun()
+query = page_query_controls(
+    TABLE_KEY, {"word": "単語", "reading": "読み", "id": "登録順"}, "単語を検索"
+)
+columns = "id, " + ", ".join(EDITABLE_COLUMNS)
+page = fetch_page(supabase, "user_dict", user_id, columns, "word", query)
+
+edited = st.data_editor(
+    [{**row, DELETE_COLUMN: False} for row in page.rows],
+    column_config={
+        "id": None,
+        "word": st.column_config.TextColumn("単語", required=True),
+        "part_of_speech": st.column_config.TextColumn("品詞", required=True),
+        "reading": st.column_config.TextColumn("読み", required=True),
+        "pronunciation": st.column_config.TextColumn("発音", required=True),
+        DELETE_COLUMN: st.column_config.CheckboxColumn(DELETE_COLUMN, width="small"),
+    },
+    column_order=[*EDITABLE_COLUMNS, DELETE_COLUMN],
+    hide_index=True,
+    use_container_width=True,
+    key=f"{TABLE_KEY}_editor_{page.query}_{st.session_state.user_dict_version}",
+)
+page_navigation(TABLE_KEY, page)
+
+edits = diff_edits(page.rows, edited, EDITABLE_COLUMNS)
+if st.button("変更を保存", disabled=not edits):
+    # 編集後の行全体を正規化し、読み・発音がカタカナのものだけを送る
+    originals = {int(row["id"]): row for row in page.rows}
+    updates = []
+    for change in edits.updated_rows:
+        row = {**originals[change["id"]], **change}
+        updates.append(
+            {
+                "id": change["id"],
+                "user_id": user_id,
+                **{c: normalize_word(str(row[c] or "")) for c in EDITABLE_COLUMNS},
+            }
+        )
+    valid = [
+        row
+        for row in updates
+        if row["word"]
+        and row["part_of_speech"]
+        and is_katakana(row["reading"])
+        and is_katakana(row["pronunciation"])
+    ]
+
+    delete_by_ids(supabase, "user_dict", user_id, edits.deleted_ids)
+    upsert_in_batches(supabase, "user_dict", valid)
+    message = f"削除 {len(edits.deleted_ids)}件・更新 {len(valid)}件を保存しました"
+    if len(valid) < len(updates):
+        message += (
+            f"（読み・発音がカタカナでない {len(updates) - len(valid)}件は"
+            "更新していません）"
+        )
+    refresh_user_dict(message)
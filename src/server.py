@@ -0,0 +1,26 @@
+"""ウォームアップ付きで Streamlit サーバーを起動するエントリーポイント.
+
+    PYTHONPATH=. python3 -m src.server --server.port=8501
+
+ウォームアップはサーバーと同じプロセスのバックグラウンドスレッドで走るため、
+事前に生成した Tagger のキャッシュをそのまま解析で再利用できる。
+"""
+
+import os
+import sys
+
+from streamlit.web import cli as stcli
+
+from src.core.warmup import start_warmup
+
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py")
+
+
+def main() -> None:
+    start_warmup()
+    sys.argv = ["streamlit", "run", APP_PATH, *sys.argv[1:]]
+    sys.exit(stcli.main())
+
+
+if __name__ == "__main__":
+    main()
@@ -1,18 +1,67 @@
-"""各種APIを取得するためのパッケージ."""
+"""各種APIを取得するためのパッケージ.
 
-from src.services.history_maker import (
-    save_monthly_top_keywords,
-    save_monthly_top_keywords_local,
-)
-from src.services.notion_handler import fetch_good_things
-from src.services.supabase_auth import require_login, show_login
-from src.services.supabase_client import get_supabase_client
+supabase / notion_client / streamlit などの重い依存は、属性へ最初に
+アクセスしたときに初めて読み込まれる（PEP 562 の遅延インポート）。
+"""
+
+import importlib
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from src.services.global_keywords import refresh_global_keywords
+    from src.services.history_maker import (
+        save_monthly_keyword_counts,
+        save_monthly_top_keywords,
+        save_monthly_top_keywords_local,
+    )
+    from src.services.notion_handler import (
+        fetch_good_things,
+        fetch_good_things_entries,
+        iter_good_things_entries,
+    )
+    from src.services.supabase_auth import require_login, show_login
+    from src.services.supabase_client import get_supabase_client
+    from src.services.trend_engine import refresh_keyword_trends
+
+# 公開名 → 定義モジュール
+_LAZY_ATTRS: dict[str, str] = {
+    "fetch_good_things": "src.services.notion_handler",
+    "fetch_good_things_entries": "src.services.notion_handler",
+    "iter_good_things_entries": "src.services.notion_handler",
+    "get_supabase_client": "src.services.supabase_client",
+    "require_login": "src.services.supabase_auth",
+    "show_login": "src.services.supabase_auth",
+    "save_monthly_top_keywords": "src.services.history_maker",
+    "save_monthly_keyword_counts": "src.services.history_maker",
+    "save_monthly_top_keywords_local": "src.services.history_maker",
+    "refresh_keyword_trends": "src.services.trend_engine",
+    "refresh_global_keywords": "src.services.global_keywords",
+}
 
 __all__ = [
     "fetch_good_things",
+    "fetch_good_things_entries",
+    "iter_good_things_entries",
     "get_supabase_client",
     "require_login",
     "show_login",
     "save_monthly_top_keywords",
+    "save_monthly_keyword_counts",
     "save_monthly_top_keywords_local",
+    "refresh_keyword_trends",
+    "refresh_global_keywords",
 ]
+
+
+def __getattr__(name: str) -> Any:
+    """公開名へのアクセス時に定義モジュールを読み込む."""
+    module_name = _LAZY_ATTRS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name), name)
+    globals()[name] = value  # 2回目以降は通常の属性参照で解決させる
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted(list(globals()) + __all__)
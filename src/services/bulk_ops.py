@@ -0,0 +1,196 @@
+"""Supabase テーブルへの一括追加・一括削除を行うモジュール.
+
+ページから1件ずつ insert / delete すると、数千件の登録で数千回の往復になる。
+ここではクライアント側で重複を除いたうえで、一定件数ごとにまとめて送る。
+"""
+
+import re
+from collections.abc import Callable, Iterable, Iterator, Mapping, Sequence
+from itertools import islice
+from typing import TYPE_CHECKING, Any, TypeVar, cast
+
+from src.core.normalizer import normalize_word
+
+if TYPE_CHECKING:
+    from postgrest.types import JSON
+
+    from src.services.history_maker import SupabaseClientLike
+
+T = TypeVar("T")
+
+# 1回の insert で送る最大行数
+INSERT_BATCH_SIZE = 1000
+# 1回の delete / 存在確認で送る最大件数（`in.(...)` は URL に載るため控えめにする）
+DELETE_BATCH_SIZE = 200
+# 登録済みの値を全件読むときの1リクエストの行数
+SCAN_BATCH_SIZE = 1000
+
+# 一括入力の区切り文字（改行・タブ・カンマ・読点）
+_WORD_SEPARATOR_PATTERN = re.compile(r"[\r\n\t,，、]+")
+
+
+def parse_word_list(text: str) -> list[str]:
+    """貼り付け・アップロードされた単語リストを分割し、正規化して順に返す."""
+    words = (normalize_word(w) for w in _WORD_SEPARATOR_PATTERN.split(text))
+    return [w for w in words if w]
+
+
+def dedupe_words(words: Iterable[str], existing: Iterable[str]) -> list[str]:
+    """既存の単語と入力内の重複を除き、初出順に返す（比較は正規化後の表記）."""
+    seen = {normalize_word(w) for w in existing}
+    unique: list[str] = []
+    for word in words:
+        key = normalize_word(word)
+        if key and key not in seen:
+            seen.add(key)
+            unique.append(key)
+    return unique
+
+
+def batched(items: Iterable[T], size: int) -> Iterator[list[T]]:
+    """size 件ずつのリストに区切って返す."""
+    iterator = iter(items)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def insert_in_batches(
+    client: "SupabaseClientLike",
+    table: str,
+    rows: Sequence[Mapping[str, "JSON"]],
+    batch_size: int = INSERT_BATCH_SIZE,
+    on_progress: Callable[[int, int], object] | None = None,
+) -> int:
+    """rows を batch_size 件ずつ insert する.
+
+    Args:
+        on_progress: バッチを送るたびに (送信済み件数, 全件数) で呼ばれる。
+
+    Returns:
+        int: insert した行数。
+    """
+    done = 0
+    for batch in batched(rows, batch_size):
+        client.table(table).insert(batch).execute()
+        done += len(batch)
+        if on_progress is not None:
+            on_progress(done, len(rows))
+    return done
+
+
+def upsert_in_batches(
+    client: "SupabaseClientLike",
+    table: str,
+    rows: Sequence[Mapping[str, "JSON"]],
+    batch_size: int = INSERT_BATCH_SIZE,
+    on_conflict: str = "",
+) -> int:
+    """編集した行（id 付き）を batch_size 件ずつ upsert し、送った行数を返す.
+
+    on_conflict には id 以外で行を見分ける列（カンマ区切り）を指定できる。
+    """
+    done = 0
+    for batch in batched(rows, batch_size):
+        client.table(table).upsert(batch, on_conflict=on_conflict).execute()
+        done += len(batch)
+    return done
+
+
+def _iter_user_rows(
+    client: "SupabaseClientLike",
+    table: str,
+    user_id: str,
+    columns: Sequence[str],
+    page_size: int,
+) -> Iterator[dict[str, Any]]:
+    """ユーザーの全行の id と columns を ID 順に page_size 件ずつ読みながら返す."""
+    last_id = 0
+    while True:
+        response = (
+            client.table(table)
+            .select(",".join(("id", *columns)))
+            .eq("user_id", user_id)
+            .gt("id", last_id)
+            .order("id")
+            .limit(page_size)
+            .execute()
+        )
+        rows = cast(list[dict[str, Any]], response.data or [])
+        yield from rows
+        if len(rows) < page_size:
+            return
+        last_id = rows[-1]["id"]
+
+
+def fetch_normalized_keys(
+    client: "SupabaseClientLike",
+    table: str,
+    user_id: str,
+    columns: Sequence[str],
+    page_size: int = SCAN_BATCH_SIZE,
+) -> set[tuple[str, ...]]:
+    """ユーザーの全行の columns を読み、`normalize_word` した値の組の集合を返す.
+
+    正規化を入れる前に保存された値（`ＡＩ` など）は、正規化した候補で
+    `in.(...)` を問い合わせても一致しない。重複確認では、必要な列だけを
+    ID 順に page_size 件ずつ読み、手元で正規化してから照合する。
+    """
+    rows = _iter_user_rows(client, table, user_id, columns, page_size)
+    return {tuple(normalize_word(str(r[c])) for c in columns) for r in rows}
+
+
+def find_existing_words(
+    client: "SupabaseClientLike", table: str, user_id: str, words: Iterable[str]
+) -> set[str]:
+    """words のうち登録済みのもの（正規化後の表記）を返す.
+
+    登録済みの語も正規化してから比較するので、正規化前に保存された語も重複とみなす。
+    """
+    stored = {key[0] for key in fetch_normalized_keys(client, table, user_id, ["word"])}
+    return {word for word in map(normalize_word, words) if word in stored}
+
+
+def select_word_updates(
+    client: "SupabaseClientLike",
+    table: str,
+    user_id: str,
+    updates: Sequence[Mapping[str, Any]],
+    page_size: int = SCAN_BATCH_SIZE,
+) -> list[Mapping[str, Any]]:
+    """語を書き換えた行（id・正規化済みの word）のうち、保存できるものを返す.
+
+    空欄と、他の行が持つ語（正規化後）と重なるものを除く。書き換える行の今の値は
+    他の行と比べないので、空白や全角・半角だけの編集も、同じ保存で書き換わる語との
+    入れ替えも通る。削除する行は先に削除しておく。updates 内で重なる語は先の行を残す。
+    """
+    updated_ids = {row["id"] for row in updates}
+    taken = {
+        normalize_word(str(row["word"]))
+        for row in _iter_user_rows(client, table, user_id, ["word"], page_size)
+        if row["id"] not in updated_ids
+    }
+    valid: list[Mapping[str, Any]] = []
+    for row in updates:
+        if row["word"] and row["word"] not in taken:
+            taken.add(row["word"])
+            valid.append(row)
+    return valid
+
+
+def delete_by_ids(
+    client: "SupabaseClientLike",
+    table: str,
+    user_id: str,
+    ids: Iterable[int],
+    batch_size: int = DELETE_BATCH_SIZE,
+) -> int:
+    """指定ユーザーの行を ID でまとめて削除する（batch_size 件ごとに1リクエスト）.
+
+    Returns:
+        int: 削除を要求した ID の数。
+    """
+    requested = 0
+    for batch in batched(ids, batch_size):
+        client.table(table).delete().in_("id", batch).eq("user_id", user_id).execute()
+        requested += len(batch)
+    return requested
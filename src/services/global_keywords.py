@@ -0,0 +1,411 @@
+"""全ユーザーを横断した月ごとのキーワード集計（運用者向け）を行うモジュール.
+
+`monthly_keyword_counts`（各月のすべてのキーワードの出現回数）を、ユーザーごとの
+部分集計（月 → 集計）として並列に読み込み、二分木の順に2つずつ併合して月ごとの
+全体集計にする。`monthly_keywords` は各月の上位 N 件しか持たず、上位に入らなかった
+語が全体の回数・ユーザー数から抜けるので使わない。
+集計はキーワードの出現回数と「そのキーワードが現れたユーザー数」を、
+それぞれ上限付きの頻出語スケッチ（Misra-Gries）で持つので、ユーザーや語彙が
+増えても併合の大きさは一定に収まる。
+
+保存するのは月ごとの件数と上位の語だけで、スケッチそのものは保存しない。
+再実行では、集計済みの最新の月以降をユーザーごとの行から集計し直して置き換える
+（それより前の月には触れない）。ユーザーが月を解析し直すと行が削除・再登録される
+ので、保存済みの集計に新しい行だけを足し込むと同じ行を二重に数えてしまう。
+
+置き換えはトランザクションを使えないため、新しい行を upsert してから、
+作り直した月に残った古い行（減った順位・行の無くなった月）を削除する。
+途中で失敗しても集計が消えた状態にはならず、次の実行で揃う。
+
+想定するテーブル定義::
+
+    create table global_keyword_months (
+        target_month text primary key,
+        tenant_count integer not null,
+        total_count bigint not null
+    );
+    create table global_keyword_rankings (
+        target_month text not null,
+        rank integer not null,
+        word text not null,
+        count bigint not null,
+        max_error bigint not null,
+        user_count integer not null,
+        primary key (target_month, rank)
+    );
+
+    PYTHONPATH=. python3 -m src.services.global_keywords
+"""
+
+import argparse
+import heapq
+import logging
+import sys
+from collections import Counter, defaultdict
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, TypeVar, cast
+
+from src.logs.logger import KELogger
+from src.services.bulk_ops import upsert_in_batches
+from src.services.paged_table import SCAN_PAGE_SIZE
+
+if TYPE_CHECKING:
+    from postgrest.types import JSON
+
+    from src.services.history_maker import SupabaseClientLike
+
+_log = logging.getLogger("keyword_logger")
+
+T = TypeVar("T")
+
+# スケッチが保持する語の数（これを超える語は、少ないものから切り捨てる）
+SKETCH_CAPACITY = 1000
+# 月ごとに保存する上位の件数
+GLOBAL_TOP_N = 100
+# ユーザーごとの部分集計を並列に読み込むスレッド数
+TENANT_WORKERS = 8
+
+
+@dataclass
+class HeavyHitters:
+    """Misra-Gries の頻出語スケッチ.
+
+    保持する語の数は capacity 以下。推定値は実際の値以下で、
+    その差は `max_error` 以下に収まる（併合を繰り返しても同じ）。
+    """
+
+    capacity: int = SKETCH_CAPACITY
+    counters: dict[str, int] = field(default_factory=dict)
+    total: int = 0
+
+    def add(self, word: str, count: int = 1) -> None:
+        self.counters[word] = self.counters.get(word, 0) + count
+        self.total += count
+        if len(self.counters) > self.capacity:
+            self._shrink()
+
+    def merge(self, other: "HeavyHitters") -> "HeavyHitters":
+        """other を取り込む（自身を更新して返す）."""
+        for word, count in other.counters.items():
+            self.counters[word] = self.counters.get(word, 0) + count
+        self.total += other.total
+        if len(self.counters) > self.capacity:
+            self._shrink()
+        return self
+
+    def _shrink(self) -> None:
+        # capacity + 1 番目に大きい値をすべての語から引き、0 以下になった語を捨てる
+        cut = heapq.nlargest(self.capacity + 1, self.counters.values())[-1]
+        self.counters = {w: c - cut for w, c in self.counters.items() if c > cut}
+
+    @property
+    def max_error(self) -> int:
+        """推定値と実際の値の差の上限."""
+        return (self.total - sum(self.counters.values())) // (self.capacity + 1)
+
+    def estimate(self, word: str) -> int:
+        return self.counters.get(word, 0)
+
+    def top(self, n: int) -> list[tuple[str, int]]:
+        """推定値の大きい順に n 件返す（同点は語の順）."""
+        return heapq.nsmallest(
+            n, self.counters.items(), key=lambda item: (-item[1], item[0])
+        )
+
+
+@dataclass
+class MonthAggregate:
+    """1か月分の集計（ユーザー1人分の部分集計も、全体の集計も同じ形）."""
+
+    tenant_count: int = 0
+    counts: HeavyHitters = field(default_factory=HeavyHitters)
+    users: HeavyHitters = field(default_factory=HeavyHitters)
+
+    def merge(self, other: "MonthAggregate") -> "MonthAggregate":
+        self.tenant_count += other.tenant_count
+        self.counts.merge(other.counts)
+        self.users.merge(other.users)
+        return self
+
+
+# 月 (YYYY-MM) → その月の集計
+MonthlyAggregates = dict[str, MonthAggregate]
+
+
+def merge_monthly(
+    left: MonthlyAggregates, right: MonthlyAggregates
+) -> MonthlyAggregates:
+    """2つの月ごとの集計を月ごとに併合する（left を更新して返す）."""
+    for month, aggregate in right.items():
+        if month in left:
+            left[month].merge(aggregate)
+        else:
+            left[month] = aggregate
+    return left
+
+
+def tree_reduce(items: Iterable[T], merge: Callable[[T, T], T]) -> T | None:
+    """items を二分木の順に2つずつ併合する（空なら None）.
+
+    届いた順に読み進め、同じ高さの部分木ができたらすぐ併合するので、
+    手元に残るのは高さごとに高々1つ（全体で log2(件数) 個程度）だけになる。
+    """
+    stack: list[tuple[int, T]] = []
+    for item in items:
+        height = 0
+        while stack and stack[-1][0] == height:
+            item = merge(stack.pop()[1], item)
+            height += 1
+        stack.append((height, item))
+    if not stack:
+        return None
+    result = stack.pop()[1]
+    while stack:
+        result = merge(stack.pop()[1], result)
+    return result
+
+
+def tenant_partial(
+    rows: Iterable[tuple[str, str, int]], capacity: int = SKETCH_CAPACITY
+) -> MonthlyAggregates:
+    """ユーザー1人分の (月, キーワード, 回数) から部分集計を作る."""
+    month_counts: dict[str, Counter[str]] = defaultdict(Counter)
+    for target_month, word, count in rows:
+        month_counts[target_month[:7]][word] += count
+
+    partial: MonthlyAggregates = {}
+    for month, word_count in month_counts.items():
+        aggregate = MonthAggregate(1, HeavyHitters(capacity), HeavyHitters(capacity))
+        for word, count in word_count.items():
+            aggregate.counts.add(word, count)
+            # ユーザー数のスケッチには、1人につき語ごとに1を足す
+            aggregate.users.add(word)
+        partial[month] = aggregate
+    return partial
+
+
+def _iter_counts(
+    client: "SupabaseClientLike",
+    columns: str,
+    since_month: str | None,
+    user_id: str,
+    page_size: int,
+) -> Iterator[dict[str, object]]:
+    """ユーザーの出現回数の行を ID 順に page_size 件ずつ読みながら返す."""
+    last_id = 0
+    while True:
+        request = (
+            client.table("monthly_keyword_counts")
+            .select(f"id, {columns}")
+            .eq("user_id", user_id)
+        )
+        if since_month is not None:
+            request = request.gte("target_month", since_month)
+        response = request.gt("id", last_id).order("id").limit(page_size).execute()
+        rows = cast(list[dict[str, object]], response.data or [])
+        yield from rows
+        if len(rows) < page_size:
+            return
+        last_id = cast(int, rows[-1]["id"])
+
+
+def list_tenants(
+    client: "SupabaseClientLike",
+    since_month: str | None = None,
+    page_size: int = SCAN_PAGE_SIZE,
+) -> list[str]:
+    """since_month 以降に出現回数の行があるユーザーを、user_id の順に返す.
+
+    user_id の列だけを user_id 順に page_size 件ずつ読み、ページ内のユーザーを
+    まとめて集める。次のページはページの最後のユーザーより後から読むので、
+    行の多いユーザーの残りの行は読み飛ばす（問い合わせはユーザー数 + 1 回以内）。
+    """
+    tenants: list[str] = []
+    while True:
+        request = client.table("monthly_keyword_counts").select("user_id")
+        if since_month is not None:
+            request = request.gte("target_month", since_month)
+        if tenants:
+            request = request.gt("user_id", tenants[-1])
+        response = request.order("user_id").limit(page_size).execute()
+        rows = cast(list[dict[str, str]], response.data or [])
+        for row in rows:
+            if not tenants or row["user_id"] != tenants[-1]:
+                tenants.append(row["user_id"])
+        if len(rows) < page_size:
+            return tenants
+
+
+def load_tenant_partial(
+    client: "SupabaseClientLike",
+    user_id: str,
+    since_month: str | None = None,
+    page_size: int = SCAN_PAGE_SIZE,
+) -> MonthlyAggregates:
+    """ユーザー1人分の since_month 以降の行を読み、部分集計を作る."""
+    rows = _iter_counts(
+        client, "target_month, word, count", since_month, user_id, page_size
+    )
+    return tenant_partial(
+        (cast(str, r["target_month"]), cast(str, r["word"]), cast(int, r["count"]))
+        for r in rows
+    )
+
+
+def aggregated_months(client: "SupabaseClientLike") -> list[str]:
+    """集計済みの月を古い順に返す."""
+    response = (
+        client.table("global_keyword_months")
+        .select("target_month")
+        .order("target_month")
+        .execute()
+    )
+    rows = cast(list[dict[str, str]], response.data or [])
+    return [row["target_month"] for row in rows]
+
+
+def ranking_rows(
+    month: str, aggregate: MonthAggregate, top_n: int = GLOBAL_TOP_N
+) -> list[dict[str, "JSON"]]:
+    """月の上位 top_n 件を global_keyword_rankings の行にする."""
+    max_error = aggregate.counts.max_error
+    return [
+        {
+            "target_month": month,
+            "rank": rank,
+            "word": word,
+            "count": count,
+            "max_error": max_error,
+            "user_count": aggregate.users.estimate(word),
+        }
+        for rank, (word, count) in enumerate(aggregate.counts.top(top_n), start=1)
+    ]
+
+
+def _delete_stale_rows(
+    client: "SupabaseClientLike", since_month: str | None, rank_counts: dict[str, int]
+) -> None:
+    """作り直した範囲に残った古い行（減った順位・行の無くなった月）を削除する."""
+    for month, n_ranks in rank_counts.items():
+        (
+            client.table("global_keyword_rankings")
+            .delete()
+            .eq("target_month", month)
+            .gt("rank", n_ranks)
+            .execute()
+        )
+    for table in ("global_keyword_rankings", "global_keyword_months"):
+        request = client.table(table).delete()
+        if since_month is not None:
+            request = request.gte("target_month", since_month)
+        else:
+            request = request.neq("target_month", "")
+        if rank_counts:
+            request = request.not_.in_("target_month", list(rank_counts))
+        request.execute()
+
+
+def refresh_global_keywords(
+    supabase_client: "SupabaseClientLike",
+    incremental: bool = True,
+    workers: int = TENANT_WORKERS,
+    top_n: int = GLOBAL_TOP_N,
+) -> dict[str, int]:
+    """全ユーザーの月ごとの集計を作り直し、集計した月ごとのユーザー数を返す.
+
+    incremental では集計済みの最新の月以降だけを対象にする（最新の月は、
+    集計した後に増えたユーザーの分を取り込むため作り直す）。
+    """
+    from postgrest.exceptions import APIError
+
+    KELogger.start("全体キーワード集計")
+    try:
+        since_month: str | None = None
+        if incremental:
+            months = aggregated_months(supabase_client)
+            since_month = months[-1] if months else None
+
+        tenants = list_tenants(supabase_client, since_month)
+        with ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="global-keywords"
+        ) as executor:
+            partials = executor.map(
+                lambda user_id: load_tenant_partial(
+                    supabase_client, user_id, since_month
+                ),
+                tenants,
+            )
+            merged = tree_reduce(partials, merge_monthly) or {}
+
+        month_rows: list[dict[str, "JSON"]] = []
+        rank_rows: list[dict[str, "JSON"]] = []
+        rank_counts: dict[str, int] = {}
+        for month in sorted(merged):
+            aggregate = merged[month]
+            month_rows.append(
+                {
+                    "target_month": month,
+                    "tenant_count": aggregate.tenant_count,
+                    "total_count": aggregate.counts.total,
+                }
+            )
+            rows = ranking_rows(month, aggregate, top_n)
+            rank_counts[month] = len(rows)
+            rank_rows.extend(rows)
+
+        # 新しい行を書いてから古い行を消す（途中で失敗しても集計が空にならない）
+        upsert_in_batches(
+            supabase_client,
+            "global_keyword_months",
+            month_rows,
+            on_conflict="target_month",
+        )
+        upsert_in_batches(
+            supabase_client,
+            "global_keyword_rankings",
+            rank_rows,
+            on_conflict="target_month,rank",
+        )
+        _delete_stale_rows(supabase_client, since_month, rank_counts)
+    except APIError as e:
+        _log.error(f"全体キーワード集計の保存に失敗しました: {e.message}")
+        raise RuntimeError(f"Supabase persistence failed: {e.message}") from e
+    finally:
+        KELogger.end("全体キーワード集計")
+
+    _log.info(
+        f"全体キーワードを集計しました: {len(tenants)}ユーザー / {len(merged)}か月 "
+        f"(since: {since_month or '全期間'})"
+    )
+    return {month: merged[month].tenant_count for month in sorted(merged)}
+
+
+def main(argv: list[str] | None = None) -> int:
+    """全ユーザーのキーワード集計を更新するCLI."""
+    parser = argparse.ArgumentParser(description="全ユーザーのキーワード集計")
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help="集計済みの月も含め、全期間を集計し直す",
+    )
+    parser.add_argument(
+        "--workers", type=int, default=TENANT_WORKERS, help="並列に読むスレッド数"
+    )
+    args = parser.parse_args(argv)
+    KELogger.setup(level=logging.INFO)
+
+    from src.services.supabase_client import create_service_supabase_client
+
+    # 全ユーザーの行を読むので、サービスロールの鍵を使う
+    refresh_global_keywords(
+        create_service_supabase_client(),
+        incremental=not args.full,
+        workers=args.workers,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
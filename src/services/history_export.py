@@ -0,0 +1,273 @@
+"""キーワード履歴（ユーザー × 月 × キーワードの回数）を Parquet に書き出すモジュール.
+
+ノートブックでの分析用に、全ユーザーの履歴を一定件数ずつ読みながら、月ごとの
+パーティション（``<出力先>/target_month=YYYY-MM/part-0.parquet``）へ行グループ単位で
+書き出す。文字列の列（user_id・word・ranker）は辞書エンコードするので、同じ語が
+何度現れてもファイルは小さく、pandas では category 型として読み込める。
+メモリに載るのは月ごとの書きかけの1チャンク分だけ。
+
+読み元は Supabase の monthly_keyword_counts（全ユーザー、各月のすべての
+キーワードの出現回数）と、ローカルの転置インデックス（同じく各月のすべての
+キーワード）から選べる。monthly_keywords は各月の上位 N 件しか持たず、上位に
+入らなかった語が抜けるので使わない。どちらの読み元も出現回数なので、ranker は
+常に "frequency" になる。
+
+``incremental=True`` では、書き出し済みの最新の月以降だけを読み直し、その月以降の
+パーティションだけを置き換える（それより前の月のファイルには触れない）。
+
+    PYTHONPATH=. python3 -m src.services.history_export --out output/history
+"""
+
+import argparse
+import logging
+import os
+import shutil
+import sys
+from collections.abc import Callable, Iterable, Iterator
+from dataclasses import dataclass, field
+from functools import partial
+from typing import TYPE_CHECKING, TypedDict, cast
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from src.logs.logger import KELogger
+from src.services.paged_table import SCAN_PAGE_SIZE
+
+if TYPE_CHECKING:
+    from src.services.history_maker import SupabaseClientLike
+    from src.services.keyword_index import KeywordIndex
+
+_log = logging.getLogger("keyword_logger")
+
+# 出力先の既定値
+DEFAULT_EXPORT_DIR = os.path.join("output", "history")
+# 月のパーティションのディレクトリ名（Hive 形式。読み込むと target_month 列になる）
+PARTITION_PREFIX = "target_month="
+PART_FILE = "part-0.parquet"
+# 1つの行グループにまとめる行数（月ごとにこの行数たまったら書き出す）
+CHUNK_ROWS = 50_000
+
+_DICTIONARY_STRING = pa.dictionary(pa.int32(), pa.string())
+SCHEMA = pa.schema(
+    [
+        ("user_id", _DICTIONARY_STRING),
+        ("word", _DICTIONARY_STRING),
+        ("count", pa.int32()),
+        ("ranker", _DICTIONARY_STRING),
+    ]
+)
+
+
+class HistoryRow(TypedDict):
+    """書き出す1行（ユーザー・月・キーワードごとの回数）."""
+
+    user_id: str
+    target_month: str
+    word: str
+    count: int
+    ranker: str
+
+
+class MonthlyKeywordCountRow(TypedDict):
+    """monthly_keyword_counts テーブルから参照する列."""
+
+    id: int
+    user_id: str
+    target_month: str
+    word: str
+    count: int
+
+
+# since_month（None なら全期間）を受け取って行を返す読み元
+HistorySource = Callable[[str | None], Iterable[HistoryRow]]
+
+
+def iter_supabase_history(
+    client: "SupabaseClientLike",
+    since_month: str | None = None,
+    page_size: int = SCAN_PAGE_SIZE,
+) -> Iterator[HistoryRow]:
+    """monthly_keyword_counts の全ユーザーの行を ID 順に page_size 件ずつ読みながら返す.
+
+    オフセットではなく「前のページの最後の ID より後」で読むので、
+    件数が多くても1リクエストの重さが変わらない。
+    """
+    last_id = 0
+    while True:
+        request = client.table("monthly_keyword_counts").select(
+            "id, user_id, target_month, word, count"
+        )
+        if since_month is not None:
+            request = request.gte("target_month", since_month)
+        response = request.gt("id", last_id).order("id").limit(page_size).execute()
+        rows = cast(list[MonthlyKeywordCountRow], response.data or [])
+        for row in rows:
+            yield {
+                "user_id": row["user_id"],
+                "target_month": row["target_month"][:7],
+                "word": row["word"],
+                "count": row["count"],
+                "ranker": "frequency",
+            }
+        if len(rows) < page_size:
+            return
+        last_id = rows[-1]["id"]
+
+
+def iter_local_history(
+    index: "KeywordIndex", since_month: str | None = None
+) -> Iterator[HistoryRow]:
+    """ローカルの転置インデックスから、各月のすべてのキーワードの出現回数を返す."""
+    for user_id, target_month, word, count in index.iter_month_counts(since_month):
+        yield {
+            "user_id": user_id,
+            "target_month": target_month,
+            "word": word,
+            "count": count,
+            "ranker": "frequency",
+        }
+
+
+@dataclass
+class _MonthBuffer:
+    """1か月分の書きかけの行と、書き出し中のファイル."""
+
+    path: str
+    writer: pq.ParquetWriter
+    user_ids: list[str] = field(default_factory=list)
+    words: list[str] = field(default_factory=list)
+    counts: list[int] = field(default_factory=list)
+    rankers: list[str] = field(default_factory=list)
+    rows: int = 0
+
+    def flush(self) -> None:
+        if not self.words:
+            return
+        self.writer.write_table(
+            pa.table(
+                [
+                    pa.array(self.user_ids, pa.string()).dictionary_encode(),
+                    pa.array(self.words, pa.string()).dictionary_encode(),
+                    pa.array(self.counts, pa.int32()),
+                    pa.array(self.rankers, pa.string()).dictionary_encode(),
+                ],
+                schema=SCHEMA,
+            )
+        )
+        self.rows += len(self.words)
+        self.user_ids, self.words, self.counts, self.rankers = [], [], [], []
+
+
+def partition_dir(out_dir: str, target_month: str) -> str:
+    """月のパーティションのディレクトリ."""
+    return os.path.join(out_dir, f"{PARTITION_PREFIX}{target_month}")
+
+
+def exported_months(out_dir: str) -> list[str]:
+    """書き出し済みの月を古い順に返す."""
+    if not os.path.isdir(out_dir):
+        return []
+    return sorted(
+        name[len(PARTITION_PREFIX) :]
+        for name in os.listdir(out_dir)
+        if name.startswith(PARTITION_PREFIX)
+        and os.path.exists(os.path.join(out_dir, name, PART_FILE))
+    )
+
+
+def export_history(
+    source: HistorySource,
+    out_dir: str = DEFAULT_EXPORT_DIR,
+    incremental: bool = False,
+    chunk_rows: int = CHUNK_ROWS,
+) -> dict[str, int]:
+    """履歴を月ごとの Parquet に書き出し、書き出した月ごとの行数を返す.
+
+    各月のファイルはいったん一時ファイルに書き、すべて書き終えてから置き換える
+    （途中で失敗しても、書き出し済みのファイルは前回のまま残る）。
+    incremental でないときは、読み元に無くなった月のパーティションも消す。
+    """
+    since_month: str | None = None
+    if incremental:
+        months = exported_months(out_dir)
+        since_month = months[-1] if months else None
+
+    KELogger.start("履歴エクスポート")
+    buffers: dict[str, _MonthBuffer] = {}
+    try:
+        for row in source(since_month):
+            month = row["target_month"][:7]
+            buffer = buffers.get(month)
+            if buffer is None:
+                directory = partition_dir(out_dir, month)
+                os.makedirs(directory, exist_ok=True)
+                path = os.path.join(directory, f"{PART_FILE}.tmp")
+                buffer = _MonthBuffer(path, pq.ParquetWriter(path, SCHEMA))
+                buffers[month] = buffer
+            buffer.user_ids.append(row["user_id"])
+            buffer.words.append(row["word"])
+            buffer.counts.append(row["count"])
+            buffer.rankers.append(row["ranker"])
+            if len(buffer.words) >= chunk_rows:
+                buffer.flush()
+        for buffer in buffers.values():
+            buffer.flush()
+            buffer.writer.close()
+    except BaseException:
+        for buffer in buffers.values():
+            buffer.writer.close()
+            os.remove(buffer.path)
+        raise
+    finally:
+        KELogger.end("履歴エクスポート")
+
+    for month, buffer in buffers.items():
+        os.replace(buffer.path, os.path.join(partition_dir(out_dir, month), PART_FILE))
+    if not incremental:
+        for month in set(exported_months(out_dir)) - set(buffers):
+            shutil.rmtree(partition_dir(out_dir, month))
+
+    written = {month: buffers[month].rows for month in sorted(buffers)}
+    _log.info(
+        f"履歴を書き出しました: {sum(written.values())}行 / {len(written)}か月 "
+        f"(since: {since_month or '全期間'}) → {out_dir}"
+    )
+    return written
+
+
+def main(argv: list[str] | None = None) -> int:
+    """キーワード履歴を Parquet に書き出すCLI."""
+    parser = argparse.ArgumentParser(description="キーワード履歴の Parquet 書き出し")
+    parser.add_argument("--out", default=DEFAULT_EXPORT_DIR, help="出力先")
+    parser.add_argument(
+        "--source",
+        choices=("supabase", "local"),
+        default="supabase",
+        help="読み元（supabase: monthly_keyword_counts / local: 転置インデックス）",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="書き出し済みの最新の月以降だけを書き出し直す",
+    )
+    args = parser.parse_args(argv)
+    KELogger.setup(level=logging.INFO)
+
+    source: HistorySource
+    if args.source == "supabase":
+        from src.services.supabase_client import create_service_supabase_client
+
+        # 全ユーザーの行を読むので、サービスロールの鍵を使う
+        source = partial(iter_supabase_history, create_service_supabase_client())
+    else:
+        from src.services.keyword_index import get_keyword_index
+
+        source = partial(iter_local_history, get_keyword_index())
+
+    export_history(source, args.out, incremental=args.incremental)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
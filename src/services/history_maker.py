@@ -1,13 +1,14 @@
 import json
 import logging
 import os
-from typing import Counter, Protocol, runtime_checkable
-
-from postgrest import SyncRequestBuilder
-from postgrest.exceptions import APIError
+from collections.abc import Iterator
+from typing import TYPE_CHECKING, Any, Counter, Protocol, cast, runtime_checkable
 
 from src.logs.logger import KELogger
 
+if TYPE_CHECKING:
+    from postgrest import SyncRequestBuilder
+
 _logger = logging.getLogger("keyword_logger")
 
 
@@ -26,7 +27,7 @@ class SupabaseClientLike(Protocol):
     実際の Client.table は SyncRequestBuilder を返すので、それに合わせる。
     """
 
-    def table(self, table_name: str) -> SyncRequestBuilder: ...
+    def table(self, table_name: str) -> "SyncRequestBuilder": ...
 
 
 class APIResponseLike(Protocol):
@@ -41,14 +42,24 @@ def save_monthly_top_keywords(
     target_month: str,
     word_count: Counter[str],
     top_n: int = 5,
+    ranker: str = "frequency",
 ) -> None:
-    """既存の月のデータを全削除してから、TOP N のデータを新規登録する."""
+    """既存の月のデータを全削除してから、TOP N のデータを新規登録する.
+
+    ranker（順位付けの方法）ごとに別の行として保存し、削除も同じ ranker の行だけ行う。
+    """
     if not user_id:
         raise ValueError("user_id が空です。")
 
     # 1. 保存するデータのリストを作成
     data_to_insert = [
-        {"user_id": user_id, "target_month": target_month, "word": word, "count": count}
+        {
+            "user_id": user_id,
+            "target_month": target_month,
+            "word": word,
+            "count": count,
+            "ranker": ranker,
+        }
         for word, count in word_count.most_common(top_n)
     ]
 
@@ -56,13 +67,15 @@ def save_monthly_top_keywords(
         _logger.warning(f"保存対象のデータがありませんでした ({target_month})")
         return
 
+    from postgrest.exceptions import APIError
+
     # ここから計測開始
     KELogger.start("Supabase統計保存")
     try:
         # 2. 既存のデータを削除 (そのユーザーの、その月のデータのみ)
         supabase_client.table("monthly_keywords").delete().eq("user_id", user_id).eq(
             "target_month", target_month
-        ).execute()
+        ).eq("ranker", ranker).execute()
 
         # 3. 新しくデータをインサート
         supabase_client.table("monthly_keywords").insert(data_to_insert).execute()
@@ -75,22 +88,113 @@ def save_monthly_top_keywords(
         KELogger.end("Supabase統計保存")
 
 
+def save_monthly_keyword_counts(
+    supabase_client: SupabaseClientLike,
+    user_id: str,
+    target_month: str,
+    word_count: Counter[str],
+) -> int:
+    """月のすべてのキーワードの出現回数を monthly_keyword_counts に置き換えて保存する.
+
+    monthly_keywords は上位 N 件しか持たないため、推移（trend_engine）は
+    こちらの全件から計算する。置き換えは (user_id, target_month, word) で upsert
+    してから、その月に残った今回の無い語の行だけを削除する（トランザクションを
+    使えないので、途中で失敗しても月の行が消えた状態にはならない）。
+
+    Returns:
+        int: 保存した行数。
+    """
+    if not user_id:
+        raise ValueError("user_id が空です。")
+
+    from postgrest.exceptions import APIError
+
+    from src.services.bulk_ops import delete_by_ids, upsert_in_batches
+
+    rows = [
+        {"user_id": user_id, "target_month": target_month, "word": w, "count": c}
+        for w, c in word_count.items()
+    ]
+    KELogger.start("Supabase全件保存")
+    try:
+        saved = upsert_in_batches(
+            supabase_client,
+            "monthly_keyword_counts",
+            rows,
+            on_conflict="user_id,target_month,word",
+        )
+        stale_ids = [
+            row_id
+            for row_id, word in _iter_month_count_words(
+                supabase_client, user_id, target_month
+            )
+            if word not in word_count
+        ]
+        delete_by_ids(supabase_client, "monthly_keyword_counts", user_id, stale_ids)
+        return saved
+    except APIError as e:
+        _logger.error(f"Supabaseへの保存に失敗しました: {e.message}")
+        raise RuntimeError(f"Supabase persistence failed: {e.message}") from e
+    finally:
+        KELogger.end("Supabase全件保存")
+
+
+def _iter_month_count_words(
+    supabase_client: SupabaseClientLike,
+    user_id: str,
+    target_month: str,
+    page_size: int = 1000,
+) -> Iterator[tuple[int, str]]:
+    """monthly_keyword_counts のユーザーの月の (id, word) を ID 順に読みながら返す."""
+    last_id = 0
+    while True:
+        response = (
+            supabase_client.table("monthly_keyword_counts")
+            .select("id, word")
+            .eq("user_id", user_id)
+            .eq("target_month", target_month)
+            .gt("id", last_id)
+            .order("id")
+            .limit(page_size)
+            .execute()
+        )
+        rows = cast(list[dict[str, Any]], response.data or [])
+        for row in rows:
+            yield row["id"], row["word"]
+        if len(rows) < page_size:
+            return
+        last_id = rows[-1]["id"]
+
+
 def save_monthly_top_keywords_local(
     user_id: str,
     target_month: str,
     word_count: Counter[str],
     top_n: int = 5,
     output_dir: str = "output",
+    ranker: str = "frequency",
 ) -> str:
-    """解析結果をローカルのJSONファイルとして保存する."""
+    """解析結果をローカルのJSONファイルとして保存する.
+
+    出現回数以外の順位付けは、ファイル名の末尾に ranker を付けて別に保存する。
+    """
     os.makedirs(output_dir, exist_ok=True)
 
     debug_data = [
-        {"user_id": user_id, "target_month": target_month, "word": w, "count": c}
+        {
+            "user_id": user_id,
+            "target_month": target_month,
+            "word": w,
+            "count": c,
+            "ranker": ranker,
+        }
         for w, c in word_count.most_common(top_n)
     ]
 
-    file_path = os.path.join(output_dir, f"monthly_keywords_{target_month}.json")
+    suffix = "" if ranker == "frequency" else f"_{ranker}"
+    file_path = os.path.join(
+        output_dir, f"monthly_keywords_{target_month}{suffix}.json"
+    )
     with open(file_path, "w", encoding="utf-8") as f:
         json.dump(debug_data, f, indent=4, ensure_ascii=False)
 
@@ -0,0 +1,170 @@
+"""キーワードから日記エントリを引くための転置インデックスを管理するモジュール.
+
+解析のたびに、月単位で「キーワード → (ページID, 日付, 出現回数)」を SQLite に
+保存する。グラフのキーワードから元のエントリへのドリルダウンは、
+(user_id, word) の主キー検索1回で済み、Notion への再問い合わせや
+再解析は不要になる。
+"""
+
+import os
+import sqlite3
+import threading
+from collections import Counter
+from collections.abc import Iterator, Sequence
+from typing import TypedDict
+
+# インデックスの保存先
+DEFAULT_INDEX_PATH = os.path.join("output", "keyword_index.db")
+
+_SCHEMA = """
+create table if not exists entries (
+    user_id text not null,
+    page_id text not null,
+    target_month text not null,
+    entry_date text,
+    primary key (user_id, page_id)
+);
+create index if not exists entries_month on entries (user_id, target_month);
+
+create table if not exists postings (
+    user_id text not null,
+    word text not null,
+    page_id text not null,
+    target_month text not null,
+    count integer not null,
+    primary key (user_id, word, page_id)
+) without rowid;
+create index if not exists postings_month on postings (user_id, target_month);
+"""
+
+
+class IndexedEntry(TypedDict):
+    """インデックスに登録するエントリ."""
+
+    page_id: str
+    date: str | None
+
+
+class KeywordHit(TypedDict):
+    """キーワードを含むエントリ."""
+
+    page_id: str
+    date: str | None
+    target_month: str
+    count: int
+
+
+class KeywordIndex:
+    """SQLite に保存するキーワード → エントリの転置インデックス."""
+
+    def __init__(self, path: str = DEFAULT_INDEX_PATH):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        # Streamlit は再実行ごとにスレッドが変わるため、接続はロックで保護して共有する
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute("pragma journal_mode=wal")
+            self._conn.executescript(_SCHEMA)
+
+    def update_month(
+        self,
+        user_id: str,
+        target_month: str,
+        entries: Sequence[IndexedEntry],
+        nouns_per_entry: Sequence[Sequence[str]],
+    ) -> int:
+        """対象月の登録内容を、今回の解析結果で置き換える.
+
+        Args:
+            user_id: ユーザーID。
+            target_month: 対象月 (YYYY-MM)。
+            entries: 解析したエントリ（nouns_per_entry と同じ順序）。
+            nouns_per_entry: エントリごとの名詞列。
+
+        Returns:
+            int: 登録したポスティング（キーワード × エントリ）の件数。
+        """
+        entry_rows = [
+            (user_id, entry["page_id"], target_month, entry["date"])
+            for entry in entries
+        ]
+        posting_rows = [
+            (user_id, word, entry["page_id"], target_month, count)
+            for entry, nouns in zip(entries, nouns_per_entry)
+            for word, count in Counter(nouns).items()
+        ]
+
+        with self._lock, self._conn:
+            for table in ("entries", "postings"):
+                self._conn.execute(
+                    f"delete from {table} where user_id = ? and target_month = ?",
+                    (user_id, target_month),
+                )
+            self._conn.executemany(
+                "insert or replace into entries values (?, ?, ?, ?)", entry_rows
+            )
+            self._conn.executemany(
+                "insert or replace into postings values (?, ?, ?, ?, ?)", posting_rows
+            )
+        return len(posting_rows)
+
+    def lookup(
+        self, user_id: str, word: str, target_month: str | None = None
+    ) -> list[KeywordHit]:
+        """word を含むエントリを日付の新しい順に返す."""
+        sql = (
+            "select p.page_id, e.entry_date, p.target_month, p.count "
+            "from postings p join entries e "
+            "on e.user_id = p.user_id and e.page_id = p.page_id "
+            "where p.user_id = ? and p.word = ?"
+        )
+        params: tuple[str, ...] = (user_id, word)
+        if target_month is not None:
+            sql += " and p.target_month = ?"
+            params += (target_month,)
+        sql += " order by e.entry_date desc"
+
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [
+            {"page_id": page_id, "date": date, "target_month": month, "count": count}
+            for page_id, date, month, count in rows
+        ]
+
+    def iter_month_counts(
+        self, since_month: str | None = None
+    ) -> Iterator[tuple[str, str, str, int]]:
+        """全ユーザーの (user_id, 月, キーワード, 月の出現回数) を順に返す.
+
+        since_month を指定すると、その月以降だけを返す。行は読み進めながら返し、
+        全件をメモリに載せない（読み終えるまで接続のロックを保持する）。
+        """
+        sql = "select user_id, target_month, word, sum(count) from postings"
+        params: tuple[str, ...] = ()
+        if since_month is not None:
+            sql += " where target_month >= ?"
+            params = (since_month,)
+        sql += " group by user_id, target_month, word"
+        with self._lock:
+            yield from self._conn.execute(sql, params)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+_indexes: dict[str, KeywordIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_keyword_index(path: str = DEFAULT_INDEX_PATH) -> KeywordIndex:
+    """パスごとに1つの KeywordIndex をプロセス内で共有して返す."""
+    with _indexes_lock:
+        if path not in _indexes:
+            _indexes[path] = KeywordIndex(path)
+        return _indexes[path]
+
+
+def notion_page_url(page_id: str) -> str:
+    """NotionのページIDからページURLを組み立てる."""
+    return f"https://www.notion.so/{page_id.replace('-', '')}"
@@ -0,0 +1,286 @@
+"""Notionのページをローカルにキャッシュし、差分だけを同期するモジュール.
+
+`fetch_good_things_entries` の前段に置く読み通しキャッシュ。ページは
+SQLite にページIDをキーとして `last_edited_time` と一緒に保存し、
+2回目以降は前回の同期以降に編集されたページだけを Notion に問い合わせる。
+オフラインモードでは Notion に一切接続せず、キャッシュだけで応答する。
+
+注意: Notion のデータベースクエリはゴミ箱に移動したページを返さないため、
+削除は差分同期では検出できない。`refresh=True` で対象月を取り直せる。
+キャッシュには取得対象のプロパティだけが入るため、NOTION_TEXT_PROPERTIES を
+変えたときも `refresh=True` で取り直す。
+
+月の絞り込みは `entry_date` の半開区間（初日以上・翌月の初日未満）で行い、
+索引 pages_date を使う。時刻付きの日付は日本時間に直して保存するので、
+Notion の月フィルタ（日本時間）と同じ月に入る。
+"""
+
+import json
+import os
+import sqlite3
+import threading
+from collections.abc import Iterable
+from datetime import datetime, timedelta, timezone
+from typing import cast
+
+from notion_client import Client
+
+from src.services.notion_handler import (
+    JST,
+    GoodThingsEntry,
+    NotionPage,
+    build_month_filter,
+    create_notion_client,
+    month_bounds,
+    page_to_entry,
+    projected_property_ids,
+    query_pages,
+)
+
+# キャッシュの保存先
+DEFAULT_CACHE_PATH = os.path.join("output", "notion_cache.db")
+# last_edited_time は分単位に丸められるため、同期時刻に余裕を持たせる
+SYNC_MARGIN = timedelta(minutes=2)
+
+_SCHEMA = """
+create table if not exists pages (
+    database_id text not null,
+    page_id text not null,
+    last_edited_time text not null,
+    entry_date text,
+    properties text not null,
+    primary key (database_id, page_id)
+);
+create index if not exists pages_date on pages (database_id, entry_date);
+
+create table if not exists synced_months (
+    database_id text not null,
+    target_month text not null,
+    primary key (database_id, target_month)
+);
+
+create table if not exists sync_state (
+    database_id text primary key,
+    last_synced_at text not null
+);
+"""
+
+
+def date_key(value: str | None) -> str | None:
+    """Notion の日付を、月の範囲で比べられる文字列にする.
+
+    日付だけの値はそのまま、時刻付きの値は日本時間に直した ISO8601 にする
+    （UTC の 4/30 20:00 は日本時間の 5/1 として 5月に入る）。
+    """
+    if not value or "T" not in value:
+        return value
+    try:
+        moment = datetime.fromisoformat(value)
+    except ValueError:
+        return value
+    if moment.tzinfo is None:
+        return value
+    return moment.astimezone(JST).isoformat()
+
+
+def _month_range(target_month: str) -> tuple[str, str]:
+    """entry_date を絞り込む半開区間 [月の初日, 翌月の初日) の境界."""
+    start, next_start = month_bounds(target_month)
+    return start.isoformat(), next_start.isoformat()
+
+
+class NotionPageCache:
+    """Notionページの SQLite キャッシュ."""
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute("pragma journal_mode=wal")
+            self._conn.executescript(_SCHEMA)
+            self._normalize_dates()
+
+    def sync_month(
+        self,
+        client: Client,
+        database_id: str,
+        target_month: str,
+        refresh: bool = False,
+    ) -> int:
+        """前回以降に編集されたページと、未取得の対象月を同期する.
+
+        Returns:
+            int: Notion から受け取ったページ数。
+        """
+        sync_started_at = datetime.now(timezone.utc)
+        received = 0
+        # 必要なプロパティだけを受け取り、キャッシュにもそれだけを保存する
+        property_ids = projected_property_ids(client, database_id)
+
+        last_synced_at = self.last_synced_at(database_id)
+        if last_synced_at is not None:
+            since = (last_synced_at - SYNC_MARGIN).isoformat()
+            edited_filter = {
+                "timestamp": "last_edited_time",
+                "last_edited_time": {"on_or_after": since},
+            }
+            received += self._store(
+                database_id,
+                query_pages(
+                    client,
+                    database_id,
+                    edited_filter,
+                    filter_properties=property_ids,
+                ),
+            )
+
+        if refresh or not self.has_month(database_id, target_month):
+            # 取得し終えてから1トランザクションで置き換え、途中失敗で月を空にしない
+            month_rows = self._page_rows(
+                database_id,
+                query_pages(
+                    client,
+                    database_id,
+                    build_month_filter(target_month),
+                    filter_properties=property_ids,
+                ),
+            )
+            with self._lock, self._conn:
+                self._conn.execute(
+                    "delete from pages where database_id = ? "
+                    "and entry_date >= ? and entry_date < ?",
+                    (database_id, *_month_range(target_month)),
+                )
+                self._conn.executemany(
+                    "insert or replace into pages values (?, ?, ?, ?, ?)", month_rows
+                )
+                self._conn.execute(
+                    "insert or ignore into synced_months values (?, ?)",
+                    (database_id, target_month),
+                )
+            received += len(month_rows)
+
+        with self._lock, self._conn:
+            self._conn.execute(
+                "insert or replace into sync_state values (?, ?)",
+                (database_id, sync_started_at.isoformat()),
+            )
+        return received
+
+    def entries(self, database_id: str, target_month: str) -> list[GoodThingsEntry]:
+        """キャッシュから対象月のエントリを日付の降順で返す."""
+        with self._lock:
+            rows = self._conn.execute(
+                "select page_id, last_edited_time, properties from pages "
+                "where database_id = ? and entry_date >= ? and entry_date < ? "
+                "order by entry_date desc",
+                (database_id, *_month_range(target_month)),
+            ).fetchall()
+        return [
+            page_to_entry(
+                cast(
+                    NotionPage,
+                    {
+                        "id": page_id,
+                        "last_edited_time": edited,
+                        "properties": json.loads(props),
+                    },
+                )
+            )
+            for page_id, edited, props in rows
+        ]
+
+    def has_month(self, database_id: str, target_month: str) -> bool:
+        with self._lock:
+            row = self._conn.execute(
+                "select 1 from synced_months where database_id = ? "
+                "and target_month = ?",
+                (database_id, target_month),
+            ).fetchone()
+        return row is not None
+
+    def last_synced_at(self, database_id: str) -> datetime | None:
+        with self._lock:
+            row = self._conn.execute(
+                "select last_synced_at from sync_state where database_id = ?",
+                (database_id,),
+            ).fetchone()
+        return datetime.fromisoformat(row[0]) if row else None
+
+    def _page_rows(
+        self, database_id: str, pages: Iterable[NotionPage]
+    ) -> list[tuple[str, str, str, str | None, str]]:
+        return [
+            (
+                database_id,
+                page["id"],
+                page.get("last_edited_time", ""),
+                date_key(page_to_entry(page)["date"]),
+                json.dumps(page["properties"], ensure_ascii=False),
+            )
+            for page in pages
+        ]
+
+    def _store(self, database_id: str, pages: Iterable[NotionPage]) -> int:
+        rows = self._page_rows(database_id, pages)
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "insert or replace into pages values (?, ?, ?, ?, ?)", rows
+            )
+        return len(rows)
+
+    def _normalize_dates(self) -> None:
+        """時刻付きの日付を日本時間に直さずに保存した以前のキャッシュを直す."""
+        rows = self._conn.execute(
+            "select database_id, page_id, entry_date from pages "
+            "where entry_date like '%T%' and entry_date not like '%+09:00'"
+        ).fetchall()
+        self._conn.executemany(
+            "update pages set entry_date = ? where database_id = ? and page_id = ?",
+            [(date_key(value), db, page_id) for db, page_id, value in rows],
+        )
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def fetch_good_things_entries_cached(
+    token: str | None,
+    database_id: str,
+    target_month: str,
+    cache: NotionPageCache | None = None,
+    offline: bool = False,
+    refresh: bool = False,
+) -> list[GoodThingsEntry]:
+    """キャッシュを経由して対象月のエントリを取得する.
+
+    Args:
+        token: Notionのトークン（オフライン時は不要）。
+        database_id: データベースID。
+        target_month: 対象月 (YYYY-MM)。
+        cache: 使用するキャッシュ（省略時は既定パスのキャッシュ）。
+        offline: True なら Notion に接続せずキャッシュだけで応答する。
+        refresh: True なら対象月をキャッシュに頼らず取り直す。
+    """
+    cache = cache or get_notion_cache()
+    if not offline:
+        if not token:
+            raise ValueError("オンラインでの同期には Notion のトークンが必要です。")
+        cache.sync_month(
+            create_notion_client(token), database_id, target_month, refresh
+        )
+    return cache.entries(database_id, target_month)
+
+
+_caches: dict[str, NotionPageCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_notion_cache(path: str = DEFAULT_CACHE_PATH) -> NotionPageCache:
+    """パスごとに1つの NotionPageCache をプロセス内で共有して返す."""
+    with _caches_lock:
+        if path not in _caches:
+            _caches[path] = NotionPageCache(path)
+        return _caches[path]
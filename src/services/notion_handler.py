@@ -1,9 +1,20 @@
 """Notionから「良かったこと」を取得するモジュール."""
 
-import calendar
-from typing import Literal, TypedDict, cast
+import logging
+import os
+import threading
+from collections.abc import Iterator, Mapping, Sequence
+from datetime import date, timedelta, timezone
+from typing import Literal, NotRequired, TypedDict, cast
 
 from notion_client import Client
+from notion_client.errors import HTTPResponseError, RequestTimeoutError
+
+# 内部的な詳細ログ用
+_log = logging.getLogger("keyword_logger")
+
+# 月の境界は日本時間で数える
+JST = timezone(timedelta(hours=9))
 
 # --- Notion API レスポンス用の型定義 ---
 
@@ -16,16 +27,34 @@ class NotionRichText(TypedDict):
     text: NotionTextContent
 
 
-class NotionProperty(TypedDict):
+class NotionDateValue(TypedDict):
+    start: str
+
+
+class NotionProperty(TypedDict, total=False):
     rich_text: list[NotionRichText]
+    date: NotionDateValue | None
 
 
 class NotionPage(TypedDict):
+    id: str
+    last_edited_time: NotRequired[str]
     properties: dict[str, NotionProperty]
 
 
+class NotionPropertySchema(TypedDict):
+    id: str
+    type: NotRequired[str]
+
+
+class NotionDatabase(TypedDict):
+    properties: dict[str, NotionPropertySchema]
+
+
 class NotionQueryResponse(TypedDict):
     results: list[NotionPage]
+    has_more: NotRequired[bool]
+    next_cursor: NotRequired[str | None]
 
 
 # --- クエリ引数用の厳密な型定義 ---
@@ -55,6 +84,82 @@ class NotionDateFilter(TypedDict):
 NotionAndFilter = TypedDict("NotionAndFilter", {"and": list[NotionDateFilter]})
 
 
+class GoodThingsEntry(TypedDict):
+    """1ページ（1日分）の「良かったこと」."""
+
+    page_id: str
+    date: str | None
+    text: str
+
+
+# 抽出対象のキー（NOTION_TEXT_PROPERTIES 未設定時）
+TARGET_KEYS = ["良かったこと１", "良かったこと２", "良かったこと３"]
+DATE_PROPERTY = "日付"
+# 抽出対象のプロパティ名をカンマ区切りで指定する環境変数
+TEXT_PROPERTIES_ENV = "NOTION_TEXT_PROPERTIES"
+# 最新モード（月指定なし）で取得する件数
+LATEST_PAGE_SIZE = 30
+# 接続先の Notion API（負荷試験などでローカルの代替サーバーに向けるときに設定）
+NOTION_BASE_URL_ENV = "NOTION_BASE_URL"
+
+
+def create_notion_client(token: str) -> Client:
+    """Notionクライアントを生成する（NOTION_BASE_URL があればそちらへ接続）."""
+    base_url = os.getenv(NOTION_BASE_URL_ENV)
+    if base_url:
+        return Client(auth=token, base_url=base_url)
+    return Client(auth=token)
+
+
+def text_properties() -> list[str]:
+    """抽出対象のテキストプロパティ名（NOTION_TEXT_PROPERTIES で上書きできる）."""
+    configured = os.getenv(TEXT_PROPERTIES_ENV, "")
+    names = [name.strip() for name in configured.split(",") if name.strip()]
+    return names or list(TARGET_KEYS)
+
+
+# (データベースID, プロパティ名) → プロパティID。スキーマの取得は1回だけにする
+_property_ids: dict[tuple[str, tuple[str, ...]], list[str] | None] = {}
+_property_ids_lock = threading.Lock()
+
+
+def resolve_property_ids(
+    client: Client, database_id: str, names: Sequence[str]
+) -> list[str] | None:
+    """プロパティ名を `filter_properties` に渡す ID に変換する（結果はキャッシュ）.
+
+    データベースに無い名前は警告して除く。スキーマを取得できないときは
+    None を返し、呼び出し側は絞り込まずに全プロパティを受け取る。
+    """
+    key = (database_id, tuple(names))
+    with _property_ids_lock:
+        if key in _property_ids:
+            return _property_ids[key]
+
+    try:
+        database = cast(NotionDatabase, client.databases.retrieve(database_id))
+    except (HTTPResponseError, RequestTimeoutError) as e:
+        _log.warning(f"データベースのスキーマを取得できませんでした: {e}")
+        return None
+
+    schema = database.get("properties", {})
+    missing = [name for name in names if name not in schema]
+    if missing:
+        _log.warning(f"データベースに存在しないプロパティです: {missing}")
+    ids = [schema[name]["id"] for name in names if name in schema]
+
+    with _property_ids_lock:
+        _property_ids[key] = ids
+    return ids
+
+
+def projected_property_ids(client: Client, database_id: str) -> list[str] | None:
+    """取得に必要なプロパティ（テキストと日付）の ID を返す."""
+    return resolve_property_ids(
+        client, database_id, [*text_properties(), DATE_PROPERTY]
+    )
+
+
 # --- メイン関数 ---
 def fetch_good_things(
     token: str, database_id: str, target_month: str | None = None
@@ -63,66 +168,147 @@ def fetch_good_things(
     Notionから対象月(YYYY-MM)のデータを厳密に抽出。
     JSTタイムゾーンを明示することで、境界線上の5/1混入を完全に防ぐ。
     """
-    client = Client(auth=token)
-    sorts_list = [{"property": "日付", "direction": "descending"}]
-    filter_obj = None
-    page_size = 30
+    entries = iter_good_things_entries(token, database_id, target_month)
+    return " ".join(entry["text"] for entry in entries)
 
-    if target_month:
-        try:
-            year_str, month_str = target_month.split("-")
-            year, month = int(year_str), int(month_str)
-
-            # 月の最終日を計算
-            last_day = calendar.monthrange(year, month)[1]
-
-            # 開始日と終了日を ISO8601 形式（日本時間 +09:00）で指定
-            # これにより、Notion内部のUTC変換による1日のズレを阻止する
-            start_iso = f"{year}-{month:02d}-01T00:00:00+09:00"
-            end_iso = f"{year}-{month:02d}-{last_day}T23:59:59+09:00"
-
-            filter_obj = {
-                "and": [
-                    {"property": "日付", "date": {"on_or_after": start_iso}},
-                    {"property": "日付", "date": {"on_or_before": end_iso}},
-                ]
-            }
-            page_size = 100
-        except ValueError as e:
-            raise ValueError(f"target_month形式不正(YYYY-MM): {target_month}") from e
-
-    # クエリパラメータ構築
-    query_params = {
-        "database_id": database_id,
-        "sorts": sorts_list,
-        "page_size": page_size,
-    }
-    if filter_obj:
-        query_params["filter"] = filter_obj
 
-    # クエリ実行
-    response_data = client.databases.query(**query_params)
+def fetch_good_things_entries(
+    token: str, database_id: str, target_month: str | None = None
+) -> list[GoodThingsEntry]:
+    """
+    `fetch_good_things` と同じ条件で取得し、ページID・日付を保ったまま
+    ページ単位のエントリとして返す。
+    """
+    return list(iter_good_things_entries(token, database_id, target_month))
+
 
-    # 型キャスト (Anyを使わず Pylance を黙らせる)
-    response = cast(NotionQueryResponse, response_data)
+def iter_good_things_entries(
+    token: str, database_id: str, target_month: str | None = None
+) -> Iterator[GoodThingsEntry]:
+    """ページを受け取るたびにエントリへ変換して返す.
 
-    all_good_things: list[str] = []
-    for result in response["results"]:
-        props = result["properties"]
+    Notion には必要なプロパティだけを返させ（`filter_properties`）、
+    受け取ったページはその場でテキストだけのエントリにして手放す。
+    """
+    client = create_notion_client(token)
+    property_ids = projected_property_ids(client, database_id)
+    text_keys = text_properties()
 
-        # 抽出対象のキー
-        target_keys = ["良かったこと１", "良かったこと２", "良かったこと３"]
-        combined_row_texts: list[str] = []
+    if target_month:
+        pages = query_pages(
+            client,
+            database_id,
+            build_month_filter(target_month),
+            filter_properties=property_ids,
+        )
+    else:
+        # 最新モード: 直近の LATEST_PAGE_SIZE 件のみ
+        pages = query_pages(
+            client,
+            database_id,
+            None,
+            page_size=LATEST_PAGE_SIZE,
+            max_pages=1,
+            filter_properties=property_ids,
+        )
+
+    for page in pages:
+        yield page_to_entry(page, text_keys)
+
+
+def month_bounds(target_month: str) -> tuple[date, date]:
+    """対象月(YYYY-MM)の初日と、翌月の初日を返す（日本時間の暦の日付）."""
+    try:
+        year_str, month_str = target_month.split("-")
+        year, month = int(year_str), int(month_str)
+        start = date(year, month, 1)
+    except ValueError as e:
+        raise ValueError(f"target_month形式不正(YYYY-MM): {target_month}") from e
+    return start, date(year + month // 12, month % 12 + 1, 1)
+
+
+def build_month_filter(target_month: str) -> dict[str, object]:
+    """対象月(YYYY-MM)の日付範囲フィルタを組み立てる."""
+    start, next_start = month_bounds(target_month)
+    last_day = next_start - timedelta(days=1)
+
+    # 開始日と終了日を ISO8601 形式（日本時間 +09:00）で指定
+    # これにより、Notion内部のUTC変換による1日のズレを阻止する
+    start_iso = f"{start.isoformat()}T00:00:00+09:00"
+    end_iso = f"{last_day.isoformat()}T23:59:59+09:00"
+
+    return {
+        "and": [
+            {"property": DATE_PROPERTY, "date": {"on_or_after": start_iso}},
+            {"property": DATE_PROPERTY, "date": {"on_or_before": end_iso}},
+        ]
+    }
 
-        for key in target_keys:
-            if key in props:
-                # _extract_text に渡す前に型安全なリストを渡す
-                text_list = props[key].get("rich_text", [])
-                combined_row_texts.append(_extract_text(text_list))
 
-        all_good_things.append(" ".join(combined_row_texts))
+def query_pages(
+    client: Client,
+    database_id: str,
+    filter_obj: Mapping[str, object] | None,
+    page_size: int = 100,
+    max_pages: int | None = None,
+    filter_properties: Sequence[str] | None = None,
+) -> Iterator[NotionPage]:
+    """データベースを日付の降順で問い合わせ、ページを順に返す（ページング対応）.
 
-    return " ".join(all_good_things)
+    filter_properties を渡すと、ページにはそのプロパティだけが含まれる。
+    """
+    sorts_list: list[NotionSort] = [
+        {"property": DATE_PROPERTY, "direction": "descending"}
+    ]
+    query_params: dict[str, object] = {
+        "sorts": sorts_list,
+        "page_size": page_size,
+    }
+    if filter_obj:
+        query_params["filter"] = filter_obj
+    if filter_properties:
+        query_params["filter_properties"] = list(filter_properties)
+
+    fetched = 0
+    while True:
+        # 型キャスト (Anyを使わず Pylance を黙らせる)
+        response = cast(
+            NotionQueryResponse, client.databases.query(database_id, **query_params)
+        )
+        results = response["results"]
+        # 返したページは手元に残さず、変換後すぐに解放されるようにする
+        results.reverse()
+        while results:
+            yield results.pop()
+
+        fetched += 1
+        next_cursor = response.get("next_cursor")
+        if not response.get("has_more") or not next_cursor:
+            break
+        if max_pages is not None and fetched >= max_pages:
+            break
+        query_params["start_cursor"] = next_cursor
+
+
+def page_to_entry(
+    page: NotionPage, text_keys: Sequence[str] | None = None
+) -> GoodThingsEntry:
+    """Notionのページを「良かったこと」のエントリに変換する."""
+    props = page["properties"]
+    combined_row_texts: list[str] = []
+
+    for key in text_keys if text_keys is not None else text_properties():
+        if key in props:
+            # _extract_text に渡す前に型安全なリストを渡す
+            text_list = props[key].get("rich_text", [])
+            combined_row_texts.append(_extract_text(text_list))
+
+    date_value = props.get(DATE_PROPERTY, {}).get("date")
+    return {
+        "page_id": page["id"],
+        "date": date_value["start"] if date_value else None,
+        "text": " ".join(combined_row_texts),
+    }
 
 
 def _extract_text(rich_text_array: list) -> str:
@@ -0,0 +1,217 @@
+"""ストップワード・ユーザー辞書の一覧をページ単位で表示するためのモジュール.
+
+一覧は絞り込み・並べ替え・ページ分割をすべてサーバー側（PostgREST）で行い、
+1ページ分の行と総件数だけを受け取る。表示は `st.data_editor` 1つにまとめ、
+削除や編集は「保存」でまとめて送る。これにより描画時間が件数に依存しない。
+"""
+
+import math
+from collections.abc import Iterator, Mapping, Sequence
+from dataclasses import dataclass, field, replace
+from typing import TYPE_CHECKING, Any, cast
+
+import streamlit as st
+from postgrest.types import CountMethod
+
+if TYPE_CHECKING:
+    from src.services.history_maker import SupabaseClientLike
+
+# 1ページの行数の選択肢
+PAGE_SIZE_OPTIONS = (50, 100, 200)
+# 全件を順に読むときの1リクエストの行数（PostgREST の max-rows 既定値）
+SCAN_PAGE_SIZE = 1000
+# 削除チェック用に一覧へ足す列
+DELETE_COLUMN = "削除"
+
+
+@dataclass(frozen=True)
+class PageQuery:
+    """一覧の表示条件."""
+
+    search: str = ""
+    sort_column: str = "word"
+    descending: bool = False
+    page: int = 1
+    page_size: int = PAGE_SIZE_OPTIONS[0]
+
+
+@dataclass
+class Page:
+    """サーバーから取得した1ページ分の行と、条件に合う総件数."""
+
+    rows: list[dict[str, Any]]
+    total: int
+    query: PageQuery
+
+    @property
+    def page_count(self) -> int:
+        return max(1, math.ceil(self.total / self.query.page_size))
+
+
+@dataclass
+class TableEdits:
+    """data_editor 上の変更（削除する ID と、値を書き換えた行）."""
+
+    deleted_ids: list[int] = field(default_factory=list)
+    updated_rows: list[dict[str, Any]] = field(default_factory=list)
+
+    def __bool__(self) -> bool:
+        return bool(self.deleted_ids or self.updated_rows)
+
+
+def escape_like(text: str) -> str:
+    """LIKE のワイルドカード（% と _）を文字として扱うようにエスケープする."""
+    return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def fetch_page(
+    client: "SupabaseClientLike",
+    table: str,
+    user_id: str,
+    columns: str,
+    search_column: str,
+    query: PageQuery,
+) -> Page:
+    """検索・並べ替え済みの1ページ分を取得する（総件数も同じリクエストで得る）.
+
+    ページ番号が範囲外なら最終ページを取り直す。
+    """
+    page = _fetch_page(client, table, user_id, columns, search_column, query)
+    if query.page > page.page_count:
+        last = replace(query, page=page.page_count)
+        page = _fetch_page(client, table, user_id, columns, search_column, last)
+    return page
+
+
+def _fetch_page(
+    client: "SupabaseClientLike",
+    table: str,
+    user_id: str,
+    columns: str,
+    search_column: str,
+    query: PageQuery,
+) -> Page:
+    start = (query.page - 1) * query.page_size
+    request = (
+        client.table(table)
+        .select(columns, count=CountMethod.exact)
+        .eq("user_id", user_id)
+    )
+    if query.search:
+        request = request.ilike(search_column, f"%{escape_like(query.search)}%")
+    response = (
+        request.order(query.sort_column, desc=query.descending)
+        .order("id")
+        .range(start, start + query.page_size - 1)
+        .execute()
+    )
+    rows = _rows(response.data)
+    return Page(rows=rows, total=response.count or 0, query=query)
+
+
+def _rows(data: object) -> list[dict[str, Any]]:
+    if isinstance(data, list):
+        return cast(list[dict[str, Any]], data)
+    return []
+
+
+def iter_all_rows(
+    client: "SupabaseClientLike",
+    table: str,
+    user_id: str,
+    columns: str,
+    page_size: int = SCAN_PAGE_SIZE,
+) -> Iterator[dict[str, Any]]:
+    """ユーザーの全行を ID 順に page_size 件ずつ読みながら返す（書き出し用）.
+
+    1回の select は max-rows で打ち切られるため、件数が多くても range で順に読む。
+    """
+    start = 0
+    while True:
+        response = (
+            client.table(table)
+            .select(columns)
+            .eq("user_id", user_id)
+            .order("id")
+            .range(start, start + page_size - 1)
+            .execute()
+        )
+        rows = _rows(response.data)
+        yield from rows
+        if len(rows) < page_size:
+            return
+        start += page_size
+
+
+def diff_edits(
+    original: Sequence[Mapping[str, Any]],
+    edited: Sequence[Mapping[str, Any]],
+    editable_columns: Sequence[str],
+) -> TableEdits:
+    """data_editor の編集前後を比べ、削除と書き換えをまとめる."""
+    edits = TableEdits()
+    for before, after in zip(original, edited):
+        if after.get(DELETE_COLUMN):
+            edits.deleted_ids.append(int(before["id"]))
+            continue
+        changed = {c: after[c] for c in editable_columns if after[c] != before[c]}
+        if changed:
+            edits.updated_rows.append({"id": int(before["id"]), **changed})
+    return edits
+
+
+def page_query_controls(
+    key: str, sort_labels: Mapping[str, str], search_label: str = "検索"
+) -> PageQuery:
+    """検索・並べ替え・表示件数の入力欄を描き、現在の表示条件を返す.
+
+    ページ番号は `page_navigation` が描く入力欄の値を使う。検索条件が
+    変わったときは1ページ目に戻す。
+    """
+    col1, col2, col3 = st.columns([4, 3, 2])
+    with col1:
+        search = st.text_input(search_label, key=f"{key}_search").strip()
+    with col2:
+        sort_options = [
+            (column, desc) for column in sort_labels for desc in (False, True)
+        ]
+        sort_column, descending = st.selectbox(
+            "並べ替え",
+            sort_options,
+            format_func=lambda o: (
+                f"{sort_labels[o[0]]}（{'降順' if o[1] else '昇順'}）"
+            ),
+            key=f"{key}_sort",
+        )
+    with col3:
+        page_size = st.selectbox("表示件数", PAGE_SIZE_OPTIONS, key=f"{key}_size")
+
+    page_key = f"{key}_page"
+    condition = (search, sort_column, descending, page_size)
+    if st.session_state.get(f"{key}_condition") != condition:
+        st.session_state[f"{key}_condition"] = condition
+        st.session_state[page_key] = 1
+
+    return PageQuery(
+        search=search,
+        sort_column=sort_column,
+        descending=descending,
+        page=int(st.session_state.get(page_key, 1)),
+        page_size=page_size,
+    )
+
+
+def page_navigation(key: str, page: Page) -> None:
+    """ページ番号の入力欄と表示範囲を描く."""
+    page_key = f"{key}_page"
+    # 範囲外に補正したページ番号を入力欄にも反映する
+    st.session_state[page_key] = page.query.page
+    col1, col2 = st.columns([1, 3])
+    with col1:
+        st.number_input(
+            "ページ", min_value=1, max_value=page.page_count, step=1, key=page_key
+        )
+    with col2:
+        start = (page.query.page - 1) * page.query.page_size
+        shown = f"{start + 1}〜{start + len(page.rows)}" if page.rows else "0"
+        st.caption(f"{page.total}件中 {shown}件目（全{page.page_count}ページ）")
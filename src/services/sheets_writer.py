@@ -1,52 +1,153 @@
-"""Google Sheetsに頻出単語の出現回数を記録するモジュール."""
+"""Google Sheetsに頻出単語の出現回数を記録するモジュール.
 
+書き込みは `spreadsheets.batchUpdate` 1回にまとめる。`updateCells` は範囲のうち
+データで埋まらなかったセルを空にするため、列全体を範囲にすれば古い行の削除も
+同じリクエストで済み、事前にシートを読む必要がない。
+"""
+
+import threading
 from collections import Counter
+from collections.abc import Mapping
+from typing import Any
 
 import gspread
 from google.oauth2 import service_account
 from gspread import Spreadsheet, Worksheet
 
+SCOPES = [
+    "https://www.googleapis.com/auth/spreadsheets",
+    "https://www.googleapis.com/auth/drive",
+]
+HEADER = ["単語", "出現回数"]
+
+# 認証済みクライアントは資格情報ファイルごとに1つを使い回す（接続も再利用される）
+_clients: dict[str, gspread.Client] = {}
+_clients_lock = threading.Lock()
 
-def connect_to_sheet(creds_path: str, sheet_name: str) -> Worksheet:
-    """Google Sheetsに接続し、最初のワークシートを返す."""
 
-    scope = [
-        "https://www.googleapis.com/auth/spreadsheets",
-        "https://www.googleapis.com/auth/drive",
-    ]
+def get_sheets_client(creds_path: str) -> gspread.Client:
+    """資格情報ファイルごとに1つの認証済みクライアントを共有して返す."""
+    with _clients_lock:
+        if creds_path not in _clients:
+            creds = service_account.Credentials.from_service_account_file(
+                creds_path, scopes=SCOPES
+            )
+            _clients[creds_path] = gspread.authorize(creds)
+        return _clients[creds_path]
 
-    creds = service_account.Credentials.from_service_account_file(
-        creds_path, scopes=scope
-    )
-    client = gspread.authorize(creds)
 
+def connect_to_sheet(creds_path: str, sheet_name: str) -> Worksheet:
+    """Google Sheetsに接続し、最初のワークシートを返す."""
     # Spreadsheetとして開き、最初のWorksheetを取得
-    spreadsheet: Spreadsheet = client.open(sheet_name)
+    spreadsheet: Spreadsheet = get_sheets_client(creds_path).open(sheet_name)
     worksheet: Worksheet = spreadsheet.get_worksheet(0)
 
     return worksheet
 
 
-def write_word_count(
-    worksheet: Worksheet, word_count: Counter[str], top_n: int = 5
-) -> None:
-    """頻出単語の上位をスプレッドシートに書き込む."""
+def _cell(value: object) -> dict[str, object]:
+    if isinstance(value, (int, float)):
+        return {"userEnteredValue": {"numberValue": value}}
+    return {"userEnteredValue": {"stringValue": str(value)}}
+
 
-    # object型で定義（文字列と数値の混在を許容）
-    rows: list[list[object]] = [["単語", "出現回数"]]
+def word_count_rows(word_count: Counter[str], top_n: int) -> list[list[object]]:
+    """ヘッダーと上位 top_n 件の行を返す."""
+    rows: list[list[object]] = [list(HEADER)]
+    rows.extend([word, count] for word, count in word_count.most_common(top_n))
+    return rows
 
-    for word, count in word_count.most_common(top_n):
-        rows.append([word, count])
 
-    end_row = top_n + 1
-    cell_range = f"A1:B{end_row}"
+def update_cells_request(sheet_id: int, rows: list[list[object]]) -> dict[str, Any]:
+    """A:B 列を rows で置き換える updateCells リクエストを返す.
 
-    worksheet.update(values=rows, range_name=cell_range)
+    行数を指定しない範囲にすることで、rows より下に残っていた古い値も消える。
+    """
+    return {
+        "updateCells": {
+            "range": {
+                "sheetId": sheet_id,
+                "startRowIndex": 0,
+                "startColumnIndex": 0,
+                "endColumnIndex": len(HEADER),
+            },
+            "rows": [{"values": [_cell(v) for v in row]} for row in rows],
+            "fields": "userEnteredValue",
+        }
+    }
 
-    # 古い行をクリア
-    all_values: list[list[str]] = worksheet.get_all_values()
-    current_rows = len(all_values)
 
-    if current_rows > end_row:
-        clear_range = f"A{end_row + 1}:B{current_rows}"
-        worksheet.batch_clear([clear_range])
+def write_word_count(
+    worksheet: Worksheet, word_count: Counter[str], top_n: int = 5
+) -> None:
+    """頻出単語の上位をスプレッドシートに書き込む（古い行の削除も1リクエストで行う）."""
+    request = update_cells_request(worksheet.id, word_count_rows(word_count, top_n))
+    worksheet.spreadsheet.batch_update({"requests": [request]})
+
+
+def month_sheet_id(month: str) -> int:
+    """月のタブに使う sheetId（"2025-07" → 202507）."""
+    return int(month.replace("-", ""))
+
+
+class MonthlySheetsExporter:
+    """複数月の集計を、月ごとのタブへ1回の batchUpdate でまとめて書き込む.
+
+    タブの一覧は最初の書き込み時にメタデータ（値は含まない）から一度だけ取得し、
+    以降は追加したタブも含めて手元で管理する。
+    """
+
+    def __init__(self, spreadsheet: Spreadsheet):
+        self._spreadsheet = spreadsheet
+        self._sheet_ids: dict[str, int] | None = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def open(cls, creds_path: str, sheet_name: str) -> "MonthlySheetsExporter":
+        """共有クライアントでスプレッドシートを開く."""
+        return cls(get_sheets_client(creds_path).open(sheet_name))
+
+    def _known_sheet_ids(self) -> dict[str, int]:
+        if self._sheet_ids is None:
+            metadata = self._spreadsheet.fetch_sheet_metadata(
+                {"fields": "sheets.properties(sheetId,title)"}
+            )
+            self._sheet_ids = {
+                sheet["properties"]["title"]: sheet["properties"]["sheetId"]
+                for sheet in metadata.get("sheets", [])
+            }
+        return self._sheet_ids
+
+    def export(
+        self, counts_by_month: Mapping[str, Counter[str]], top_n: int = 5
+    ) -> int:
+        """月ごとのタブ（無ければ作る）に上位 top_n 件を書き込み、書いた月数を返す."""
+        if not counts_by_month:
+            return 0
+
+        with self._lock:
+            sheet_ids = self._known_sheet_ids()
+            new_tabs: dict[str, int] = {}
+            requests: list[dict[str, Any]] = []
+            for month in sorted(counts_by_month):
+                sheet_id = sheet_ids.get(month)
+                if sheet_id is None:
+                    used = {*sheet_ids.values(), *new_tabs.values()}
+                    sheet_id = month_sheet_id(month)
+                    if sheet_id in used:  # 名前を変えたタブが同じ ID を使っている
+                        sheet_id = max(used) + 1
+                    new_tabs[month] = sheet_id
+                    requests.append(
+                        {
+                            "addSheet": {
+                                "properties": {"sheetId": sheet_id, "title": month}
+                            }
+                        }
+                    )
+                rows = word_count_rows(counts_by_month[month], top_n)
+                requests.append(update_cells_request(sheet_id, rows))
+
+            self._spreadsheet.batch_update({"requests": requests})
+            # 失敗したリクエストは全体が取り消されるため、成功後にだけ反映する
+            sheet_ids.update(new_tabs)
+        return len(counts_by_month)
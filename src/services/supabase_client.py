@@ -6,18 +6,45 @@ import streamlit as st
 from dotenv import load_dotenv
 from supabase import Client, create_client
 
+# 全ユーザーの行を読む処理（ウォームアップ・運用者向けの集計）で使う鍵の環境変数
+SERVICE_ROLE_KEY_ENV = "SUPABASE_SERVICE_ROLE_KEY"
+
+
+def create_supabase_client() -> Client:
+    """環境変数からSupabaseクライアントを新規生成する（セッション非依存）."""
+    load_dotenv("config/.env")
+    url = os.getenv("SUPABASE_URL")
+    key = os.getenv("SUPABASE_KEY")
+
+    if not url or not key:
+        raise ValueError(
+            "SUPABASE_URL または SUPABASE_KEY が環境変数に設定されていません。"
+        )
+
+    return create_client(url, key)
+
+
+def create_service_supabase_client() -> Client:
+    """サービスロールの鍵でSupabaseクライアントを新規生成する.
+
+    行レベルセキュリティを通らず全ユーザーの行を読めるので、ユーザーのセッションでは
+    使わない（anon の鍵では他のユーザーの行は返らない）。
+    """
+    load_dotenv("config/.env")
+    url = os.getenv("SUPABASE_URL")
+    key = os.getenv(SERVICE_ROLE_KEY_ENV)
+
+    if not url or not key:
+        raise ValueError(
+            f"SUPABASE_URL または {SERVICE_ROLE_KEY_ENV} が"
+            "環境変数に設定されていません。"
+        )
+
+    return create_client(url, key)
+
 
 def get_supabase_client() -> Client:
     """Supabaseクライアントを生成または取得する関数."""
     if "supabase" not in st.session_state:
-        load_dotenv("config/.env")
-        url = os.getenv("SUPABASE_URL")
-        key = os.getenv("SUPABASE_KEY")
-
-        if not url or not key:
-            raise ValueError(
-                "SUPABASE_URL または SUPABASE_KEY が環境変数に設定されていません。"
-            )
-
-        st.session_state.supabase = create_client(url, key)
+        st.session_state.supabase = create_supabase_client()
     return st.session_state.supabase
@@ -0,0 +1,251 @@
+"""月ごとのキーワード推移（上昇・下降）を計算し、マテリアライズするモジュール.
+
+月ごとの全キーワードの出現回数（`monthly_keyword_counts`）から「月 × キーワード」の
+行列を作り、前月差・移動平均・成長スコアを配列演算で一括計算して `keyword_trends`
+テーブルへ保存する。トレンド画面は `keyword_trends` を1回の索引付きクエリで
+読むだけでよい。
+
+保存はどちらのテーブルも (user_id, target_month, word) で upsert してから、
+今回の結果に無い古い行だけを削除する（トランザクションを使えないので、途中で
+失敗しても行が消えた状態にはならず、次の再計算の入力も欠けない）。
+
+`monthly_keywords` は各月の上位 N 件しか持たないので使わない（6位に落ちた語が
+0回扱いになり、下降と誤判定されるため）。全件の記録が無い月（全件の保存を
+始める前に解析した月）は、解析し直すまで推移に含まれない。
+
+想定するテーブル定義::
+
+    create table monthly_keyword_counts (
+        id bigint generated always as identity primary key,
+        user_id uuid not null,
+        target_month text not null,
+        word text not null,
+        count integer not null,
+        unique (user_id, target_month, word)
+    );
+
+    create table keyword_trends (
+        user_id uuid not null,
+        target_month text not null,
+        word text not null,
+        count integer not null,
+        delta integer not null,
+        moving_avg real not null,
+        growth_score real not null,
+        primary key (user_id, target_month, word)
+    );
+    create index on keyword_trends (user_id, target_month, growth_score desc);
+"""
+
+import logging
+from collections.abc import Iterator
+from typing import TYPE_CHECKING, Any, TypedDict, cast
+
+import numpy as np
+
+from src.logs.logger import KELogger
+from src.services.bulk_ops import upsert_in_batches
+
+if TYPE_CHECKING:
+    from src.services.history_maker import SupabaseClientLike
+
+_logger = logging.getLogger("keyword_logger")
+
+# 移動平均を取る月数
+MOVING_AVERAGE_MONTHS = 3
+# 月ごとに保存する上昇・下降それぞれの件数（画面に出ない語は保存しない）
+TRENDS_PER_MONTH = 50
+# 全件の出現回数を読むときの1リクエストの行数
+COUNTS_PAGE_SIZE = 1000
+
+
+class MonthlyKeywordRow(TypedDict):
+    """monthly_keyword_counts テーブルから参照する列."""
+
+    target_month: str
+    word: str
+    count: int
+
+
+class KeywordTrendRow(TypedDict):
+    """keyword_trends テーブルの1行."""
+
+    target_month: str
+    word: str
+    count: int
+    delta: int
+    moving_avg: float
+    growth_score: float
+
+
+def compute_trends(
+    rows: list[MonthlyKeywordRow],
+    window: int = MOVING_AVERAGE_MONTHS,
+    per_month: int | None = None,
+) -> list[KeywordTrendRow]:
+    """月ごとのキーワード出現回数から推移指標を計算する.
+
+    - delta: 前月からの増減（記録の無い月・キーワードは 0 回として扱う）
+    - moving_avg: 当月を含む直近 window か月の平均
+    - growth_score: 前月までの移動平均に対する伸び率 (count - prev) / (prev + 1)
+
+    当月または前月に出現したキーワードだけを返す（前月だけに出現したものは
+    「消えた」キーワードとして負の delta で残る）。
+    per_month を指定すると、月ごとに成長スコアの高い上昇（delta > 0）と
+    低い下降（delta < 0）をそれぞれ per_month 件までに絞る。
+    """
+    if not rows:
+        return []
+
+    # 月を通し番号にし、記録の無い月も 0 回の行として間を埋める
+    month_nums = np.array([_month_number(r["target_month"]) for r in rows])
+    first_month = int(month_nums.min())
+    month_idx = month_nums - first_month
+    months = [_month_label(first_month + i) for i in range(int(month_idx.max()) + 1)]
+    words, word_idx = np.unique([r["word"] for r in rows], return_inverse=True)
+
+    # 月 × キーワードの出現回数行列（同じ組が複数あれば合算）
+    counts = np.zeros((len(months), len(words)), dtype=np.int64)
+    np.add.at(counts, (month_idx, word_idx), [r["count"] for r in rows])
+
+    previous = np.vstack([np.zeros((1, len(words)), dtype=np.int64), counts[:-1]])
+    delta = counts - previous
+
+    # 累積和で移動平均を一括計算（先頭の月は存在する月数で割る）
+    padded = np.vstack([np.zeros((1, len(words))), np.cumsum(counts, axis=0)])
+    month_pos = np.arange(len(months))
+    lower = np.maximum(month_pos + 1 - window, 0)
+    sums = padded[month_pos + 1] - padded[lower]
+    moving_avg = sums / (month_pos + 1 - lower)[:, None]
+
+    # 前月時点の移動平均（先頭の月は 0）
+    prev_avg = np.vstack([np.zeros((1, len(words))), moving_avg[:-1]])
+    growth = (counts - prev_avg) / (prev_avg + 1.0)
+
+    keep = (counts > 0) | (previous > 0)
+    if per_month is not None:
+        keep &= _top_per_month(growth, delta > 0, per_month) | _top_per_month(
+            -growth, delta < 0, per_month
+        )
+    month_i, word_i = np.nonzero(keep)
+    return [
+        {
+            "target_month": months[m],
+            "word": str(words[w]),
+            "count": int(counts[m, w]),
+            "delta": int(delta[m, w]),
+            "moving_avg": round(float(moving_avg[m, w]), 4),
+            "growth_score": round(float(growth[m, w]), 4),
+        }
+        for m, w in zip(month_i.tolist(), word_i.tolist())
+    ]
+
+
+def _top_per_month(score: np.ndarray, candidates: np.ndarray, n: int) -> np.ndarray:
+    """候補のうち、月（行）ごとに score の大きい n 件を True にしたマスク."""
+    masked = np.where(candidates, score, -np.inf)
+    # 行ごとに score の大きい順の位置を求め、n 番目までを選ぶ
+    order = np.argsort(-masked, axis=1, kind="stable")
+    ranks = np.empty_like(order)
+    np.put_along_axis(ranks, order, np.arange(order.shape[1])[None, :], axis=1)
+    return candidates & (ranks < n)
+
+
+def _month_number(target_month: str) -> int:
+    """YYYY-MM（または YYYY-MM-DD）を月の通し番号に変換する."""
+    year, month = target_month[:7].split("-")
+    return int(year) * 12 + int(month) - 1
+
+
+def _month_label(month_number: int) -> str:
+    return f"{month_number // 12}-{month_number % 12 + 1:02d}"
+
+
+def iter_keyword_counts(
+    supabase_client: "SupabaseClientLike",
+    user_id: str,
+    page_size: int = COUNTS_PAGE_SIZE,
+) -> Iterator[MonthlyKeywordRow]:
+    """ユーザーの monthly_keyword_counts を ID 順に page_size 件ずつ読みながら返す."""
+    last_id = 0
+    while True:
+        response = (
+            supabase_client.table("monthly_keyword_counts")
+            .select("id, target_month, word, count")
+            .eq("user_id", user_id)
+            .gt("id", last_id)
+            .order("id")
+            .limit(page_size)
+            .execute()
+        )
+        rows = cast(list[dict[str, Any]], response.data or [])
+        for row in rows:
+            yield {
+                "target_month": row["target_month"],
+                "word": row["word"],
+                "count": row["count"],
+            }
+        if len(rows) < page_size:
+            return
+        last_id = rows[-1]["id"]
+
+
+def _delete_stale_trends(
+    supabase_client: "SupabaseClientLike",
+    user_id: str,
+    trends: list[KeywordTrendRow],
+) -> None:
+    """今回の推移に無い keyword_trends の行（語・月）を削除する."""
+    words_by_month: dict[str, list[str]] = {}
+    for trend in trends:
+        words_by_month.setdefault(trend["target_month"], []).append(trend["word"])
+
+    for month, words in words_by_month.items():
+        (
+            supabase_client.table("keyword_trends")
+            .delete()
+            .eq("user_id", user_id)
+            .eq("target_month", month)
+            .not_.in_("word", words)
+            .execute()
+        )
+    request = supabase_client.table("keyword_trends").delete().eq("user_id", user_id)
+    if words_by_month:
+        request = request.not_.in_("target_month", list(words_by_month))
+    request.execute()
+
+
+def refresh_keyword_trends(
+    supabase_client: "SupabaseClientLike",
+    user_id: str,
+    per_month: int = TRENDS_PER_MONTH,
+) -> int:
+    """ユーザーの全件の出現回数から推移を再計算し、keyword_trends を置き換える.
+
+    Returns:
+        int: 保存した行数。
+    """
+    if not user_id:
+        raise ValueError("user_id が空です。")
+
+    from postgrest.exceptions import APIError
+
+    KELogger.start("キーワード推移更新")
+    try:
+        history = list(iter_keyword_counts(supabase_client, user_id))
+        trends = compute_trends(history, per_month=per_month)
+
+        rows = [{"user_id": user_id, **trend} for trend in trends]
+        saved = upsert_in_batches(
+            supabase_client,
+            "keyword_trends",
+            rows,
+            on_conflict="user_id,target_month,word",
+        )
+        _delete_stale_trends(supabase_client, user_id, trends)
+        return saved
+    except APIError as e:
+        _logger.error(f"キーワード推移の保存に失敗しました: {e.message}")
+        raise RuntimeError(f"Supabase persistence failed: {e.message}") from e
+    finally:
+        KELogger.end("キーワード推移更新")
@@ -0,0 +1,137 @@
+"""ユーザー辞書の CSV 取り込み・書き出しを行うモジュール.
+
+アップロードされた CSV は1行ずつ読み、`iter_dic_entries` で検証・正規化した
+エントリを一定件数ごとのチャンクにまとめる。チャンクごとに読みのカタカナ
+チェックと既存エントリ（最初に1回だけ読む）との重複排除を行い、まとめて insert する。
+辞書（.dic）のビルドは取り込みの最後に呼び出し側で一度だけ行う。
+"""
+
+import csv
+import io
+import re
+from collections.abc import Callable, Iterable, Iterator, Mapping, Sequence
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, cast
+
+from src.core.csv_to_dic import iter_dic_entries
+from src.services.bulk_ops import batched, fetch_normalized_keys, insert_in_batches
+
+if TYPE_CHECKING:
+    from src.services.history_maker import SupabaseClientLike
+
+# CSV の列（ヘッダー行）
+USER_DICT_COLUMNS = ("word", "part_of_speech", "reading", "pronunciation")
+# 2列（単語, 読み）の行に補う品詞
+DEFAULT_PART_OF_SPEECH = "名詞"
+# 検証・insert をまとめて行う行数
+IMPORT_CHUNK_SIZE = 1000
+
+KATAKANA_PATTERN = re.compile(r"[ァ-ンヴー]+")
+
+# ヘッダー行とみなす先頭列の値
+_HEADER_WORDS = {"word", "単語"}
+
+
+@dataclass
+class ImportResult:
+    """取り込み結果の件数."""
+
+    read: int = 0
+    added: int = 0
+    # 読みがカタカナでなかった行
+    invalid_reading: int = 0
+
+    @property
+    def skipped(self) -> int:
+        """登録しなかった行数（重複・形式不正・読みの不正を含む）."""
+        return self.read - self.added
+
+
+def is_katakana(reading: str) -> bool:
+    """読みがカタカナ（長音符を含む）だけで書かれているか."""
+    return KATAKANA_PATTERN.fullmatch(reading) is not None
+
+
+def iter_csv_rows(stream: Iterable[str]) -> Iterator[list[str]]:
+    """CSV を1行ずつ読み、4列（単語, 品詞, 読み, 発音）の行として返す.
+
+    先頭のヘッダー行と空行は読み飛ばす。2列（単語, 読み）の行は、
+    手入力と同じく品詞を「名詞」、発音を読みと同じにして補う。
+    """
+    for i, row in enumerate(csv.reader(stream)):
+        if not row or not any(field.strip() for field in row):
+            continue
+        if i == 0 and row[0].strip().lstrip("﻿").lower() in _HEADER_WORDS:
+            continue
+        if len(row) == 2:
+            word, reading = row
+            row = [word, DEFAULT_PART_OF_SPEECH, reading, reading]
+        yield row
+
+
+def import_user_dict(
+    client: "SupabaseClientLike",
+    user_id: str,
+    rows: Iterable[Sequence[str]],
+    chunk_size: int = IMPORT_CHUNK_SIZE,
+    on_progress: Callable[[ImportResult], object] | None = None,
+) -> ImportResult:
+    """辞書エントリをチャンク単位で検証し、新しいものだけをまとめて登録する.
+
+    登録済みの (単語, 読み) は最初に列だけを読んで正規化し、手元で照合する。
+
+    Args:
+        rows: 4列の行（`iter_csv_rows` の出力など）。
+        on_progress: チャンクを処理するたびに途中結果で呼ばれる。
+    """
+    result = ImportResult()
+    # 正規化前に保存された行も重複とみなすよう、登録済みの (単語, 読み) を
+    # 最初に1回だけ読んで正規化しておく
+    seen = cast(
+        set[tuple[str, str]],
+        fetch_normalized_keys(client, "user_dict", user_id, ["word", "reading"]),
+    )
+
+    def counted(source: Iterable[Sequence[str]]) -> Iterator[Sequence[str]]:
+        for row in source:
+            result.read += 1
+            yield row
+
+    for chunk in batched(iter_dic_entries(counted(rows)), chunk_size):
+        new_rows: list[dict[str, str]] = []
+        for word, part_of_speech, reading, pronunciation in chunk:
+            if not is_katakana(reading):
+                result.invalid_reading += 1
+                continue
+            if (word, reading) in seen:
+                continue
+            seen.add((word, reading))
+            new_rows.append(
+                {
+                    "user_id": user_id,
+                    "word": word,
+                    "part_of_speech": part_of_speech,
+                    "reading": reading,
+                    "pronunciation": pronunciation,
+                }
+            )
+
+        result.added += insert_in_batches(
+            client,
+            "user_dict",
+            new_rows,
+            batch_size=chunk_size,
+        )
+        if on_progress is not None:
+            on_progress(result)
+    return result
+
+
+def export_user_dict_csv(entries: Iterable[Mapping[str, Any]]) -> str:
+    """ユーザー辞書をヘッダー付きの CSV 文字列にする（取り込みと同じ形式）."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerow(USER_DICT_COLUMNS)
+    for entry in entries:
+        writer.writerow([entry[column] for column in USER_DICT_COLUMNS])
+    return buffer.getvalue()
@@ -0,0 +1,137 @@
+from supabase import create_client
+
+from benchmarks.loadtest.fakes import FakeSupabaseServer
+from src.services.bulk_ops import (
+    batched,
+    dedupe_words,
+    delete_by_ids,
+    find_existing_words,
+    insert_in_batches,
+    parse_word_list,
+    select_word_updates,
+)
+
+
+class FakeQuery:
+    def __init__(self, calls: list, table: str):
+        self.calls = calls
+        self.table = table
+
+    def insert(self, rows):
+        self.calls.append((self.table, "insert", rows))
+        return self
+
+    def delete(self):
+        self.calls.append((self.table, "delete"))
+        return self
+
+    def in_(self, column, values):
+        self.calls.append((self.table, "in", column, list(values)))
+        return self
+
+    def eq(self, column, value):
+        self.calls.append((self.table, "eq", column, value))
+        return self
+
+    def execute(self):
+        return self
+
+
+class FakeClient:
+    def __init__(self):
+        self.calls: list = []
+
+    def table(self, name: str):
+        return FakeQuery(self.calls, name)
+
+
+def test_貼り付けた単語リストを区切り文字で分割して正規化する():
+    text = "ＡＩ\r\n 散歩 ,読書、\n\tｶﾌｪ\n\n"
+    assert parse_word_list(text) == ["AI", "散歩", "読書", "カフェ"]
+
+
+def test_既存語と入力内の重複を除いて初出順に返す():
+    words = ["散歩", "ＡＩ", "読書", "AI", "散歩", "料理"]
+    assert dedupe_words(words, existing={"読書"}) == ["散歩", "AI", "料理"]
+
+
+def test_一括insertは指定件数ごとにまとめて送る():
+    client = FakeClient()
+    progress = []
+    rows: list[dict[str, object]] = [{"word": str(i)} for i in range(5)]
+
+    added = insert_in_batches(
+        client,
+        "stop_words",
+        rows,
+        batch_size=2,
+        on_progress=lambda d, t: progress.append((d, t)),
+    )
+
+    assert added == 5
+    assert [len(call[2]) for call in client.calls] == [2, 2, 1]
+    assert progress == [(2, 5), (4, 5), (5, 5)]
+
+
+def test_一括削除はユーザーで絞ってID単位でまとめて消す():
+    client = FakeClient()
+
+    assert delete_by_ids(client, "stop_words", "u1", [1, 2, 3], batch_size=2) == 3
+    assert ("stop_words", "in", "id", [1, 2]) in client.calls
+    assert ("stop_words", "in", "id", [3]) in client.calls
+    assert client.calls.count(("stop_words", "eq", "user_id", "u1")) == 2
+
+
+def test_正規化前に保存された語も登録済みとみなす():
+    with FakeSupabaseServer() as server:
+        server.seed(
+            "stop_words",
+            [
+                {"user_id": "u1", "word": "ＡＩ"},
+                {"user_id": "u1", "word": "ｶﾌｪ"},
+                {"user_id": "u2", "word": "散歩"},
+            ],
+        )
+        client = create_client(server.url, "loadtest.fake.key")
+
+        existing = find_existing_words(
+            client, "stop_words", "u1", ["AI", "カフェ", "散歩"]
+        )
+
+    assert existing == {"AI", "カフェ"}
+    assert dedupe_words(["AI", "カフェ", "散歩"], existing) == ["散歩"]
+
+
+def test_書き換えは自分の今の値や削除した行の語とは重複とみなさない():
+    with FakeSupabaseServer() as server:
+        server.seed(
+            "stop_words",
+            [
+                {"user_id": "u1", "word": "ＡＩ"},
+                {"user_id": "u1", "word": "散歩"},
+                {"user_id": "u1", "word": "読書"},
+                {"user_id": "u1", "word": "映画"},
+            ],
+        )
+        client = create_client(server.url, "loadtest.fake.key")
+        ai, walk, book, movie = (r["id"] for r in server.tables["stop_words"])
+        # 「映画」の行を削除し、その語へ「読書」を書き換える
+        delete_by_ids(client, "stop_words", "u1", [movie])
+
+        valid = select_word_updates(
+            client,
+            "stop_words",
+            "u1",
+            [
+                {"id": ai, "word": "AI"},  # 全角を直しただけ
+                {"id": book, "word": "映画"},
+                {"id": walk, "word": "AI"},  # 他の行の語と重なる
+                {"id": 999, "word": ""},
+            ],
+        )
+
+    assert [row["id"] for row in valid] == [ai, book]
+
+
+def test_batchedは端数も返す():
+    assert list(batched(range(5), 2)) == [[0, 1], [2, 3], [4]]
@@ -0,0 +1,58 @@
+import time
+
+from src.core.cooccurrence import (
+    CooccurrenceMatrix,
+    build_cooccurrence,
+    cooccurrence_path,
+    related_keywords,
+)
+
+
+def test_エントリ単位で共起が数えられる():
+    docs = [["散歩", "公園", "散歩", "犬"], ["公園", "犬"], ["読書"]]
+
+    matrix = build_cooccurrence(docs)
+
+    # 同じエントリ内の重複はエントリごとに1回だけ数える
+    assert matrix.related("公園") == [("犬", 2), ("散歩", 1)]
+    assert matrix.related("散歩") == [("公園", 1), ("犬", 1)]
+    assert matrix.related("読書") == []
+    assert matrix.related("未登録") == []
+
+
+def test_窓幅を指定すると近くに並んだ名詞だけが数えられる():
+    docs = [["A", "B", "C", "D"]]
+
+    matrix = build_cooccurrence(docs, window=1)
+
+    assert matrix.related("B") == [("A", 1), ("C", 1)]
+    assert matrix.related("A") == [("B", 1)]
+
+
+def test_top_kで件数が制限される():
+    docs = [["中心", f"語{i}"] for i in range(20)] + [["中心", "語3"]]
+
+    matrix = build_cooccurrence(docs)
+
+    assert matrix.related("中心", top_k=1) == [("語3", 2)]
+    assert len(matrix.related("中心", top_k=5)) == 5
+
+
+def test_保存した行列から関連キーワードを高速に引ける(tmp_path):
+    docs = [[f"語{i % 300}", f"語{(i * 7) % 300}", "共通"] for i in range(3000)]
+    path = cooccurrence_path("user", "2025-01", base_dir=str(tmp_path))
+    build_cooccurrence(docs).save(path)
+
+    loaded = CooccurrenceMatrix.load(path)
+    assert loaded.related("共通", top_k=3) == build_cooccurrence(docs).related(
+        "共通", top_k=3
+    )
+
+    # 初回でファイルを読み込み、以降はキャッシュ済みの行列を引く
+    related_keywords("user", "2025-01", "共通", base_dir=str(tmp_path))
+    start = time.perf_counter()
+    for _ in range(100):
+        related_keywords("user", "2025-01", "共通", base_dir=str(tmp_path))
+    assert (time.perf_counter() - start) / 100 < 1e-3
+
+    assert related_keywords("user", "2099-01", "共通", base_dir=str(tmp_path)) == []
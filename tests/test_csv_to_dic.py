@@ -1,3 +1,5 @@
+import csv
+import io
 import os
 import shutil
 import subprocess
@@ -6,7 +8,8 @@ from unittest.mock import MagicMock, patch
 
 import pytest
 
-from src.core.csv_to_dic import _build_mecab_dict, _csv_to_dic
+from src.core import csv_to_dic
+from src.core.csv_to_dic import _build_mecab_dict, _csv_to_dic, write_mecab_csv
 
 
 @pytest.fixture
@@ -71,3 +74,92 @@ def test_ビルド失敗時に例外がスローされる(mock_run: MagicMock, t
     # 実行して、例外が発生することを確認
     with pytest.raises(subprocess.CalledProcessError):
         _build_mecab_dict("dummy_dic", "dummy.csv", temp_dir)
+
+
+def test_同じ内容の辞書は再ビルドせずに同じパスを返す(
+    temp_dir: str, monkeypatch: pytest.MonkeyPatch
+):
+    monkeypatch.setattr(csv_to_dic, "USER_DIC_CACHE_DIR", temp_dir)
+    built: list[str] = []
+
+    def fake_build(dic_dir: str, csv_file: str, output_dir: str):
+        built.append(csv_file)
+        open(os.path.join(output_dir, "user.dic"), "wb").close()
+
+    monkeypatch.setattr(csv_to_dic, "_build_mecab_dict", fake_build)
+
+    first = csv_to_dic.build_user_dic_from_csv_data("林檎,名詞,リンゴ,リンゴ", "d")
+    second = csv_to_dic.build_user_dic_from_csv_data("林檎,名詞,リンゴ,リンゴ", "d")
+    other = csv_to_dic.build_user_dic_from_csv_data("蜜柑,名詞,ミカン,ミカン", "d")
+
+    assert first == second
+    assert first != other
+    assert len(built) == 2
+    assert os.path.exists(first)
+
+
+def test_カンマや引用符を含む単語がエスケープされる():
+    out = io.StringIO()
+    write_mecab_csv([["A,B", "名詞", "エービー", "エービー"]], out)
+
+    row = next(csv.reader(io.StringIO(out.getvalue())))
+    assert out.getvalue().startswith('"A,B",0,0,0,')
+    assert row[0] == "A,B"
+    assert len(row) == 13
+
+
+def test_不正な行と重複エントリが除外される():
+    out = io.StringIO()
+    count = write_mecab_csv(
+        [
+            ["林檎", "名詞", "リンゴ", "リンゴ"],
+            [" 林檎 ", "名詞", "リンゴ", "リンゴ"],  # 前後空白を除くと重複
+            ["蜜柑", "名詞", "ミカン"],  # 列不足
+            ["", "名詞", "カラ", "カラ"],  # 空欄
+            ["改\n行", "名詞", "カイギョウ", "カイギョウ"],  # 改行を含む
+            ["蜜柑", "名詞", "ミカン", "ミカン"],
+        ],
+        out,
+    )
+
+    assert count == 2
+    assert [r[0] for r in csv.reader(io.StringIO(out.getvalue()))] == ["林檎", "蜜柑"]
+
+
+def test_有効な行が無ければビルドせずに空のパスを返す(
+    temp_dir: str, monkeypatch: pytest.MonkeyPatch
+):
+    monkeypatch.setattr(csv_to_dic, "USER_DIC_CACHE_DIR", temp_dir)
+    build = MagicMock()
+    monkeypatch.setattr(csv_to_dic, "_build_mecab_dict", build)
+
+    assert csv_to_dic.build_user_dic_from_csv_data("林檎,名詞,,\n\n", "d") == ""
+    build.assert_not_called()
+    assert os.listdir(temp_dir) == []
+
+
+def test_ビルド済み辞書は最近使ったものだけを残す(
+    temp_dir: str, monkeypatch: pytest.MonkeyPatch
+):
+    monkeypatch.setattr(csv_to_dic, "USER_DIC_CACHE_DIR", temp_dir)
+    monkeypatch.setattr(csv_to_dic, "USER_DIC_CACHE_KEEP", 2)
+
+    def fake_build(dic_dir: str, csv_file: str, output_dir: str):
+        open(os.path.join(output_dir, "user.dic"), "wb").close()
+
+    monkeypatch.setattr(csv_to_dic, "_build_mecab_dict", fake_build)
+
+    def build(word: str) -> str:
+        return csv_to_dic.build_user_dic_from_csv_data(f"{word},名詞,ア,ア", "d")
+
+    apple = build("林檎")
+    orange = build("蜜柑")
+    # 林檎を使い直してから、3つ目をビルドすると蜜柑が消える
+    os.utime(os.path.dirname(orange), (0, 0))
+    assert build("林檎") == apple
+    grape = build("葡萄")
+
+    assert os.path.exists(apple)
+    assert os.path.exists(grape)
+    assert not os.path.exists(orange)
+    assert len(os.listdir(temp_dir)) == 2
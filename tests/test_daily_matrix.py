@@ -0,0 +1,61 @@
+import datetime
+
+import numpy as np
+
+from src.core.daily_matrix import DailyKeywordMatrix, build_daily_matrix
+
+ENTRIES = [
+    {"page_id": "p1", "date": "2025-07-01", "text": ""},
+    {"page_id": "p2", "date": "2025-07-01", "text": ""},
+    {"page_id": "p3", "date": "2025-07-07T09:00:00.000+09:00", "text": ""},
+    {"page_id": "p4", "date": None, "text": ""},
+]
+NOUNS = [["散歩", "公園", "散歩"], ["読書"], ["散歩"], ["料理"]]
+
+
+def _matrix() -> DailyKeywordMatrix:
+    return build_daily_matrix("2025-07", ENTRIES, NOUNS)  # type: ignore[arg-type]
+
+
+def test_日付ごとに名詞を数えて月の全日を行にする():
+    matrix = _matrix()
+
+    assert matrix.n_days == 31
+    assert matrix.dates[0] == datetime.date(2025, 7, 1)
+    assert matrix.series("散歩")[[0, 6]].tolist() == [2, 1]
+    # 日付の無いエントリは数えない
+    assert "料理" not in matrix.vocab
+    assert int(matrix.to_dense().sum()) == 5
+
+
+def test_期間と曜日で切り出せる():
+    matrix = _matrix()
+
+    assert matrix.word_counts() == {"散歩": 3, "公園": 1, "読書": 1}
+    assert matrix.word_counts(
+        start=datetime.date(2025, 7, 2), end=datetime.date(2025, 7, 31)
+    ) == {"散歩": 1}
+    # 2025-07-01 は火曜日、07-07 は月曜日
+    assert matrix.weekday_totals().tolist() == [1, 4, 0, 0, 0, 0, 0]
+    assert matrix.weekday_totals("散歩").tolist() == [1, 2, 0, 0, 0, 0, 0]
+
+
+def test_月の外の日付があれば行を広げる():
+    entries = [{"page_id": "p1", "date": "2025-06-30", "text": ""}]
+    matrix = build_daily_matrix("2025-07", entries, [["海"]])  # type: ignore[arg-type]
+
+    assert matrix.start == datetime.date(2025, 6, 30)
+    assert matrix.n_days == 32
+    assert matrix.series("海")[0] == 1
+
+
+def test_保存して読み込んでも同じ行列になる(tmp_path):
+    matrix = _matrix()
+    path = str(tmp_path / "u1" / "2025-07.npz")
+
+    matrix.save(path)
+    loaded = DailyKeywordMatrix.load(path)
+
+    assert loaded.start == matrix.start
+    assert loaded.vocab == matrix.vocab
+    assert np.array_equal(loaded.to_dense(), matrix.to_dense())
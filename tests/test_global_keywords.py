@@ -0,0 +1,191 @@
+import random
+from collections import Counter
+from functools import reduce
+
+from supabase import create_client
+
+from benchmarks.loadtest.fakes import FakeSupabaseServer
+from src.services.global_keywords import (
+    HeavyHitters,
+    list_tenants,
+    merge_monthly,
+    refresh_global_keywords,
+    tenant_partial,
+    tree_reduce,
+)
+
+
+def _keyword_row(user_id: str, month: str, word: str, count: int):
+    return {"user_id": user_id, "target_month": month, "word": word, "count": count}
+
+
+def test_スケッチの推定値は誤差の上限の範囲に収まる():
+    rng = random.Random(0)
+    # 少数の語が多く現れ、多数の語がまれに現れる分布
+    streams = [
+        [f"語{min(int(rng.paretovariate(1.2)), 500)}" for _ in range(2_000)]
+        for _ in range(6)
+    ]
+    truth = Counter(word for stream in streams for word in stream)
+    sketches = []
+    for stream in streams:
+        sketch = HeavyHitters(capacity=20)
+        for word in stream:
+            sketch.add(word)
+        sketches.append(sketch)
+
+    merged = reduce(HeavyHitters.merge, sketches)
+
+    assert merged.total == truth.total()
+    assert len(merged.counters) <= 20
+    for word, count in truth.items():
+        assert (
+            merged.estimate(word) <= count <= merged.estimate(word) + merged.max_error
+        )
+    assert merged.top(3)[0][0] == truth.most_common(1)[0][0]
+
+
+def test_語の数が上限以下なら正確に数える():
+    partial = tenant_partial(
+        [("2025-01-05", "散歩", 3), ("2025-01", "散歩", 2), ("2025-02", "本", 1)]
+    )
+
+    assert sorted(partial) == ["2025-01", "2025-02"]
+    assert partial["2025-01"].counts.counters == {"散歩": 5}
+    assert partial["2025-01"].users.counters == {"散歩": 1}
+    assert partial["2025-01"].counts.max_error == 0
+
+
+def test_二分木の併合は順序を保ち途中の結果を少なく持つ():
+    held: list[int] = []
+
+    def items():
+        for i in range(13):
+            yield [i]
+
+    def merge(left: list[int], right: list[int]) -> list[int]:
+        held.append(len(left) + len(right))
+        return left + right
+
+    assert tree_reduce(items(), merge) == list(range(13))
+    assert len(held) == 12
+    assert tree_reduce([], merge) is None
+    monthly = tree_reduce(
+        [tenant_partial([("2025-01", "海", 1)]) for _ in range(5)], merge_monthly
+    )
+    assert monthly is not None
+    assert monthly["2025-01"].tenant_count == 5
+
+
+def test_全ユーザーの月ごとの集計だけを保存し差分で更新する():
+    with FakeSupabaseServer() as server:
+        server.seed(
+            "monthly_keyword_counts",
+            [
+                _keyword_row("u1", "2025-01", "散歩", 5),
+                _keyword_row("u1", "2025-01", "本", 1),
+                _keyword_row("u2", "2025-01", "散歩", 2),
+                _keyword_row("u2", "2025-01", "映画", 4),
+                _keyword_row("u3", "2025-02", "海", 3),
+            ],
+        )
+        # 上位だけの monthly_keywords は読まない
+        server.seed("monthly_keywords", [_keyword_row("u2", "2025-01", "散歩", 30)])
+        client = create_client(server.url, "loadtest.fake.key")
+
+        assert refresh_global_keywords(client, workers=2) == {
+            "2025-01": 2,
+            "2025-02": 1,
+        }
+        rankings = server.tables["global_keyword_rankings"]
+        january = [
+            (r["rank"], r["word"], r["count"], r["user_count"])
+            for r in rankings
+            if r["target_month"] == "2025-01"
+        ]
+        assert january == [(1, "散歩", 7, 2), (2, "映画", 4, 1), (3, "本", 1, 1)]
+
+        # 集計済みの1月は読み直さず、最新の2月以降だけを作り直す
+        january_row = next(
+            r
+            for r in server.tables["global_keyword_months"]
+            if r["target_month"] == "2025-01"
+        )
+        january_row["tenant_count"] = -1
+        server.seed(
+            "monthly_keyword_counts",
+            [
+                _keyword_row("u1", "2025-02", "海", 1),
+                _keyword_row("u1", "2025-03", "雪", 2),
+            ],
+        )
+
+        assert refresh_global_keywords(client) == {"2025-02": 2, "2025-03": 1}
+        months = {
+            r["target_month"]: r["tenant_count"]
+            for r in server.tables["global_keyword_months"]
+        }
+        assert months == {"2025-01": -1, "2025-02": 2, "2025-03": 1}
+        february = [
+            (r["word"], r["count"], r["user_count"])
+            for r in server.tables["global_keyword_rankings"]
+            if r["target_month"] == "2025-02"
+        ]
+        assert february == [("海", 4, 2)]
+        assert all("sketch" not in r for r in server.tables["global_keyword_months"])
+
+
+def test_ユーザーの一覧はページごとにまとめて集め多い行は読み飛ばす():
+    with FakeSupabaseServer() as server:
+        server.seed(
+            "monthly_keyword_counts",
+            [_keyword_row(f"u{i:02d}", "2025-01", "散歩", 1) for i in range(12)]
+            + [_keyword_row("u05", "2025-01", f"語{i}", 1) for i in range(30)]
+            + [_keyword_row("u99", "2024-12", "雪", 1)],
+        )
+        client = create_client(server.url, "loadtest.fake.key")
+        requests_before = server.request_count
+
+        tenants = list_tenants(client, page_size=10)
+        requests_all = server.request_count - requests_before
+        assert list_tenants(client, "2025-01", page_size=10) == tenants[:-1]
+
+    assert tenants == [f"u{i:02d}" for i in range(12)] + ["u99"]
+    # 13ユーザーを1人ずつではなく、10行ずつのページでまとめて読む
+    assert requests_all < 6
+
+
+def test_作り直した月の減った順位と無くなった月を新しい行を書いた後に消す():
+    with FakeSupabaseServer() as server:
+        server.seed(
+            "monthly_keyword_counts",
+            [
+                _keyword_row("u1", "2025-01", "散歩", 5),
+                _keyword_row("u1", "2025-02", "本", 3),
+                _keyword_row("u1", "2025-02", "海", 1),
+                _keyword_row("u2", "2025-03", "雪", 2),
+            ],
+        )
+        client = create_client(server.url, "loadtest.fake.key")
+        refresh_global_keywords(client, incremental=False)
+
+        # 2月の語が1つ減り、3月の行が無くなった
+        server.tables["monthly_keyword_counts"] = [
+            r
+            for r in server.tables["monthly_keyword_counts"]
+            if r["word"] != "海" and r["target_month"] != "2025-03"
+        ]
+
+        assert refresh_global_keywords(client, incremental=False) == {
+            "2025-01": 1,
+            "2025-02": 1,
+        }
+        rankings = sorted(
+            (r["target_month"], r["rank"], r["word"])
+            for r in server.tables["global_keyword_rankings"]
+        )
+        assert rankings == [("2025-01", 1, "散歩"), ("2025-02", 1, "本")]
+        months = sorted(
+            r["target_month"] for r in server.tables["global_keyword_months"]
+        )
+        assert months == ["2025-01", "2025-02"]
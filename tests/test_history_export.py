@@ -0,0 +1,138 @@
+import os
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+from supabase import create_client
+
+from benchmarks.loadtest.fakes import FakeSupabaseServer
+from src.services.history_export import (
+    PART_FILE,
+    HistoryRow,
+    export_history,
+    exported_months,
+    iter_local_history,
+    iter_supabase_history,
+    partition_dir,
+)
+from src.services.keyword_index import KeywordIndex
+
+
+def _rows(month: str, n_users: int, words: list[str]) -> list[HistoryRow]:
+    return [
+        {
+            "user_id": f"u{u}",
+            "target_month": month,
+            "word": word,
+            "count": i + 1,
+            "ranker": "frequency",
+        }
+        for u in range(n_users)
+        for i, word in enumerate(words)
+    ]
+
+
+def test_月ごとのパーティションに辞書エンコードして書き出す(tmp_path):
+    rows = _rows("2025-01", 3, ["散歩", "読書"]) + _rows("2025-02", 2, ["料理"])
+    out_dir = str(tmp_path / "history")
+
+    written = export_history(lambda since: iter(rows), out_dir, chunk_rows=4)
+
+    assert written == {"2025-01": 6, "2025-02": 2}
+    table = pq.read_table(out_dir)
+    assert table.num_rows == 8
+    assert table.schema.field("word").type == pa.dictionary(pa.int32(), pa.string())
+    # 月ごとの書きかけが chunk_rows に達するたびに行グループになる
+    metadata = pq.ParquetFile(
+        os.path.join(partition_dir(out_dir, "2025-01"), PART_FILE)
+    )
+    assert metadata.num_row_groups == 2
+    frame = table.to_pandas()
+    assert frame.groupby("target_month", observed=True)["count"].sum().to_dict() == {
+        "2025-01": 9,
+        "2025-02": 2,
+    }
+
+
+def test_差分書き出しは最新の月以降だけを置き換える(tmp_path):
+    out_dir = str(tmp_path / "history")
+    export_history(
+        lambda since: iter(_rows("2025-01", 1, ["散歩"]) + _rows("2025-02", 1, ["本"])),
+        out_dir,
+    )
+    january = os.path.join(partition_dir(out_dir, "2025-01"), PART_FILE)
+    january_mtime = os.stat(january).st_mtime_ns
+    requested: list[str | None] = []
+
+    def source(since: str | None):
+        requested.append(since)
+        return iter(_rows("2025-02", 2, ["本", "映画"]) + _rows("2025-03", 1, ["海"]))
+
+    written = export_history(source, out_dir, incremental=True)
+
+    assert requested == ["2025-02"]
+    assert written == {"2025-02": 4, "2025-03": 1}
+    assert os.stat(january).st_mtime_ns == january_mtime
+    assert exported_months(out_dir) == ["2025-01", "2025-02", "2025-03"]
+    assert pq.read_table(out_dir).num_rows == 6
+
+
+def test_読み元の途中で失敗しても前回のファイルを残す(tmp_path):
+    out_dir = str(tmp_path / "history")
+    export_history(lambda since: iter(_rows("2025-01", 1, ["散歩"])), out_dir)
+
+    def broken(since: str | None):
+        yield from _rows("2025-01", 2, ["読書"])
+        raise RuntimeError("接続が切れました")
+
+    try:
+        export_history(broken, out_dir)
+    except RuntimeError:
+        pass
+
+    assert pq.read_table(out_dir).column("word").to_pylist() == ["散歩"]
+    assert os.listdir(partition_dir(out_dir, "2025-01")) == [PART_FILE]
+
+
+def test_Supabaseの全ユーザーの全件の出現回数をIDの続きから読む():
+    with FakeSupabaseServer() as server:
+        server.seed(
+            "monthly_keyword_counts",
+            [
+                {
+                    "user_id": "u1",
+                    "target_month": "2025-01",
+                    "word": "散歩",
+                    "count": 3,
+                },
+                {"user_id": "u2", "target_month": "2025-01", "word": "本", "count": 2},
+                {"user_id": "u1", "target_month": "2025-02", "word": "海", "count": 5},
+            ],
+        )
+        # 上位だけの monthly_keywords は読まない
+        server.seed("monthly_keywords", [_rows("2025-01", 1, ["映画"])[0]])
+        client = create_client(server.url, "loadtest.fake.key")
+
+        rows = list(iter_supabase_history(client, page_size=2))
+        since = list(iter_supabase_history(client, "2025-02", page_size=2))
+
+    assert [(r["user_id"], r["word"], r["ranker"]) for r in rows] == [
+        ("u1", "散歩", "frequency"),
+        ("u2", "本", "frequency"),
+        ("u1", "海", "frequency"),
+    ]
+    assert [r["word"] for r in since] == ["海"]
+
+
+def test_転置インデックスから月ごとの出現回数を読む(tmp_path):
+    index = KeywordIndex(str(tmp_path / "index.db"))
+    index.update_month(
+        "u1",
+        "2025-01",
+        [{"page_id": "p1", "date": "2025-01-01"}, {"page_id": "p2", "date": None}],
+        [["散歩", "散歩", "犬"], ["散歩"]],
+    )
+
+    rows = sorted(iter_local_history(index), key=lambda r: r["word"])
+
+    assert [(r["word"], r["count"]) for r in rows] == [("散歩", 3), ("犬", 1)]
+    assert list(iter_local_history(index, "2025-02")) == []
@@ -0,0 +1,82 @@
+import shutil
+
+from src.core import keyword_extraction
+from src.core.keyword_extraction import ExtractionProgress, run_keyword_extraction
+from src.core.token_store import TokenStore
+
+
+class FakeFigure:
+    def write_image(self, *args: object, **kwargs: object) -> None:
+        pass
+
+
+def test_解析の途中経過を間引いて通知し最後に全件の集計を渡す(tmp_path, monkeypatch):
+    (tmp_path / "custom_dict").mkdir()
+    shutil.copy("tests/custom_dict/user.dic", tmp_path / "custom_dict/user.dic")
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("NOTION_TOKEN", "token")
+    monkeypatch.setenv("DATABASE_ID", "db")
+    monkeypatch.setenv("NOTION_CACHE", "false")
+    monkeypatch.setenv("USER_ID", "u1")
+
+    entries = [
+        {"page_id": f"p{i}", "date": f"2025-01-{i + 1:02d}", "text": "公園で犬と散歩"}
+        for i in range(10)
+    ]
+    monkeypatch.setattr(
+        keyword_extraction, "iter_good_things_entries", lambda *args: iter(entries)
+    )
+    monkeypatch.setattr(
+        "src.core.plot.generate_bar_chart", lambda *a, **k: FakeFigure()
+    )
+    monkeypatch.setattr(keyword_extraction, "PROGRESS_INTERVAL", 60)
+
+    snapshots: list[ExtractionProgress] = []
+    word_count = run_keyword_extraction("2025-01", on_progress=snapshots.append)
+
+    assert [s.analysed for s in snapshots] == [1, 10]
+    assert snapshots[0].word_count["公園"] == 1
+    assert snapshots[-1].word_count == word_count
+    assert word_count["犬"] == 10
+
+
+def test_保存した形態素列で集計し直す(tmp_path, monkeypatch):
+    (tmp_path / "custom_dict").mkdir()
+    shutil.copy("tests/custom_dict/user.dic", tmp_path / "custom_dict/user.dic")
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("NOTION_TOKEN", "token")
+    monkeypatch.setenv("DATABASE_ID", "db")
+    monkeypatch.setenv("NOTION_CACHE", "false")
+    monkeypatch.setenv("USER_ID", "u1")
+    monkeypatch.setenv("KE_TOKEN_STORE", "true")
+    store = TokenStore(str(tmp_path / "tokens.db"))
+    monkeypatch.setattr(keyword_extraction, "get_token_store", lambda: store)
+
+    entries = [
+        {
+            "page_id": f"p{i}",
+            "date": f"2025-01-{i + 1:02d}",
+            "text": f"公園で犬と散歩{i}",
+        }
+        for i in range(10)
+    ]
+    monkeypatch.setattr(
+        keyword_extraction, "iter_good_things_entries", lambda *args: iter(entries)
+    )
+    monkeypatch.setattr(
+        "src.core.plot.generate_bar_chart", lambda *a, **k: FakeFigure()
+    )
+
+    first = run_keyword_extraction("2025-01")
+
+    # 2回目は本文も辞書も同じなので MeCab で解析し直さない
+    def fail(*args: object) -> None:
+        raise AssertionError("解析し直しました")
+
+    monkeypatch.setattr("src.core.token_store.tokenize", fail)
+    monkeypatch.setenv("KE_POS_FILTER", "名詞,!名詞-数")
+    second = run_keyword_extraction("2025-01")
+
+    assert first["犬"] == second["犬"] == 10
+    assert "0" in first
+    assert "0" not in second
@@ -0,0 +1,58 @@
+import time
+
+from src.services.keyword_index import KeywordIndex, notion_page_url
+
+
+def test_キーワードから元のエントリと日付が引ける(tmp_path):
+    index = KeywordIndex(str(tmp_path / "index.db"))
+    entries = [
+        {"page_id": "p1", "date": "2025-01-03"},
+        {"page_id": "p2", "date": "2025-01-10"},
+    ]
+    index.update_month("u1", "2025-01", entries, [["散歩", "散歩", "犬"], ["散歩"]])
+
+    hits = index.lookup("u1", "散歩")
+
+    assert [(h["page_id"], h["date"], h["count"]) for h in hits] == [
+        ("p2", "2025-01-10", 1),
+        ("p1", "2025-01-03", 2),
+    ]
+    assert index.lookup("u1", "犬", "2025-02") == []
+    assert index.lookup("u2", "散歩") == []
+
+
+def test_同じ月を再解析すると登録内容が置き換わる(tmp_path):
+    index = KeywordIndex(str(tmp_path / "index.db"))
+    index.update_month(
+        "u1", "2025-01", [{"page_id": "p1", "date": "2025-01-03"}], [["散歩"]]
+    )
+    index.update_month(
+        "u1", "2025-02", [{"page_id": "p9", "date": "2025-02-01"}], [["散歩"]]
+    )
+
+    index.update_month(
+        "u1", "2025-01", [{"page_id": "p1", "date": "2025-01-03"}], [["読書"]]
+    )
+
+    assert [h["page_id"] for h in index.lookup("u1", "散歩")] == ["p9"]
+    assert [h["page_id"] for h in index.lookup("u1", "読書")] == ["p1"]
+
+
+def test_検索はミリ秒未満で終わる(tmp_path):
+    index = KeywordIndex(str(tmp_path / "index.db"))
+    for month in range(1, 13):
+        entries = [
+            {"page_id": f"{month}-{d}", "date": f"2025-{month:02d}-{d:02d}"}
+            for d in range(1, 29)
+        ]
+        nouns = [[f"語{(d * k) % 500}" for k in range(30)] for d in range(1, 29)]
+        index.update_month("u1", f"2025-{month:02d}", entries, nouns)
+
+    start = time.perf_counter()
+    for _ in range(100):
+        index.lookup("u1", "語7", "2025-06")
+    assert (time.perf_counter() - start) / 100 < 1e-3
+
+
+def test_NotionのページURLが組み立てられる():
+    assert notion_page_url("abc-def") == "https://www.notion.so/abcdef"
@@ -0,0 +1,39 @@
+import subprocess
+import sys
+
+# パッケージ import だけでは読み込まれてはいけない重いモジュール
+HEAVY_MODULES = [
+    "pandas",
+    "plotly",
+    "MeCab",
+    "streamlit",
+    "supabase",
+    "notion_client",
+    "gspread",
+]
+
+
+def _loaded_heavy_modules(statement: str) -> list[str]:
+    code = (
+        f"import sys; {statement}; "
+        f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    )
+    out = subprocess.run(
+        [sys.executable, "-c", code], check=True, capture_output=True, text=True
+    )
+    return [m for m in out.stdout.strip().split(",") if m]
+
+
+def test_パッケージのimportで重い依存が読み込まれない():
+    assert _loaded_heavy_modules("import src.core, src.services") == []
+
+
+def test_analyse_wordの取得でMeCab以外の重い依存が読み込まれない():
+    assert _loaded_heavy_modules("from src.core import analyse_word") == []
+
+
+def test_公開名へのアクセスで定義モジュールの関数が返る():
+    import src.core
+    from src.core.csv_to_dic import build_user_dic_from_csv_data
+
+    assert src.core.build_user_dic_from_csv_data is build_user_dic_from_csv_data
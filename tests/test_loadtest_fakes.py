@@ -0,0 +1,47 @@
+import pytest
+from notion_client import Client
+from supabase import create_client
+
+from benchmarks.loadtest.fakes import FakeNotionServer, FakeSupabaseServer, FaultConfig
+from src.services.notion_handler import build_month_filter, query_pages
+
+
+def test_Supabase代替サーバーがPostgRESTの基本操作に応答する():
+    with FakeSupabaseServer() as server:
+        client = create_client(server.url, "loadtest.fake.key")
+        client.table("monthly_keywords").insert(
+            [
+                {"user_id": "u1", "word": "散歩", "count": 3},
+                {"user_id": "u1", "word": "読書", "count": 5},
+                {"user_id": "u2", "word": "料理", "count": 1},
+            ]
+        ).execute()
+        client.table("monthly_keywords").delete().eq("word", "散歩").execute()
+
+        response = (
+            client.table("monthly_keywords")
+            .select("word, count", count="exact")
+            .eq("user_id", "u1")
+            .order("count", desc=True)
+            .execute()
+        )
+
+    assert response.data == [{"word": "読書", "count": 5}]
+    assert response.count == 1
+
+
+def test_Notion代替サーバーはページングして月のページを返す():
+    with FakeNotionServer(pages_per_month=120) as server:
+        client = Client(auth="token", base_url=server.url)
+        pages = list(query_pages(client, "db", build_month_filter("2025-02")))
+
+    assert len(pages) == 120
+    assert server.request_count == 2
+    assert all(p["properties"]["日付"]["date"]["start"][:7] == "2025-02" for p in pages)
+
+
+def test_エラー注入でリクエストが失敗する():
+    with FakeNotionServer(FaultConfig(error_rate=1.0)) as server:
+        client = Client(auth="token", base_url=server.url)
+        with pytest.raises(Exception, match="503"):
+            client.databases.query("db")
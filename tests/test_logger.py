@@ -0,0 +1,64 @@
+import threading
+import tracemalloc
+
+from src.logs.logger import KELogger
+
+
+def test_処理時間がラベルごとに集計される():
+    KELogger.reset_metrics()
+    KELogger.start("集計テスト")
+    KELogger.end("集計テスト")
+    KELogger.start("集計テスト")
+    KELogger.end("集計テスト")
+
+    assert len(KELogger.get_metrics()["集計テスト"]) == 2
+
+
+def test_同じラベルを並行に計測しても互いに上書きしない():
+    KELogger.reset_metrics()
+    started = threading.Barrier(4)
+
+    def worker():
+        KELogger.start("並行テスト")
+        started.wait()
+        KELogger.end("並行テスト")
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(KELogger.get_metrics()["並行テスト"]) == 4
+
+
+def test_メモリ計測を有効にすると段階ごとの確保量と確保箇所を記録する(monkeypatch):
+    monkeypatch.setenv("KE_MEMORY_PROFILE", "true")
+    monkeypatch.setenv("KE_MEMORY_TOP_SITES", "3")
+    KELogger.reset_metrics()
+
+    KELogger.begin_run()
+    try:
+        KELogger.start("メモリテスト")
+        data = [str(i) * 10 for i in range(50_000)]
+        KELogger.end("メモリテスト")
+    finally:
+        tracemalloc.stop()
+    report = KELogger.end_run("テスト")
+
+    (record,) = KELogger.get_memory_metrics()["メモリテスト"]
+    assert report == [record]
+    assert record.alloc_delta > 1_000_000
+    assert record.rss_after > 0
+    assert "test_logger.py" in record.top_sites[0]
+    assert len(data) == 50_000
+
+
+def test_メモリ計測は既定では無効(monkeypatch):
+    monkeypatch.delenv("KE_MEMORY_PROFILE", raising=False)
+    KELogger.reset_metrics()
+
+    KELogger.start("計測なし")
+    KELogger.end("計測なし")
+
+    assert KELogger.get_memory_metrics() == {}
@@ -0,0 +1,55 @@
+from src.core.normalizer import (
+    iter_normalized_chunks,
+    normalize_fields,
+    normalize_text,
+    normalize_word,
+)
+
+
+def test_全角英数字と半角カナが同じ表記に揃う():
+    assert normalize_text("ＡＩ と ｶﾀｶﾅ") == "AI と カタカナ"
+
+
+def test_URLと絵文字が除去され空白が圧縮される():
+    text = "今日は　https://example.com/a?b=1 を見た😀👍🏻\n\n楽しかった✨"
+
+    assert normalize_text(text) == "今日は を見た 楽しかった"
+
+
+def test_ストップワードも本文と同じ規則で正規化される():
+    assert normalize_word(" ＡＩ​ ") == "AI"
+    assert normalize_word("ｶﾀｶﾅ") == normalize_text("カタカナ")
+
+
+def test_複数の単語をまとめて正規化しても単語ごとの結果と一致する():
+    fields = [" ＡＩ​ ", "ｶﾀｶﾅ", "\u0301か\u3099", "名詞", "a\t b", "―"]
+
+    assert normalize_fields(fields) == [normalize_word(f) for f in fields]
+    assert normalize_fields(["専門用語", "名詞"]) == ["専門用語", "名詞"]
+
+
+def test_チャンク分割しても結果が変わらない():
+    text = "ＡＩ ｶﾀｶﾅ https://example.com " * 50
+
+    chunks = list(iter_normalized_chunks(text, chunk_size=37))
+
+    assert len(chunks) > 1
+    assert " ".join(chunks) == normalize_text(text)
+
+
+def test_安定文字クラスの文字はNFKCで変化しない結合文字でもない():
+    import re
+    import unicodedata
+
+    from src.core.normalizer import NFKC_STABLE_CLASS
+
+    pattern = re.compile(f"[{NFKC_STABLE_CLASS}]")
+    for code in range(0x10000):
+        c = chr(code)
+        if pattern.match(c):
+            assert unicodedata.normalize("NFKC", c) == c, hex(code)
+            assert unicodedata.combining(c) == 0, hex(code)
+
+
+def test_結合文字は直前の文字と合成される():
+    assert normalize_text("が") == "が"
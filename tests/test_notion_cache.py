@@ -0,0 +1,109 @@
+from src.services.notion_cache import NotionPageCache, fetch_good_things_entries_cached
+
+
+def _page(page_id: str, date: str, text: str, edited: str = "2025-01-31T00:00:00Z"):
+    return {
+        "id": page_id,
+        "last_edited_time": edited,
+        "properties": {
+            "日付": {"date": {"start": date}},
+            "良かったこと１": {"rich_text": [{"plain_text": text}]},
+        },
+    }
+
+
+class FakeDatabases:
+    """月指定と編集日時指定のクエリだけを受け付ける Notion のスタンドイン."""
+
+    def __init__(self, pages: list[dict]):
+        self.pages = pages
+        self.queries: list[dict] = []
+
+    def retrieve(self, database_id: str):
+        return {
+            "properties": {
+                "日付": {"id": "d0"},
+                "良かったこと１": {"id": "t0"},
+            }
+        }
+
+    def query(self, database_id: str, **kwargs):
+        self.queries.append(kwargs)
+        filter_obj = kwargs.get("filter", {})
+        if "last_edited_time" in filter_obj:
+            since = filter_obj["last_edited_time"]["on_or_after"]
+            results = [p for p in self.pages if p["last_edited_time"] >= since]
+        else:
+            start = filter_obj["and"][0]["date"]["on_or_after"][:7]
+            results = [
+                p
+                for p in self.pages
+                if p["properties"]["日付"]["date"]["start"][:7] == start
+            ]
+        return {"results": results, "has_more": False, "next_cursor": None}
+
+
+class FakeClient:
+    def __init__(self, pages: list[dict]):
+        self.databases = FakeDatabases(pages)
+
+
+def test_2回目以降は編集されたページだけを取得する(tmp_path):
+    cache = NotionPageCache(str(tmp_path / "cache.db"))
+    client = FakeClient(
+        [_page("p1", "2025-01-02", "散歩"), _page("p2", "2025-01-05", "読書")]
+    )
+
+    assert cache.sync_month(client, "db", "2025-01") == 2
+
+    client.databases.pages = [
+        _page("p1", "2025-01-02", "散歩と昼寝", edited="2999-01-01T00:00:00Z"),
+        _page("p2", "2025-01-05", "読書"),
+    ]
+    assert cache.sync_month(client, "db", "2025-01") == 1
+
+    entries = cache.entries("db", "2025-01")
+    assert [(e["page_id"], e["text"]) for e in entries] == [
+        ("p2", "読書"),
+        ("p1", "散歩と昼寝"),
+    ]
+
+
+def test_オフラインではNotionに接続せずキャッシュから返す(tmp_path):
+    cache = NotionPageCache(str(tmp_path / "cache.db"))
+    client = FakeClient([_page("p1", "2025-02-01", "旅行")])
+    cache.sync_month(client, "db", "2025-02")
+
+    entries = fetch_good_things_entries_cached(
+        None, "db", "2025-02", cache=cache, offline=True
+    )
+
+    assert [e["text"] for e in entries] == ["旅行"]
+    assert (
+        fetch_good_things_entries_cached(
+            None, "db", "2025-03", cache=cache, offline=True
+        )
+        == []
+    )
+
+
+def test_月の範囲は日本時間で数え索引で絞り込む(tmp_path):
+    cache = NotionPageCache(str(tmp_path / "cache.db"))
+    cache._store(
+        "db",
+        [
+            # 日本時間では 2/1 5:00 なので2月に入る
+            _page("p1", "2025-01-31T20:00:00.000+00:00", "初詣の写真整理"),
+            _page("p2", "2025-01-31", "大掃除"),
+            _page("p3", "2025-02-28T23:30:00.000+09:00", "散歩"),
+        ],
+    )
+
+    assert [e["page_id"] for e in cache.entries("db", "2025-01")] == ["p2"]
+    assert [e["page_id"] for e in cache.entries("db", "2025-02")] == ["p3", "p1"]
+    plan = cache._conn.execute(
+        "explain query plan select page_id from pages "
+        "where database_id = ? and entry_date >= ? and entry_date < ?",
+        ("db", "2025-02-01", "2025-03-01"),
+    ).fetchall()
+    assert "pages_date" in str(plan)
@@ -0,0 +1,64 @@
+from benchmarks.loadtest.fakes import FakeNotionServer
+from src.services import notion_handler
+from src.services.notion_handler import (
+    TEXT_PROPERTIES_ENV,
+    fetch_good_things_entries,
+    page_to_entry,
+    resolve_property_ids,
+    text_properties,
+)
+
+
+class FakeDatabases:
+    def __init__(self):
+        self.retrieved = 0
+
+    def retrieve(self, database_id: str):
+        self.retrieved += 1
+        return {"properties": {"日付": {"id": "d0"}, "今日の一言": {"id": "x1"}}}
+
+
+class FakeClient:
+    def __init__(self):
+        self.databases = FakeDatabases()
+
+
+def test_抽出対象のプロパティを環境変数で指定できる(monkeypatch):
+    monkeypatch.setenv(TEXT_PROPERTIES_ENV, "今日の一言, 感謝 ,")
+    assert text_properties() == ["今日の一言", "感謝"]
+
+    page = {
+        "id": "p1",
+        "properties": {
+            "今日の一言": {"rich_text": [{"plain_text": "晴れ"}]},
+            "良かったこと１": {"rich_text": [{"plain_text": "使わない"}]},
+        },
+    }
+    assert page_to_entry(page)["text"] == "晴れ"  # type: ignore[arg-type]
+
+
+def test_プロパティIDはスキーマを1回だけ取得して解決する(monkeypatch):
+    monkeypatch.setattr(notion_handler, "_property_ids", {})
+    client = FakeClient()
+
+    for _ in range(2):
+        ids = resolve_property_ids(client, "db", ["今日の一言", "無い", "日付"])  # type: ignore[arg-type]
+        assert ids == ["x1", "d0"]
+    assert client.databases.retrieved == 1
+
+
+def test_必要なプロパティだけを受け取ってエントリにする(monkeypatch):
+    monkeypatch.setattr(notion_handler, "_property_ids", {})
+    with FakeNotionServer(pages_per_month=3) as server:
+        monkeypatch.setenv("NOTION_BASE_URL", server.url)
+        entries = fetch_good_things_entries("token", "db", "2025-02")
+        projected = server.bytes_sent
+
+        monkeypatch.setattr(
+            notion_handler, "projected_property_ids", lambda client, db: None
+        )
+        assert fetch_good_things_entries("token", "db", "2025-02") == entries
+        assert projected < server.bytes_sent - projected
+
+    assert len(entries) == 3
+    assert all(entry["text"] and entry["date"] for entry in entries)
@@ -0,0 +1,85 @@
+from supabase import create_client
+
+from benchmarks.loadtest.fakes import FakeSupabaseServer
+from src.services.paged_table import (
+    DELETE_COLUMN,
+    PageQuery,
+    diff_edits,
+    escape_like,
+    fetch_page,
+    iter_all_rows,
+)
+
+
+def _seed(server: FakeSupabaseServer) -> None:
+    rows: list[dict[str, object]] = [
+        {"user_id": "u1", "word": f"語{i:03d}"} for i in range(120)
+    ]
+    rows.append({"user_id": "u2", "word": "語999"})
+    server.seed("stop_words", rows)
+
+
+def test_1ページ分と総件数をサーバー側の検索と並べ替えで取得する():
+    with FakeSupabaseServer() as server:
+        _seed(server)
+        client = create_client(server.url, "a.b.c")
+
+        query = PageQuery(search="語1", descending=True, page=2, page_size=5)
+        page = fetch_page(client, "stop_words", "u1", "id, word", "word", query)
+
+        # 「語1」を含むのは 語100〜語119 の 20件、降順で2ページ目
+        assert page.total == 20
+        assert page.page_count == 4
+        assert [r["word"] for r in page.rows] == [
+            "語114",
+            "語113",
+            "語112",
+            "語111",
+            "語110",
+        ]
+
+
+def test_範囲外のページ番号は最終ページに補正する():
+    with FakeSupabaseServer() as server:
+        _seed(server)
+        client = create_client(server.url, "a.b.c")
+
+        query = PageQuery(page=99, page_size=50)
+        page = fetch_page(client, "stop_words", "u1", "id, word", "word", query)
+
+        assert page.query.page == 3
+        assert len(page.rows) == 20
+
+
+def test_全件読み出しはページを順にたどる():
+    with FakeSupabaseServer() as server:
+        _seed(server)
+        client = create_client(server.url, "a.b.c")
+
+        rows = list(iter_all_rows(client, "stop_words", "u1", "word", page_size=50))
+
+        assert len(rows) == 120
+        assert server.request_count == 3
+
+
+def test_編集前後の差分から削除と更新をまとめる():
+    original = [
+        {"id": 1, "word": "a"},
+        {"id": 2, "word": "b"},
+        {"id": 3, "word": "c"},
+    ]
+    edited = [
+        {"id": 1, "word": "a", DELETE_COLUMN: True},
+        {"id": 2, "word": "B", DELETE_COLUMN: False},
+        {"id": 3, "word": "c", DELETE_COLUMN: False},
+    ]
+
+    edits = diff_edits(original, edited, ["word"])
+
+    assert edits.deleted_ids == [1]
+    assert edits.updated_rows == [{"id": 2, "word": "B"}]
+    assert not diff_edits(original, original, ["word"])
+
+
+def test_LIKEのワイルドカードをエスケープする():
+    assert escape_like("100%_達成") == "100\\%\\_達成"
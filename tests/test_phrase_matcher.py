@@ -0,0 +1,51 @@
+import MeCab
+import pytest
+
+from src.core.phrase_matcher import PhraseMatcher
+from src.core.word_analyser import extract_nouns, extract_nouns_with_phrases
+
+
+@pytest.fixture
+def system_tagger() -> MeCab.Tagger:
+    """システム辞書だけの MeCab Tagger を準備するフィクスチャ"""
+    try:
+        return MeCab.Tagger("-r /etc/mecabrc -d /var/lib/mecab/dic/ipadic-utf8")
+    except RuntimeError:
+        return MeCab.Tagger("")
+
+
+def test_重なる候補は左端で最長のものを採る():
+    matcher = PhraseMatcher(["機械学習", "学習塾", "機械", "塾"])
+    text = "機械学習塾と塾"
+
+    assert matcher.find(text) == [(0, 4), (4, 5), (6, 7)]
+    assert list(matcher.split(text)) == [
+        ("機械学習", True),
+        ("塾", True),
+        ("と", False),
+        ("塾", True),
+    ]
+
+
+def test_失敗リンクをたどって部分一致からも見つける():
+    matcher = PhraseMatcher(["abcd", "bc", "c"])
+
+    assert matcher.find("abcx") == [(1, 3)]
+    assert PhraseMatcher([]).find("abc") == []
+
+
+def test_登録語を先に切り出し残りをシステム辞書で解析する(system_tagger):
+    matcher = PhraseMatcher.from_dic_entries(
+        [
+            ("ひとり焼肉", "名詞", "ヒトリヤキニク", "ヒトリヤキニク"),
+            ("ととのう", "動詞", "トトノウ", "トトノウ"),
+        ]
+    )
+    text = "週末はひとり焼肉でととのう"
+
+    nouns = extract_nouns_with_phrases(text, system_tagger, {"週末"}, matcher)
+
+    assert "ひとり焼肉" in nouns
+    assert "ととのう" not in nouns  # 名詞以外の登録語は数えない
+    assert "週末" not in nouns
+    assert "ひとり焼肉" not in extract_nouns(text, system_tagger, set())
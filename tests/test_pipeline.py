@@ -0,0 +1,117 @@
+import threading
+import time
+from queue import SimpleQueue
+
+import pytest
+
+from src.core.pipeline import (
+    SAVED_TIME_LABEL,
+    WAIT_LABEL_SUFFIX,
+    Stage,
+    run_pipeline,
+    waiting,
+)
+from src.logs.logger import KELogger
+
+
+def test_依存の無い段階は並行に実行され短縮時間を報告する():
+    def wait(value: str):
+        def func(*args: object) -> str:
+            time.sleep(0.2)
+            return value
+
+        return func
+
+    KELogger.reset_metrics()
+    report = run_pipeline(
+        [
+            Stage("辞書", wait("dic")),
+            Stage("Notion", wait("text")),
+            Stage("解析", lambda text, dic: f"{text}+{dic}", deps=("Notion", "辞書")),
+        ]
+    )
+
+    assert report.results["解析"] == "text+dic"
+    assert report.wall_time < 0.35
+    assert report.saved_time > 0.1
+    path, _ = report.critical_path()
+    assert path[-1] == "解析" and len(path) == 2
+    assert KELogger.get_metrics()[SAVED_TIME_LABEL] == [report.saved_time]
+
+
+def test_依存先がすべて終わってから実行する():
+    done: list[str] = []
+    lock = threading.Lock()
+
+    def record(name: str, delay: float):
+        def func(*args: object) -> None:
+            time.sleep(delay)
+            with lock:
+                done.append(name)
+
+        return func
+
+    run_pipeline(
+        [
+            Stage("c", record("c", 0), deps=("a", "b")),
+            Stage("a", record("a", 0.05)),
+            Stage("b", record("b", 0.1), deps=("a",)),
+        ]
+    )
+    assert done == ["a", "b", "c"]
+
+
+def test_循環や未定義の依存はエラーになる():
+    with pytest.raises(ValueError, match="循環"):
+        run_pipeline([Stage("a", lambda b: b, ("b",)), Stage("b", lambda a: a, ("a",))])
+    with pytest.raises(ValueError, match="未定義"):
+        run_pipeline([Stage("a", lambda x: x, ("x",))])
+
+
+def test_段階の例外は送出され後続は実行されない():
+    called: list[str] = []
+
+    def fail() -> None:
+        raise RuntimeError("取得失敗")
+
+    with pytest.raises(RuntimeError, match="取得失敗"):
+        run_pipeline(
+            [
+                Stage("取得", fail),
+                Stage("解析", lambda _: called.append("解析"), deps=("取得",)),
+            ]
+        )
+    assert called == []
+
+
+def test_他の段階を待つ区間は処理時間から除き別に記録する():
+    entries: SimpleQueue[str | None] = SimpleQueue()
+
+    def fetch() -> None:
+        for text in ("a", "b"):
+            time.sleep(0.1)
+            entries.put(text)
+        entries.put(None)
+
+    def analyse() -> list[str]:
+        done: list[str] = []
+        while True:
+            with waiting():
+                text = entries.get()
+            if text is None:
+                return done
+            time.sleep(0.05)
+            done.append(text)
+
+    KELogger.reset_metrics()
+    report = run_pipeline([Stage("取得", fetch), Stage("解析", analyse)])
+
+    assert report.results["解析"] == ["a", "b"]
+    # 解析の処理時間は2件分の 0.1 秒前後で、取得を待った 0.15 秒前後は含まない
+    assert 0.09 < report.durations["解析"] < 0.14
+    assert report.waits["解析"] > 0.1
+    assert "取得" not in report.waits
+    assert report.sequential_time < report.wall_time + 0.1
+    metrics = KELogger.get_metrics()
+    assert metrics[f"解析{WAIT_LABEL_SUFFIX}"] == [report.waits["解析"]]
+    assert metrics["解析"][0] < 0.15
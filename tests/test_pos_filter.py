@@ -0,0 +1,110 @@
+import MeCab
+import pytest
+
+from src.core.phrase_matcher import PhraseMatcher
+from src.core.pos_filter import PosFilter, compile_pos_filter, read_pos_id_def
+from src.core.stop_rules import compile_stop_rules
+from src.core.word_analyser import extract_nouns, extract_nouns_with_phrases
+
+TAGGER_ARGS = "-r /etc/mecabrc -d /var/lib/mecab/dic/ipadic-utf8"
+
+TEXTS = [
+    "2025年のことを考えた時間",
+    "友人と新しいカフェで珈琲を飲んだ。彼はそれを気に入ったと言った。",
+    "ChatGPTに聞いてみたら、すぐに答えが返ってきた!",
+    "",
+]
+
+
+@pytest.fixture
+def tagger() -> MeCab.Tagger:
+    """MeCab Tagger を準備するフィクスチャ"""
+    try:
+        return MeCab.Tagger(TAGGER_ARGS)
+    except RuntimeError:
+        return MeCab.Tagger("")
+
+
+def _extract_by_features(text, tagger, rules, pos_filter) -> list[str]:
+    """posid を使わず、ノードごとに素性を分割して判定する（比較用）."""
+    node = tagger.parseToNode(text)
+    nouns: list[str] = []
+    while node:
+        features = node.feature.split(",")
+        if node.stat not in (2, 3) and pos_filter.accepts(features):
+            if node.surface and not rules.is_stopped(node.surface, features):
+                nouns.append(node.surface)
+        node = node.next
+    return nouns
+
+
+def test_指定から対象と除外の品詞をまとめる():
+    pos_filter = compile_pos_filter("名詞, !名詞-非自立,!名詞-代名詞")
+
+    assert pos_filter.include == {("名詞",)}
+    assert pos_filter.exclude == {("名詞", "非自立"), ("名詞", "代名詞")}
+    assert pos_filter.accepts(["名詞", "一般", "*"])
+    assert not pos_filter.accepts(["名詞", "非自立", "一般"])
+    assert not pos_filter.accepts(["動詞", "自立"])
+    with pytest.raises(ValueError):
+        compile_pos_filter("!名詞-非自立")
+
+
+@pytest.mark.parametrize(
+    ("spec", "stop_words"),
+    [
+        ("名詞", set()),
+        ("名詞,!名詞-非自立,!名詞-代名詞", {"@数字"}),
+        ("名詞,動詞-自立", {"原形:言う", "品詞:名詞-数", "友人"}),
+    ],
+)
+def test_posidで判定しても素性で判定した場合と同じ語を取り出す(
+    tagger, spec, stop_words
+):
+    pos_filter = compile_pos_filter(spec)
+    rules = compile_stop_rules(frozenset(stop_words))
+
+    for text in TEXTS:
+        expected = _extract_by_features(text, tagger, rules, pos_filter)
+        assert extract_nouns(text, tagger, rules, pos_filter) == expected
+
+
+def test_品詞の指定で取り出す語が変わる(tagger):
+    text = TEXTS[1]
+
+    nouns = extract_nouns(text, tagger, set())
+    filtered = extract_nouns(
+        text, tagger, set(), compile_pos_filter("名詞,!名詞-代名詞")
+    )
+
+    assert "彼" in nouns
+    assert "彼" not in filtered
+    assert "カフェ" in filtered
+
+
+def test_登録語を切り出す場合も品詞の指定に従う(tagger):
+    matcher = PhraseMatcher.from_dic_entries(
+        [("ひとり焼肉", "名詞", "ヒトリヤキニク", "ヒトリヤキニク")]
+    )
+    text = "週末はひとり焼肉で2時間過ごした"
+    pos_filter = compile_pos_filter("名詞,!名詞-数")
+
+    actual = extract_nouns_with_phrases(text, tagger, set(), matcher, pos_filter)
+
+    assert "ひとり焼肉" in actual
+    assert "2" not in actual
+
+
+def test_pos_id_defを読み込んで対象のposidを求める(tmp_path):
+    path = tmp_path / "pos-id.def"
+    path.write_text(
+        "その他,間投,*,* 0\n名詞,一般,*,* 38\n名詞,非自立,一般,* 53\n",
+        encoding="euc_jp",
+    )
+    # 共有される compile_pos_filter の結果に架空の posid を覚えさせないよう直接作る
+    pos_filter = PosFilter(frozenset({("名詞",)}), frozenset({("名詞", "非自立")}))
+
+    pos_ids = read_pos_id_def(str(path))
+
+    assert pos_ids[38] == ("名詞", "一般", "*", "*")
+    assert pos_filter.load_pos_ids(pos_ids) == {38}
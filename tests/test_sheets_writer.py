@@ -0,0 +1,81 @@
+from collections import Counter
+
+from src.services.sheets_writer import MonthlySheetsExporter, write_word_count
+
+
+class FakeSpreadsheet:
+    def __init__(self, sheets: dict[str, int]):
+        self.sheets = sheets
+        self.metadata_calls = 0
+        self.batches: list[list[dict]] = []
+
+    def fetch_sheet_metadata(self, params=None):
+        self.metadata_calls += 1
+        return {
+            "sheets": [
+                {"properties": {"title": title, "sheetId": sheet_id}}
+                for title, sheet_id in self.sheets.items()
+            ]
+        }
+
+    def batch_update(self, body):
+        self.batches.append(body["requests"])
+
+
+class FakeWorksheet:
+    def __init__(self, spreadsheet: FakeSpreadsheet):
+        self.id = 0
+        self.spreadsheet = spreadsheet
+
+
+def _values(request: dict) -> list[list[object]]:
+    return [
+        [next(iter(cell["userEnteredValue"].values())) for cell in row["values"]]
+        for row in request["updateCells"]["rows"]
+    ]
+
+
+def test_書き込みはシートを読まずに1リクエストで古い行も消す():
+    spreadsheet = FakeSpreadsheet({"Sheet1": 0})
+
+    write_word_count(FakeWorksheet(spreadsheet), Counter({"散歩": 3, "読書": 1}), 5)  # type: ignore[arg-type]
+
+    [requests] = spreadsheet.batches
+    [request] = requests
+    assert _values(request) == [["単語", "出現回数"], ["散歩", 3], ["読書", 1]]
+    # 行の終わりを指定しない範囲なので、下に残った古い値も空になる
+    assert "endRowIndex" not in request["updateCells"]["range"]
+    assert spreadsheet.metadata_calls == 0
+
+
+def test_複数月を月ごとのタブへ1回のbatchUpdateで書き込む():
+    spreadsheet = FakeSpreadsheet({"2025-06": 7, "名前を変えたタブ": 202507})
+    exporter = MonthlySheetsExporter(spreadsheet)  # type: ignore[arg-type]
+
+    months = {
+        "2025-07": Counter({"海": 2}),
+        "2025-06": Counter({"雨": 5}),
+        "2025-08": Counter({"花火": 1}),
+    }
+    assert exporter.export(months) == 3
+
+    [requests] = spreadsheet.batches
+    kinds = [next(iter(r)) for r in requests]
+    assert kinds == [
+        "updateCells",
+        "addSheet",
+        "updateCells",
+        "addSheet",
+        "updateCells",
+    ]
+    added = [r["addSheet"]["properties"] for r in requests if "addSheet" in r]
+    # 202507 は名前を変えたタブが使っているので、空いている ID に振り直す
+    assert added == [
+        {"sheetId": 202508, "title": "2025-07"},
+        {"sheetId": 202509, "title": "2025-08"},
+    ]
+
+    # 2回目はメタデータを取り直さず、追加済みのタブにそのまま書く
+    exporter.export({"2025-07": Counter({"山": 1})})
+    assert spreadsheet.metadata_calls == 1
+    assert [next(iter(r)) for r in spreadsheet.batches[1]] == ["updateCells"]
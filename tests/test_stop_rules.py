@@ -0,0 +1,52 @@
+import MeCab
+import pytest
+
+from src.core.stop_rules import compile_stop_rules
+from src.core.word_analyser import analyse_word
+
+
+@pytest.fixture
+def system_tagger() -> MeCab.Tagger:
+    """システム辞書だけの MeCab Tagger を準備するフィクスチャ"""
+    try:
+        return MeCab.Tagger("-r /etc/mecabrc -d /var/lib/mecab/dic/ipadic-utf8")
+    except RuntimeError:
+        return MeCab.Tagger("")
+
+
+def test_規則の種類ごとに照合用の表へまとめる():
+    rules = compile_stop_rules(
+        frozenset({"今日", "原形:言う", "品詞:名詞-非自立", "@数字", "@未知"})
+    )
+
+    assert rules.surfaces == {"今日"}
+    assert rules.base_forms == {"言う"}
+    assert rules.pos_prefixes == {("名詞", "非自立")}
+    assert len(rules.char_classes) == 1
+    assert compile_stop_rules(frozenset({"今日"})) is compile_stop_rules(
+        frozenset({"今日"})
+    )
+
+
+def test_原形と文字種の規則で除外する():
+    rules = compile_stop_rules(frozenset({"原形:言う", "@数字", "@カタカナ"}))
+    verb = ["動詞", "自立", "*", "*", "五段・ワ行促音便", "連用タ接続", "言う"]
+
+    assert rules.is_stopped("言っ", verb)
+    assert rules.is_stopped("2025/07/01", ["名詞", "数"])
+    assert rules.is_stopped("コーヒー", ["名詞", "一般"])
+    assert not rules.is_stopped("珈琲", ["名詞", "一般"])
+    assert not rules.is_stopped("-", ["記号", "一般"])
+
+
+def test_品詞と文字種の規則を解析に適用する(system_tagger):
+    text = "2025年のことを考えた時間"
+    stop_words = {"@数字", "@1文字", "品詞:名詞-非自立"}
+
+    assert analyse_word(text, system_tagger, stop_words) == {"時間": 1}
+    assert set(analyse_word(text, system_tagger, set())) == {
+        "2025",
+        "年",
+        "こと",
+        "時間",
+    }
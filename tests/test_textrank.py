@@ -0,0 +1,76 @@
+import random
+import time
+from collections import Counter
+
+import numpy as np
+import pytest
+
+from src.core.cooccurrence import build_cooccurrence
+from src.core.textrank import (
+    RANKER_FREQUENCY,
+    RANKER_TEXTRANK,
+    rank_keywords,
+    textrank,
+)
+
+
+def _dense_pagerank(matrix, damping=0.85, iterations=200):
+    """密行列で素直に計算した PageRank（比較用）"""
+    n = len(matrix.vocab)
+    weights = np.zeros((n, n))
+    for row in range(n):
+        start, end = matrix.indptr[row], matrix.indptr[row + 1]
+        weights[row, matrix.indices[start:end]] = matrix.data[start:end]
+    out_weight = weights.sum(axis=1)
+    transition = np.where(
+        out_weight[:, None] > 0,
+        weights / np.where(out_weight > 0, out_weight, 1)[:, None],
+        1.0 / n,
+    )
+    scores = np.full(n, 1.0 / n)
+    for _ in range(iterations):
+        scores = (1 - damping) / n + damping * transition.T @ scores
+    return scores
+
+
+def test_多くの語と共起する語ほど高いスコアになる():
+    docs = [["散歩", "公園"], ["散歩", "犬"], ["散歩", "読書"], ["映画"]]
+    matrix = build_cooccurrence(docs)
+
+    scores = dict(zip(matrix.vocab, textrank(matrix)))
+
+    assert max(scores, key=scores.__getitem__) == "散歩"
+    assert scores["公園"] == scores["犬"] > scores["映画"]
+    assert sum(scores.values()) == pytest.approx(1.0)
+
+
+def test_疎行列の反復が密行列の計算と一致する():
+    rng = random.Random(0)
+    words = [f"語{i}" for i in range(40)]
+    docs = [rng.sample(words, rng.randint(1, 5)) for _ in range(60)]
+    matrix = build_cooccurrence(docs)
+
+    np.testing.assert_allclose(textrank(matrix), _dense_pagerank(matrix), atol=1e-6)
+
+
+def test_TextRankでは出現回数が多くても孤立した語は上位にならない():
+    docs = [["日記"]] * 5 + [["カフェ", "珈琲"], ["カフェ", "友人"], ["カフェ", "本"]]
+    word_count = Counter(word for doc in docs for word in doc)
+    matrix = build_cooccurrence(docs)
+
+    assert rank_keywords(word_count, matrix, RANKER_FREQUENCY) is word_count
+    assert word_count.most_common(1) == [("日記", 5)]
+    ranked = rank_keywords(word_count, matrix, RANKER_TEXTRANK)
+    assert ranked.most_common(1)[0][0] == "カフェ"
+    assert set(ranked) == set(word_count)
+
+
+def test_大きな月でも数十ミリ秒で順位付けできる():
+    rng = random.Random(0)
+    words = [f"語{i}" for i in range(5_000)]
+    docs = [rng.sample(words, 15) for _ in range(3_000)]
+    matrix = build_cooccurrence(docs)
+
+    start = time.perf_counter()
+    textrank(matrix)
+    assert time.perf_counter() - start < 0.5
@@ -0,0 +1,99 @@
+import MeCab
+import pytest
+
+from src.core.phrase_matcher import PhraseMatcher
+from src.core.pos_filter import compile_pos_filter
+from src.core.stop_rules import compile_stop_rules
+from src.core.token_store import TokenStore, dictionary_version
+from src.core.word_analyser import extract_nouns, extract_nouns_with_phrases
+
+TEXTS = [
+    "2025年のことを考えた時間",
+    "",
+    "友人と新しいカフェで珈琲を飲んだ。彼はそれを気に入ったと言った。",
+    "週末はひとり焼肉で2時間過ごした",
+]
+
+
+@pytest.fixture
+def system_tagger() -> MeCab.Tagger:
+    """システム辞書だけの MeCab Tagger を準備するフィクスチャ"""
+    try:
+        return MeCab.Tagger("-r /etc/mecabrc -d /var/lib/mecab/dic/ipadic-utf8")
+    except RuntimeError:
+        return MeCab.Tagger("")
+
+
+class _NoParseTagger:
+    """解析しようとすると失敗する Tagger（保存済みの形態素列だけで済むかの確認用）"""
+
+    def __init__(self, tagger: MeCab.Tagger):
+        self._tagger = tagger
+
+    def dictionary_info(self):
+        return self._tagger.dictionary_info()
+
+    def parseToNode(self, text: str):
+        raise AssertionError(f"解析し直しました: {text}")
+
+
+@pytest.mark.parametrize(
+    ("spec", "stop_words"),
+    [
+        ("名詞", set()),
+        ("名詞,!名詞-非自立,!名詞-代名詞", {"@数字", "時間"}),
+        ("名詞,動詞-自立", {"原形:言う", "品詞:名詞-数", "友人"}),
+    ],
+)
+def test_保存した形態素列から解析と同じ語を取り出す(
+    tmp_path, system_tagger, spec, stop_words
+):
+    store = TokenStore(str(tmp_path / "tokens.db"))
+    rules = compile_stop_rules(frozenset(stop_words))
+    pos_filter = compile_pos_filter(spec)
+
+    streams = store.load_or_tokenize(TEXTS, system_tagger)
+
+    assert store.replay(streams, rules, pos_filter) == [
+        extract_nouns(text, system_tagger, rules, pos_filter) for text in TEXTS
+    ]
+
+
+def test_本文と辞書が同じなら解析し直さない(tmp_path, system_tagger):
+    path = str(tmp_path / "tokens.db")
+    TokenStore(path).load_or_tokenize(TEXTS, system_tagger)
+    no_parse = _NoParseTagger(system_tagger)
+    version = dictionary_version(system_tagger, None)
+
+    # 別のストア（別プロセス相当）で開き直しても、語彙表ごと読み込んで再生できる
+    store = TokenStore(path)
+    streams = store.load_or_tokenize(TEXTS, no_parse, dict_version=version)  # type: ignore[arg-type]
+
+    assert store.replay(
+        streams, compile_stop_rules(frozenset()), compile_pos_filter()
+    ) == [extract_nouns(text, system_tagger, set()) for text in TEXTS]
+    with pytest.raises(AssertionError, match="解析し直しました"):
+        store.load_or_tokenize(["新しい本文"], no_parse, dict_version=version)  # type: ignore[arg-type]
+
+
+def test_登録語が変われば別の版として保存する(tmp_path, system_tagger):
+    store = TokenStore(str(tmp_path / "tokens.db"))
+    matcher = PhraseMatcher.from_dic_entries(
+        [
+            ("ひとり焼肉", "名詞", "ヒトリヤキニク", "ヒトリヤキニク"),
+            ("ととのう", "動詞", "トトノウ", "トトノウ"),
+        ]
+    )
+    texts = [*TEXTS, "サウナでととのう"]
+    rules = compile_stop_rules(frozenset({"週末"}))
+    pos_filter = compile_pos_filter()
+
+    streams = store.load_or_tokenize(texts, system_tagger, matcher)
+
+    assert dictionary_version(system_tagger, matcher) != dictionary_version(
+        system_tagger, PhraseMatcher([])
+    )
+    assert store.replay(streams, rules, pos_filter) == [
+        extract_nouns_with_phrases(text, system_tagger, rules, matcher)
+        for text in texts
+    ]
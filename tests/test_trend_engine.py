@@ -0,0 +1,117 @@
+from collections import Counter
+
+from supabase import create_client
+
+from benchmarks.loadtest.fakes import FakeSupabaseServer
+from src.services.history_maker import save_monthly_keyword_counts
+from src.services.trend_engine import compute_trends, refresh_keyword_trends
+
+
+def _row(month: str, word: str, count: int):
+    return {"target_month": month, "word": word, "count": count}
+
+
+def test_前月差と移動平均と成長スコアが計算される():
+    rows = [
+        _row("2025-01", "散歩", 2),
+        _row("2025-02", "散歩", 4),
+        _row("2025-03", "散歩", 9),
+    ]
+
+    trends = {t["target_month"]: t for t in compute_trends(rows, window=2)}
+
+    assert trends["2025-01"]["delta"] == 2
+    assert trends["2025-02"]["delta"] == 2
+    assert trends["2025-03"]["delta"] == 5
+    assert trends["2025-01"]["moving_avg"] == 2.0
+    assert trends["2025-03"]["moving_avg"] == 6.5
+    # 前月時点の移動平均 (2+4)/2=3 に対する伸び率 (9-3)/(3+1)
+    assert trends["2025-03"]["growth_score"] == 1.5
+
+
+def test_前月にあって当月に無いキーワードは負の差分で残る():
+    rows = [
+        _row("2025-01", "読書", 3),
+        _row("2025-02", "散歩", 1),
+    ]
+
+    trends = {(t["target_month"], t["word"]): t for t in compute_trends(rows)}
+
+    assert trends[("2025-02", "読書")]["count"] == 0
+    assert trends[("2025-02", "読書")]["delta"] == -3
+    assert ("2025-01", "散歩") not in trends
+
+
+def test_空の履歴では空リストを返す():
+    assert compute_trends([]) == []
+
+
+def test_記録の無い月を挟んでも前月との差分になる():
+    rows = [
+        _row("2024-12", "散歩", 2),
+        _row("2025-02", "散歩", 5),
+    ]
+
+    trends = {t["target_month"]: t for t in compute_trends(rows)}
+
+    assert trends["2025-01"]["count"] == 0
+    assert trends["2025-01"]["delta"] == -2
+    assert trends["2025-02"]["delta"] == 5
+
+
+def test_月ごとの件数を絞ると上昇と下降の上位だけが残る():
+    rows = [_row("2025-01", f"語{i}", 10) for i in range(6)] + [
+        _row("2025-02", f"語{i}", 10 + i - 2) for i in range(6)
+    ]
+
+    trends = compute_trends(rows, per_month=2)
+
+    february = {t["word"]: t["delta"] for t in trends if t["target_month"] == "2025-02"}
+    assert february == {"語5": 3, "語4": 2, "語0": -2, "語1": -1}
+
+
+def test_上位から外れただけの語は下降にならない():
+    counts = {"散歩": 9, "読書": 8, "料理": 7, "映画": 6, "音楽": 5, "珈琲": 4}
+    with FakeSupabaseServer() as server:
+        client = create_client(server.url, "loadtest.fake.key")
+        save_monthly_keyword_counts(client, "u1", "2025-01", Counter(counts))
+        # 2月は「珈琲」が1回増えて5位に入り、「音楽」は同じ回数のまま6位に落ちる
+        save_monthly_keyword_counts(
+            client, "u1", "2025-02", Counter({**counts, "珈琲": 6})
+        )
+
+        assert refresh_keyword_trends(client, "u1") > 0
+        trends = server.tables["keyword_trends"]
+
+    february = {t["word"]: t["delta"] for t in trends if t["target_month"] == "2025-02"}
+    assert february == {"珈琲": 2}
+
+
+def test_同じ月を保存し直すと新しい行を書いてから無くなった語だけを消す():
+    with FakeSupabaseServer() as server:
+        client = create_client(server.url, "loadtest.fake.key")
+        save_monthly_keyword_counts(client, "u1", "2025-01", Counter({"散歩": 1}))
+        save_monthly_keyword_counts(
+            client, "u1", "2025-02", Counter({"散歩": 3, "読書": 2})
+        )
+        refresh_keyword_trends(client, "u1")
+        kept_id = next(
+            r["id"]
+            for r in server.tables["monthly_keyword_counts"]
+            if r["target_month"] == "2025-02" and r["word"] == "散歩"
+        )
+
+        save_monthly_keyword_counts(client, "u1", "2025-02", Counter({"散歩": 5}))
+        refresh_keyword_trends(client, "u1")
+
+        counts = sorted(
+            (r["target_month"], r["word"], r["count"], r["id"] == kept_id)
+            for r in server.tables["monthly_keyword_counts"]
+        )
+        trends = sorted(
+            (t["target_month"], t["word"], t["delta"])
+            for t in server.tables["keyword_trends"]
+        )
+
+    assert counts == [("2025-01", "散歩", 1, False), ("2025-02", "散歩", 5, True)]
+    assert trends == [("2025-01", "散歩", 1), ("2025-02", "散歩", 4)]
@@ -0,0 +1,108 @@
+import io
+
+from src.services.user_dict_io import (
+    export_user_dict_csv,
+    import_user_dict,
+    iter_csv_rows,
+)
+
+
+class FakeQuery:
+    def __init__(self, client: "FakeClient"):
+        self.client = client
+        self.data: list = []
+
+    def insert(self, rows):
+        self.client.inserted.append(rows)
+        return self
+
+    def select(self, columns):
+        self.data = [{"id": i, **r} for i, r in enumerate(self.client.stored, 1)]
+        return self
+
+    def eq(self, column, value):
+        return self
+
+    def gt(self, column, value):
+        self.data = [r for r in self.data if r[column] > value]
+        return self
+
+    def order(self, column):
+        return self
+
+    def limit(self, size):
+        self.data = self.data[:size]
+        return self
+
+    def execute(self):
+        return self
+
+
+class FakeClient:
+    def __init__(self, stored: list):
+        self.stored = stored
+        self.inserted: list = []
+
+    def table(self, name: str):
+        assert name == "user_dict"
+        return FakeQuery(self)
+
+
+def test_CSVはヘッダーと空行を飛ばし2列の行を補う():
+    text = (
+        "word,part_of_speech,reading,pronunciation\n"
+        "散歩,名詞,サンポ,サンポ\n\nＡＩ,エーアイ\n"
+    )
+    assert list(iter_csv_rows(io.StringIO(text))) == [
+        ["散歩", "名詞", "サンポ", "サンポ"],
+        ["ＡＩ", "名詞", "エーアイ", "エーアイ"],
+    ]
+
+
+def test_取り込みは検証と重複排除をしてチャンクごとにまとめて登録する():
+    # 正規化を入れる前に保存された「散歩」（全角スペース付き）も既存とみなす
+    client = FakeClient(stored=[{"word": "散歩　", "reading": "サンポ"}])
+    rows = [
+        ["散歩", "名詞", "サンポ", "サンポ"],  # 既存
+        ["ＡＩ", "名詞", "ｴｰｱｲ", "ｴｰｱｲ"],  # 正規化でカタカナになる
+        ["読書", "名詞", "どくしょ", "どくしょ"],  # 読みがひらがな
+        ["料理", "名詞", "リョウリ"],  # 列数不足
+        ["AI", "名詞", "エーアイ", "エーアイ"],  # 入力内の重複
+        ["珈琲", "名詞", "コーヒー", "コーヒー"],
+    ]
+    progress = []
+
+    result = import_user_dict(
+        client,
+        "u1",
+        rows,
+        chunk_size=2,
+        on_progress=lambda r: progress.append(r.added),
+    )
+
+    assert (result.read, result.added, result.invalid_reading) == (6, 2, 1)
+    assert result.skipped == 4
+    inserted = [row for batch in client.inserted for row in batch]
+    assert [(r["word"], r["reading"]) for r in inserted] == [
+        ("AI", "エーアイ"),
+        ("珈琲", "コーヒー"),
+    ]
+    assert all(r["user_id"] == "u1" for r in inserted)
+    assert progress == [1, 2]
+
+
+def test_書き出したCSVはそのまま取り込める():
+    entries = [
+        {
+            "word": "基本,情報",
+            "part_of_speech": "名詞",
+            "reading": "キホンジョウホウ",
+            "pronunciation": "キホンジョウホウ",
+        }
+    ]
+    text = export_user_dict_csv(entries)
+
+    assert text.startswith("word,part_of_speech,reading,pronunciation\n")
+    assert list(iter_csv_rows(io.StringIO(text))) == [
+        ["基本,情報", "名詞", "キホンジョウホウ", "キホンジョウホウ"]
+    ]
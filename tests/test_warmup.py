@@ -0,0 +1,95 @@
+import json
+import os
+
+import pytest
+
+from src.core import warmup
+
+
+@pytest.fixture
+def fresh_warmup(monkeypatch: pytest.MonkeyPatch, tmp_path):
+    """モジュール状態を初期化し、外部依存のステップを差し替える."""
+    monkeypatch.setattr(warmup, "_thread", None)
+    monkeypatch.setattr(warmup, "_ready", warmup.threading.Event())
+    monkeypatch.setattr(warmup, "_status", {step: "pending" for step in warmup.STEPS})
+    monkeypatch.setattr(warmup, "STATUS_FILE", str(tmp_path / "status.json"))
+    monkeypatch.setattr(warmup, "_import_heavy_modules", lambda: None)
+    monkeypatch.setattr(warmup, "_prebuild_recent_user_dicts", lambda: ["a.dic"])
+    monkeypatch.setattr(warmup, "_preload_taggers", lambda paths: None)
+    return tmp_path
+
+
+def test_無効時はウォームアップが開始されない(
+    fresh_warmup, monkeypatch: pytest.MonkeyPatch
+):
+    monkeypatch.delenv("KE_WARMUP", raising=False)
+
+    assert warmup.start_warmup() is False
+    assert warmup._thread is None
+
+
+def test_失敗したステップがあっても準備完了になり状態が書き出される(
+    fresh_warmup, monkeypatch: pytest.MonkeyPatch
+):
+    monkeypatch.setenv("KE_WARMUP", "true")
+
+    def broken_renderer():
+        raise RuntimeError("Chrome not found")
+
+    monkeypatch.setattr(warmup, "_start_renderer", broken_renderer)
+
+    assert warmup.start_warmup() is True
+    assert warmup.wait_until_ready(timeout=5)
+
+    status = warmup.get_warmup_status()
+    assert status["ready"] is True
+    assert status["steps"] == {
+        "modules": "done",
+        "user_dicts": "done",
+        "taggers": "done",
+        "renderer": "failed",
+    }
+
+    with open(os.path.join(fresh_warmup, "status.json"), encoding="utf-8") as f:
+        assert json.load(f)["ready"] is True
+    assert warmup.main([]) == 0
+
+
+def test_全ユーザーを読める鍵が無ければ辞書の事前ビルドを省いて警告する(
+    monkeypatch: pytest.MonkeyPatch, caplog: pytest.LogCaptureFixture
+):
+    from src.services import supabase_client
+
+    def missing_key():
+        raise ValueError("SUPABASE_SERVICE_ROLE_KEY が環境変数に設定されていません。")
+
+    monkeypatch.delenv("USER_DICT_MODE", raising=False)
+    # KELogger.setup 後は伝播しないので、caplog で拾えるようにする
+    monkeypatch.setattr(warmup._log, "propagate", True)
+    monkeypatch.setattr(supabase_client, "create_service_supabase_client", missing_key)
+
+    with caplog.at_level("WARNING", logger="keyword_logger"):
+        assert warmup._prebuild_recent_user_dicts() == [""]
+    assert "SUPABASE_SERVICE_ROLE_KEY" in caplog.text
+
+
+def test_最近のユーザーが見つからなければ警告する(
+    monkeypatch: pytest.MonkeyPatch, caplog: pytest.LogCaptureFixture
+):
+    from supabase import create_client
+
+    from benchmarks.loadtest.fakes import FakeSupabaseServer
+    from src.services import supabase_client
+
+    monkeypatch.delenv("USER_DICT_MODE", raising=False)
+    # KELogger.setup 後は伝播しないので、caplog で拾えるようにする
+    monkeypatch.setattr(warmup._log, "propagate", True)
+    with FakeSupabaseServer() as server:
+        monkeypatch.setattr(
+            supabase_client,
+            "create_service_supabase_client",
+            lambda: create_client(server.url, "loadtest.fake.key"),
+        )
+        with caplog.at_level("WARNING", logger="keyword_logger"):
+            assert warmup._prebuild_recent_user_dicts() == [""]
+    assert "ユーザーが見つからない" in caplog.text